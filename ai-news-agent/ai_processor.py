@@ -5,15 +5,29 @@ AI内容处理器
 import json
 import logging
 import re
-from typing import List, Dict, Any, Optional
+import time
+from typing import Iterable, Iterator, List, Dict, Any, Optional
 from dataclasses import dataclass
 from datetime import datetime
 import pytz
 
 from openai import OpenAI
-from rss_fetcher import RSSArticle
-from config import SILICONFLOW_API_KEY, SILICONFLOW_BASE_URL, MODEL_NAME
+from rss_fetcher import RSSArticle, intern_text
+from cpu_stage import clean_content
+from config import (
+    SILICONFLOW_API_KEY, SILICONFLOW_BASE_URL, MODEL_NAME, MAX_RETRIES, RETRY_DELAY,
+    PROVIDER_REQUESTS_PER_MINUTE, PROVIDER_MAX_CONCURRENCY, PROVIDER_LATENCY_TARGET,
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RECOVERY_TIMEOUT,
+    TIERED_ROUTING_ENABLED, MODEL_TIERS, STAGE_MODEL_TIERS, STRONG_TIER_IMPORTANCE,
+    RELEVANCE_FILTER_ENABLED, LOCAL_CLASSIFIER_ENABLED
+)
 from model_manager import ModelManager, ModelConfig
+from llm_telemetry import telemetry
+from provider_gateway import LaneConfig, ProviderGateway
+from relevance_filter import RelevanceFilter
+from news_classifier import NewsClassifier
+import extractive_summarizer
+from run_profiler import RunProfiler
 
 # 设置详细的日志格式
 logging.basicConfig(
@@ -27,6 +41,16 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# 进程级提供商网关：按 (API地址, 模型) 限流、自适应并发和熔断
+gateway = ProviderGateway(LaneConfig(
+    requests_per_minute=PROVIDER_REQUESTS_PER_MINUTE,
+    max_concurrency=PROVIDER_MAX_CONCURRENCY,
+    latency_target=PROVIDER_LATENCY_TARGET,
+    failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+    recovery_timeout=CIRCUIT_RECOVERY_TIMEOUT,
+    retry_delay=RETRY_DELAY
+))
+
 
 class MockOpenAIClient:
     """Mock OpenAI客户端用于测试"""
@@ -49,7 +73,6 @@ class MockOpenAIClient:
                         
                         if 'JSON格式输出结构化摘要' in prompt:
                             # 从prompt中提取原标题和内容用于生成更真实的模拟数据
-                            import re
                             title_match = re.search(r'文章标题: (.+)', prompt)
                             content_match = re.search(r'文章内容: (.+)', prompt, re.DOTALL)
                             
@@ -132,9 +155,9 @@ class MockOpenAIClient:
         self.chat = MockOpenAIClient.Chat()
 
 
-@dataclass
+@dataclass(slots=True)
 class ProcessedNews:
-    """处理后的新闻数据结构"""
+    """处理后的新闻数据结构（使用__slots__，来源、分类、重要程度和标签驻留为共享字符串）"""
     title: str
     source: str
     source_description: str
@@ -148,6 +171,13 @@ class ProcessedNews:
     processed_time: datetime
     is_today_news: bool = True
     
+    def __post_init__(self):
+        self.source = intern_text(self.source)
+        self.source_description = intern_text(self.source_description)
+        self.category = intern_text(self.category)
+        self.importance = intern_text(self.importance)
+        self.tags = [intern_text(tag) for tag in self.tags]
+    
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
         return {
@@ -164,6 +194,24 @@ class ProcessedNews:
             'processed_time': self.processed_time.isoformat(),
             'is_today_news': self.is_today_news
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ProcessedNews':
+        """由to_dict的结果还原（用于从检查点恢复）"""
+        return cls(
+            title=data['title'],
+            source=data['source'],
+            source_description=data.get('source_description', ''),
+            original_link=data['original_link'],
+            summary=data.get('summary', ''),
+            content=data.get('content', ''),
+            category=data.get('category', 'other'),
+            importance=data.get('importance', 'medium'),
+            key_points=data.get('key_points', []),
+            tags=data.get('tags', []),
+            processed_time=datetime.fromisoformat(data['processed_time']),
+            is_today_news=data.get('is_today_news', True)
+        )
 
 
 class AIProcessor:
@@ -190,19 +238,36 @@ class AIProcessor:
         self.logger = logging.getLogger(__name__)
         self.specified_model_id = model_id  # 保存指定的模型ID
         
-        # 初始化模型管理器
+        # 进程内共享的模型管理器：模型配置来自内存或磁盘缓存，创建处理器不访问后端
+        self.model_manager = ModelManager.shared()
+        self.current_model = None
         try:
-            self.model_manager = ModelManager()
             self.current_model = self.model_manager.get_current_model()
             if self.current_model:
                 self.logger.info(f"AI处理器初始化成功，当前模型: {self.current_model.model_name} ({self.current_model.provider_name})")
             else:
                 self.logger.warning("无法获取AI模型配置，将使用默认配置")
         except Exception as e:
-            self.logger.error(f"初始化模型管理器失败: {str(e)}")
+            self.logger.error(f"获取当前模型失败: {str(e)}")
             self.logger.warning("将使用默认配置")
         
         self.client = None  # 延迟初始化
+        self.tiered_routing = TIERED_ROUTING_ENABLED
+        self._tier_clients: Dict[str, tuple] = {}  # 等级 -> (客户端, 模型配置)
+        self.relevance_filter = RelevanceFilter() if RELEVANCE_FILTER_ENABLED else None
+        self.classifier = NewsClassifier() if LOCAL_CLASSIFIER_ENABLED else None
+        self.profiler = RunProfiler()  # 由NewsAgent在每次运行时替换
+    
+    def set_model(self, model_id: Optional[str]):
+        """
+        切换使用的模型，下次调用大模型时按共享的模型配置缓存创建新客户端
+        
+        Args:
+            model_id: 新的模型ID，None表示使用当前选择的模型
+        """
+        self.specified_model_id = model_id
+        self.client = None
+        self._tier_clients.clear()
     
     def _get_client(self):
         """获取OpenAI客户端，延迟初始化"""
@@ -236,27 +301,143 @@ class AIProcessor:
                 self.client = MockOpenAIClient()
                 return self.client
             
-            # 获取API密钥
-            api_key = self.current_model.api_key or SILICONFLOW_API_KEY
-            if not api_key:
-                self.logger.error("API密钥未设置，将使用Mock客户端")
-                self.client = MockOpenAIClient()
-                return self.client
+            self.client = self._create_client(self.current_model)
+        
+        return self.client
+    
+    def _create_client(self, model_config: ModelConfig):
+        """为指定模型创建OpenAI客户端，缺少API密钥或初始化失败时返回Mock客户端"""
+        # 获取API密钥
+        api_key = model_config.api_key or SILICONFLOW_API_KEY
+        if not api_key:
+            self.logger.error("API密钥未设置，将使用Mock客户端")
+            return MockOpenAIClient()
+        
+        try:
+            client = OpenAI(
+                api_key=api_key,
+                base_url=model_config.api_base_url,
+                timeout=None  # 移除超时限制
+            )
+            self.logger.info(f"OpenAI客户端初始化成功，使用模型: {model_config.model_name} ({model_config.provider_name})")
+            return client
+        except Exception as e:
+            self.logger.error(f"初始化OpenAI客户端失败: {e}")
+            self.logger.warning("将使用Mock客户端，生成的内容将是模板化的")
+            return MockOpenAIClient()
+    
+    def _get_tier_client(self, tier: str):
+        """
+        获取分级路由中指定等级的客户端和模型配置
+        
+        未开启分级路由、该等级未配置模型或模型不可用时，使用当前选择的模型。
+        
+        Args:
+            tier: 模型等级（triage / strong）
             
+        Returns:
+            (客户端, 模型配置)
+        """
+        model_id = MODEL_TIERS.get(tier) if self.tiered_routing else None
+        if not model_id:
+            client = self._get_client()
+            return client, self.current_model
+        
+        if tier not in self._tier_clients:
+            model_config = None
             try:
-                self.client = OpenAI(
-                    api_key=api_key,
-                    base_url=self.current_model.api_base_url,
-                    timeout=None  # 移除超时限制
+                model_config = next(
+                    (m for m in self.model_manager.get_available_models() if m.model_id == model_id), None
                 )
-                self.logger.info(f"OpenAI客户端初始化成功，使用模型: {self.current_model.model_name} ({self.current_model.provider_name})")
-                
             except Exception as e:
-                self.logger.error(f"初始化OpenAI客户端失败: {e}")
-                self.logger.warning("将使用Mock客户端，生成的内容将是模板化的")
-                self.client = MockOpenAIClient()
+                self.logger.error(f"获取{tier}等级模型失败: {str(e)}")
+            
+            if model_config is None:
+                self.logger.warning(f"{tier}等级模型 {model_id} 不可用，使用当前选择的模型")
+                client = self._get_client()
+                self._tier_clients[tier] = (client, self.current_model)
+            else:
+                self.logger.info(f"{tier}等级使用模型: {model_config.model_name} ({model_config.provider_name})")
+                self._tier_clients[tier] = (self._create_client(model_config), model_config)
         
-        return self.client
+        return self._tier_clients[tier]
+    
+    def _chat_completion(self, stage: str, system_prompt: str, prompt: str,
+                         temperature: float, max_tokens: int = 4096) -> str:
+        """
+        调用大模型并记录结构化遥测
+        
+        Args:
+            stage: 调用所属的处理阶段，用于遥测统计
+            system_prompt: 系统提示词
+            prompt: 用户提示词
+            temperature: 采样温度
+            max_tokens: 最大生成Token数
+            
+        Returns:
+            模型回复内容
+        """
+        tier = STAGE_MODEL_TIERS.get(stage, 'strong') if self.tiered_routing else ''
+        client, current_model = self._get_tier_client(tier)
+        current_model = current_model or self.model_manager.get_current_model()
+        model_id = current_model.model_id if current_model else MODEL_NAME
+        provider = 'mock' if isinstance(client, MockOpenAIClient) else (
+            current_model.provider_name if current_model else 'Unknown'
+        )
+        
+        request_data = {
+            "model": model_id,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        
+        attempts = [0]
+        
+        def create():
+            attempts[0] += 1
+            return client.chat.completions.create(**request_data)
+        
+        start = time.perf_counter()
+        try:
+            if isinstance(client, MockOpenAIClient):
+                # Mock客户端没有需要保护的真实提供商，不经过网关
+                response = create()
+            else:
+                lane = current_model.api_base_url if current_model else SILICONFLOW_BASE_URL
+                gateway.configure(
+                    lane, model_id,
+                    requests_per_minute=current_model.requests_per_minute if current_model else None,
+                    max_concurrency=current_model.max_concurrency if current_model else None
+                )
+                response, _ = gateway.call(lane, model_id, create, max_retries=MAX_RETRIES)
+            content = response.choices[0].message.content.strip()
+        except Exception as e:
+            telemetry.record(
+                stage=stage, model=model_id, provider=provider,
+                latency_ms=(time.perf_counter() - start) * 1000,
+                tier=tier, success=False, error=str(e), retries=max(attempts[0] - 1, 0), request=request_data
+            )
+            raise
+        latency_ms = (time.perf_counter() - start) * 1000
+        
+        usage = getattr(response, 'usage', None)
+        # 支持提示词缓存的提供商在 prompt_tokens_details.cached_tokens 中返回命中缓存的输入Token数
+        prompt_details = getattr(usage, 'prompt_tokens_details', None)
+        telemetry.record(
+            stage=stage, model=model_id, provider=provider, latency_ms=latency_ms, tier=tier,
+            prompt_tokens=getattr(usage, 'prompt_tokens', 0) or 0,
+            completion_tokens=getattr(usage, 'completion_tokens', 0) or 0,
+            total_tokens=getattr(usage, 'total_tokens', 0) or 0,
+            cached_tokens=getattr(prompt_details, 'cached_tokens', 0) or 0,
+            retries=max(attempts[0] - 1, 0), request=request_data, response=content
+        )
+        self.logger.debug(f"大模型调用完成: 阶段={stage}, 模型={model_id}, 耗时={latency_ms:.0f}ms")
+        
+        return content
     
     def process_articles(self, articles: List[RSSArticle], progress_callback=None) -> List[ProcessedNews]:
         """
@@ -269,12 +450,42 @@ class AIProcessor:
         Returns:
             处理后的新闻列表
         """
+        return list(self.iter_processed(articles, progress_callback))
+    
+    def iter_processed(self, articles: List[RSSArticle], progress_callback=None) -> Iterator[ProcessedNews]:
+        """
+        逐篇处理文章，每篇处理完成后立即产出结果并释放该文章的原文
+        
+        Args:
+            articles: RSS文章列表
+            progress_callback: 进度回调函数
+            
+        Yields:
+            处理成功的新闻
+        """
         self.logger.info(f"开始处理 {len(articles)} 篇文章")
         
-        processed_news = []
+        # 调用大模型前先用本地模型过滤无关文章
+        if self.relevance_filter is not None and articles:
+            with self.profiler.stage('relevance_filter'):
+                articles, dropped = self.relevance_filter.filter(articles)
+            if dropped:
+                for article in dropped:
+                    article.release_content()
+                self.profiler.increment('relevance_dropped', len(dropped))
+                self.logger.info(f"相关性过滤: 丢弃 {len(dropped)} 篇，保留 {len(articles)} 篇")
+        
+        # 本地模型批量预测分类和重要程度
+        predictions = [None] * len(articles)
+        if self.classifier is not None and articles:
+            with self.profiler.stage('local_classify'):
+                predictions = self.classifier.predict(articles)
+        
+        processed_count = 0
         total_articles = len(articles)
         
         for i, article in enumerate(articles):
+            processed = None
             try:
                 self.logger.info(f"处理文章 {i+1}/{total_articles}: {article.title[:50]}...")
                 
@@ -283,23 +494,26 @@ class AIProcessor:
                     current_progress = 50 + int(25 * (i + 1) / total_articles)
                     progress_callback(current_progress, f"AI处理文章 {i+1}/{total_articles}: {article.title[:30]}...")
                 
-                processed = self._process_single_article(article)
-                if processed:
-                    processed_news.append(processed)
+                processed = self._process_single_article(article, predictions[i])
                 
             except Exception as e:
                 self.logger.error(f"处理文章失败: {str(e)}")
-                continue
+            
+            article.release_content()
+            if processed:
+                processed_count += 1
+                yield processed
         
-        self.logger.info(f"成功处理 {len(processed_news)} 篇文章")
-        return processed_news
+        self.logger.info(f"成功处理 {processed_count} 篇文章")
     
-    def _process_single_article(self, article: RSSArticle) -> Optional[ProcessedNews]:
+    def _process_single_article(self, article: RSSArticle,
+                                prediction: Optional[Dict[str, Any]] = None) -> Optional[ProcessedNews]:
         """
         处理单篇文章
         
         Args:
             article: RSS文章
+            prediction: 本地分类模型的预测结果
             
         Returns:
             处理后的新闻，如果处理失败则返回None
@@ -309,17 +523,34 @@ class AIProcessor:
             self.logger.info(f"开始处理文章: {article.title[:50]}")
             # 不再进行严格的相关性和日期检查
             
-            # 分析文章内容
-            analysis = self._analyze_content(article)
-            
-            # 生成摘要
-            summary = self._generate_summary(article, analysis)
+            # 分析文章内容：本地模型置信度足够高时不调用大模型
+            if prediction and prediction['confident']:
+                self.profiler.increment('local_classified')
+                analysis = self._local_analysis(article, prediction)
+            else:
+                with self.profiler.stage('analyze'):
+                    analysis = self._analyze_content(article, prediction)
             
-            # 提取关键点
-            key_points = self._extract_key_points(article, analysis)
+            if self._needs_strong_tier(analysis):
+                # 生成摘要
+                with self.profiler.stage('summarize'):
+                    summary = self._generate_summary(article, analysis)
+                
+                # 提取关键点
+                with self.profiler.stage('key_points'):
+                    key_points = self._extract_key_points(article, analysis)
+            else:
+                # 分级路由下低重要性文章不调用大模型，使用规则生成摘要和要点
+                self.profiler.increment('triage_only_articles')
+                with self.profiler.stage('fallback_summarize'):
+                    summary = self._fallback_generate_summary(article)
+                    key_points = self._fallback_extract_key_points(article)
             
             # 清理内容中的HTML标签和特殊字符
-            cleaned_content = self._clean_content(article.content)
+            with self.profiler.stage('clean'):
+                cleaned_content = (
+                    article.cleaned_content if article.cleaned_content is not None else self._clean_content(article.content)
+                )
             
             processed_news = ProcessedNews(
                 title=analysis.get('title', article.title),
@@ -342,99 +573,19 @@ class AIProcessor:
             self.logger.error(f"处理单篇文章失败: {str(e)}")
             return None
     
-    def _check_relevance_and_date(self, article: RSSArticle) -> Dict[str, bool]:
-        """
-        检查文章相关性和时效性
-        
-        Args:
-            article: RSS文章
-            
-        Returns:
-            包含is_relevant和is_today的字典
-        """
-        prompt = f"""
-        用中文回答。请分析以下文章是否符合以下条件：
-        1. 是否与人工智能(AI)相关
-        2. 是否为今日(2024年最新)的新闻或信息
-        
-        文章标题: {article.title}
-        文章摘要: {article.summary[:300]}
-        发布时间: {article.published_date if article.published_date else '未知'}
-        来源: {article.source}
-        
-        请以JSON格式回答：
-        {{
-            "is_relevant": true/false,
-            "is_today": true/false,
-            "reason": "判断理由"
-        }}
-        """
-        
-        try:
-            client = self._get_client()
-            current_model = self.current_model or self.model_manager.get_current_model()
-            
-            # 记录发送给大模型的内容
-            self.logger.info(f"=== 发送给大模型的内容 ===")
-            self.logger.info(f"模型: {current_model.model_name if current_model else 'Unknown'}")
-            self.logger.info(f"提供商: {current_model.provider_name if current_model else 'Unknown'}")
-            self.logger.info(f"提示词: {prompt}")
-            self.logger.info(f"================================")
-            
-            # 构建请求数据
-            request_data = {
-                "model": current_model.model_id if current_model else MODEL_NAME,
-                "messages": [
-                    {"role": "system", "content": "你是一个专业的AI新闻筛选专家，能够准确判断文章的相关性和时效性。"},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.1,
-                "max_tokens": 4096
-            }
-            
-            # 记录完整的请求JSON
-            self.logger.info(f"=== 发送给大模型的请求 ===")
-            self.logger.info(f"请求JSON: {json.dumps(request_data, ensure_ascii=False, indent=2)}")
-            self.logger.info(f"========================")
-            
-            response = client.chat.completions.create(**request_data)
-            
-            content = response.choices[0].message.content.strip()
-            
-            # 构建响应数据用于日志记录
-            response_data = {
-                "choices": [{"message": {"content": content}}],
-                "usage": {
-                    "total_tokens": response.usage.total_tokens if hasattr(response, 'usage') and response.usage else 0,
-                    "prompt_tokens": response.usage.prompt_tokens if hasattr(response, 'usage') and response.usage else 0,
-                    "completion_tokens": response.usage.completion_tokens if hasattr(response, 'usage') and response.usage else 0
-                } if hasattr(response, 'usage') and response.usage else {"total_tokens": 0}
-            }
-            
-            # 记录完整的响应JSON
-            self.logger.info(f"=== 大模型返回的响应 ===")
-            self.logger.info(f"响应JSON: {json.dumps(response_data, ensure_ascii=False, indent=2)}")
-            self.logger.info(f"使用Token: {response.usage.total_tokens if hasattr(response, 'usage') and response.usage else 'Unknown'}")
-            self.logger.info(f"=======================")
-            
-            result = self._parse_json_response(content)
-            
-            return {
-                'is_relevant': result.get('is_relevant', False),
-                'is_today': result.get('is_today', True)  # 默认认为是今日新闻
-            }
-            
-        except Exception as e:
-            self.logger.error(f"检查文章相关性失败: {str(e)}")
-            # 默认都通过
-            return {'is_relevant': True, 'is_today': True}
+    def _needs_strong_tier(self, analysis: Dict[str, Any]) -> bool:
+        """文章是否需要由大模型生成摘要和关键要点（未开启分级路由时始终需要）"""
+        if not self.tiered_routing:
+            return True
+        return analysis.get('importance', 'medium') in STRONG_TIER_IMPORTANCE
     
-    def _analyze_content(self, article: RSSArticle) -> Dict[str, Any]:
+    def _analyze_content(self, article: RSSArticle, prediction: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         分析文章内容
 
         Args:
             article: RSS文章
+            prediction: 本地分类模型的预测结果，大模型调用失败时用于降级
 
         Returns:
             分析结果字典
@@ -464,78 +615,40 @@ class AIProcessor:
         """
         
         try:
-            client = self._get_client()
-            current_model = self.current_model or self.model_manager.get_current_model()
-            
-            # 检查是否是Mock客户端
-            if isinstance(client, MockOpenAIClient):
-                self.logger.warning("使用Mock客户端进行内容分析")
-            
-            # 记录发送给大模型的内容
-            # 记录发送给大模型的内容
-            self.logger.info(f"=== 发送给大模型的内容 ===")
-            self.logger.info(f"模型: {current_model.model_name if current_model else 'Unknown'}")
-            self.logger.info(f"提供商: {current_model.provider_name if current_model else 'Unknown'}")
-            self.logger.info(f"提示词: {prompt}")
-            self.logger.info(f"================================")
-            
-            # 构建请求数据
-            request_data = {
-                "model": current_model.model_id if current_model else MODEL_NAME,
-                "messages": [
-                    {"role": "system", "content": "你是一个专业的AI内容分析师，擅长分析和分类AI相关文章。"},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.3,
-                "max_tokens": 4096
-            }
-            
-            # 记录完整的请求JSON
-            self.logger.info(f"=== 发送给大模型的请求 ===")
-            self.logger.info(f"请求JSON: {json.dumps(request_data, ensure_ascii=False, indent=2)}")
-            self.logger.info(f"========================")
-            
-            self.logger.info("开始调用大模型API...")
-            
-            response = client.chat.completions.create(**request_data)
-            
-            self.logger.info("大模型API调用成功，开始处理回复...")
-            
-            content = response.choices[0].message.content.strip()
-            
-            # 构建响应数据用于日志记录
-            response_data = {
-                "choices": [{"message": {"content": content}}],
-                "usage": {
-                    "total_tokens": response.usage.total_tokens if hasattr(response, 'usage') and response.usage else 0,
-                    "prompt_tokens": response.usage.prompt_tokens if hasattr(response, 'usage') and response.usage else 0,
-                    "completion_tokens": response.usage.completion_tokens if hasattr(response, 'usage') and response.usage else 0
-                } if hasattr(response, 'usage') and response.usage else {"total_tokens": 0}
-            }
-            
-            # 记录完整的响应JSON
-            self.logger.info(f"=== 大模型返回的响应 ===")
-            self.logger.info(f"响应JSON: {json.dumps(response_data, ensure_ascii=False, indent=2)}")
-            self.logger.info(f"使用Token: {response.usage.total_tokens if hasattr(response, 'usage') and response.usage else 'Unknown'}")
-            self.logger.info(f"=======================")
-            
-            result = self._parse_json_response(content)
-            
-            # 如果是Mock客户端，记录警告
-            if isinstance(client, MockOpenAIClient):
-                self.logger.warning(f"Mock分析结果: {result}")
-            
-            return result
+            content = self._chat_completion(
+                'analyze',
+                "你是一个专业的AI内容分析师，擅长分析和分类AI相关文章。",
+                prompt,
+                temperature=0.3
+            )
+            return self._parse_json_response(content)
             
         except Exception as e:
             self.logger.error(f"分析文章内容失败: {str(e)}")
-            # 提供基于规则的降级分析
-            return self._fallback_analyze_content(article)
+            # 提供降级分析
+            return self._fallback_analyze_content(article, prediction)
+    
+    def _local_analysis(self, article: RSSArticle, prediction: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        使用本地分类模型的预测结果构造分析结果
+        """
+        return {
+            'title': article.title,  # 保持原标题
+            'category': prediction['category'],
+            'importance': prediction['importance'],
+            'additional_tags': self._keyword_tags(article)
+        }
     
-    def _fallback_analyze_content(self, article: RSSArticle) -> Dict[str, Any]:
+    def _fallback_analyze_content(self, article: RSSArticle,
+                                  prediction: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
-        降级内容分析（基于规则）
+        降级内容分析（优先使用本地分类模型，模型不可用时基于规则）
         """
+        if prediction is None and self.classifier is not None:
+            prediction = self.classifier.predict([article])[0]
+        if prediction is not None:
+            return self._local_analysis(article, prediction)
+        
         title = article.title.lower()
         content = article.content.lower()
         
@@ -556,7 +669,20 @@ class AIProcessor:
             category = 'other'
             importance = 'medium'
         
-        # 生成标签
+        return {
+            'title': article.title,  # 保持原标题
+            'category': category,
+            'importance': importance,
+            'additional_tags': self._keyword_tags(article)
+        }
+    
+    def _keyword_tags(self, article: RSSArticle) -> List[str]:
+        """
+        基于关键词生成标签
+        """
+        title = article.title.lower()
+        content = article.content.lower()
+        
         tags = []
         if 'ai' in title or 'artificial intelligence' in content:
             tags.append('人工智能')
@@ -567,12 +693,7 @@ class AIProcessor:
         if 'llm' in title or 'language model' in content:
             tags.append('大语言模型')
         
-        return {
-            'title': article.title,  # 保持原标题
-            'category': category,
-            'importance': importance,
-            'additional_tags': tags[:3]  # 最多3个标签
-        }
+        return tags[:3]  # 最多3个标签
     
     def _generate_summary(self, article: RSSArticle, analysis: Dict[str, Any]) -> str:
         """
@@ -599,53 +720,12 @@ class AIProcessor:
         """
         
         try:
-            client = self._get_client()
-            client = self._get_client()
-            current_model = self.current_model or self.model_manager.get_current_model()
-            
-            # 构建请求数据
-            request_data = {
-                "model": current_model.model_id if current_model else MODEL_NAME,
-                "messages": [
-                    {"role": "system", "content": "你是一个专业的AI内容编辑，擅长提炼文章精华和生成高质量摘要。"},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.4,
-                "max_tokens": 4096
-            }
-            
-            # 记录完整的请求JSON
-            self.logger.info(f"=== 摘要生成 - 发送给大模型的请求 ===")
-            self.logger.info(f"请求JSON: {json.dumps(request_data, ensure_ascii=False, indent=2)}")
-            self.logger.info(f"================================")
-            
-            self.logger.info("开始调用大模型API生成摘要...")
-            
-            response = client.chat.completions.create(**request_data)
-            
-            self.logger.info("摘要生成API调用成功")
-            summary = response.choices[0].message.content.strip()
-            
-            # 构建响应数据用于日志记录
-            response_data = {
-                "choices": [{"message": {"content": summary}}],
-                "usage": {
-                    "total_tokens": response.usage.total_tokens if hasattr(response, 'usage') and response.usage else 0,
-                    "prompt_tokens": response.usage.prompt_tokens if hasattr(response, 'usage') and response.usage else 0,
-                    "completion_tokens": response.usage.completion_tokens if hasattr(response, 'usage') and response.usage else 0
-                } if hasattr(response, 'usage') and response.usage else {"total_tokens": 0}
-            }
-            
-            # 记录完整的响应JSON
-            self.logger.info(f"=== 摘要生成 - 大模型返回的响应 ===")
-            self.logger.info(f"响应JSON: {json.dumps(response_data, ensure_ascii=False, indent=2)}")
-            self.logger.info(f"生成的摘要: {summary[:100]}...")
-            self.logger.info(f"================================")
-            
-            # 如果是Mock客户端，记录警告
-            if isinstance(client, MockOpenAIClient):
-                self.logger.warning(f"Mock摘要生成: {summary[:50]}...")
-            
+            summary = self._chat_completion(
+                'summary',
+                "你是一个专业的AI内容编辑，擅长提炼文章精华和生成高质量摘要。",
+                prompt,
+                temperature=0.4
+            )
             return summary
             
         except Exception as e:
@@ -654,20 +734,16 @@ class AIProcessor:
     
     def _fallback_generate_summary(self, article: RSSArticle) -> str:
         """
-        降级摘要生成（基于规则）
+        降级摘要生成（本地抽取式摘要）
         """
-        # 如果有原始摘要，使用它
-        if article.summary and len(article.summary) > 20:
-            return article.summary[:200]
+        # 优先从正文中抽取，正文过短时使用RSS自带的摘要
+        for text in (article.content, article.summary):
+            summary = extractive_summarizer.summarize(self._clean_content(text), max_chars=200)
+            if len(summary) > 20:
+                return summary
         
-        # 否则从内容中提取前几句
-        content = self._clean_content(article.content)
-        if content:
-            sentences = content.split('。')
-            meaningful_sentences = [s.strip() for s in sentences if len(s.strip()) > 10]
-            if meaningful_sentences:
-                summary = '。'.join(meaningful_sentences[:2]) + '。'
-                return summary[:200]
+        if article.summary and len(article.summary) > 20:
+            return self._clean_content(article.summary)[:200]
         
         # 最后的降级选项
         return f"本文讨论了关于{article.title}的相关内容，详细信息请查看原文。"
@@ -700,54 +776,13 @@ class AIProcessor:
         """
         
         try:
-            client = self._get_client()
-            client = self._get_client()
-            current_model = self.current_model or self.model_manager.get_current_model()
-            
-            # 构建请求数据
-            request_data = {
-                "model": current_model.model_id if current_model else MODEL_NAME,
-                "messages": [
-                    {"role": "system", "content": "你是一个专业的信息提取专家，能够准确识别文章中的关键信息点。"},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.3,
-                "max_tokens": 4096
-            }
-            
-            # 记录完整的请求JSON
-            self.logger.info(f"=== 关键点提取 - 发送给大模型的请求 ===")
-            self.logger.info(f"请求JSON: {json.dumps(request_data, ensure_ascii=False, indent=2)}")
-            self.logger.info(f"==================================")
-            
-            self.logger.info("开始调用大模型API提取关键点...")
-            
-            response = client.chat.completions.create(**request_data)
-            
-            self.logger.info("关键点提取API调用成功")
-            content = response.choices[0].message.content.strip()
-            
-            # 构建响应数据用于日志记录
-            response_data = {
-                "choices": [{"message": {"content": content}}],
-                "usage": {
-                    "total_tokens": response.usage.total_tokens if hasattr(response, 'usage') and response.usage else 0,
-                    "prompt_tokens": response.usage.prompt_tokens if hasattr(response, 'usage') and response.usage else 0,
-                    "completion_tokens": response.usage.completion_tokens if hasattr(response, 'usage') and response.usage else 0
-                } if hasattr(response, 'usage') and response.usage else {"total_tokens": 0}
-            }
-            
-            # 记录完整的响应JSON
-            self.logger.info(f"=== 关键点提取 - 大模型返回的响应 ===")
-            self.logger.info(f"响应JSON: {json.dumps(response_data, ensure_ascii=False, indent=2)}")
-            self.logger.info(f"==================================")
-            self.logger.info(f"关键点提取原始回复: {content}")
+            content = self._chat_completion(
+                'key_points',
+                "你是一个专业的信息提取专家，能够准确识别文章中的关键信息点。",
+                prompt,
+                temperature=0.3
+            )
             key_points = self._parse_json_response(content)
-            self.logger.info(f"解析后的关键点: {key_points}")
-            
-            # 如果是Mock客户端，记录警告
-            if isinstance(client, MockOpenAIClient):
-                self.logger.warning(f"Mock关键点提取: {key_points}")
             
             if isinstance(key_points, list):
                 return key_points[:5]  # 最多5个要点
@@ -760,53 +795,14 @@ class AIProcessor:
     
     def _fallback_extract_key_points(self, article: RSSArticle) -> List[str]:
         """
-        降级关键点提取（基于规则）
+        降级关键点提取（选取得分最高的句子）
         """
-        title = article.title.lower()
-        content = article.content.lower()
+        for text in (article.content, article.summary):
+            key_points = extractive_summarizer.key_sentences(self._clean_content(text), count=3)
+            if key_points:
+                return key_points
         
-        key_points = []
-        
-        # 基于关键词生成要点
-        if 'jax' in title:
-            key_points = [
-                "JAX深度学习框架发展现状分析",
-                "与PyTorch等主流框架的竞争态势",
-                "在Transformer时代的应用前景"
-            ]
-        elif 'dataset' in title and 'balance' in content:
-            key_points = [
-                "机器学习数据集不平衡问题探讨",
-                "SMOTE等传统方法的局限性分析",
-                "新的数据平衡策略研究方向"
-            ]
-        elif 'router' in title or 'foundation model' in content:
-            key_points = [
-                "基础模型路由器架构设计",
-                "智能模型选择机制研究",
-                "成本优化与质量平衡策略"
-            ]
-        elif 'neurips' in title:
-            key_points = [
-                "NeurIPS会议学术影响力分析",
-                "机器学习领域发展趋势",
-                "学术会议组织与参与讨论"
-            ]
-        elif 'aaai' in title:
-            key_points = [
-                "AAAI会议在AI领域的地位",
-                "人工智能学术评价体系",
-                "会议质量与影响力讨论"
-            ]
-        else:
-            # 通用要点
-            key_points = [
-                "人工智能技术最新进展",
-                "相关应用场景和价值分析",
-                "对行业发展的潜在影响"
-            ]
-        
-        return key_points[:3]  # 返回最多3个要点
+        return [article.title]
     
     def _clean_content(self, content: str) -> str:
         """
@@ -818,51 +814,7 @@ class AIProcessor:
         Returns:
             清理后的内容
         """
-        if not content:
-            return ""
-        
-        # 移除HTML注释
-        content = re.sub(r'<!--.*?-->', '', content, flags=re.DOTALL)
-        
-        # 移除HTML标签
-        content = re.sub(r'<[^>]+>', '', content)
-        
-        # 解码HTML实体
-        html_entities = {
-            '&amp;': '&',
-            '&lt;': '<',
-            '&gt;': '>',
-            '&quot;': '"',
-            '&#32;': ' ',
-            '&nbsp;': ' ',
-            '&hellip;': '...'
-        }
-        
-        for entity, char in html_entities.items():
-            content = content.replace(entity, char)
-        
-        # 清理多余的空白字符
-        content = re.sub(r'\s+', ' ', content)
-        content = content.strip()
-        
-        # 如果内容太短或主要是链接，尝试提取有意义的部分
-        if len(content) < 50 or content.count('http') > 3:
-            # 尝试提取第一段有意义的文本
-            sentences = content.split('.')
-            meaningful_content = []
-            for sentence in sentences:
-                if len(sentence.strip()) > 20 and 'http' not in sentence:
-                    meaningful_content.append(sentence.strip())
-                if len(meaningful_content) >= 3:  # 最多3句
-                    break
-            
-            if meaningful_content:
-                content = '. '.join(meaningful_content) + '.'
-            else:
-                content = "内容需要查看原文链接获取详细信息。"
-        
-        return content[:1000]  # 限制长度
-        return content[:1000]  # 限制长度
+        return clean_content(content)
     
     def _parse_json_response(self, content: str) -> Any:
         """
@@ -874,101 +826,150 @@ class AIProcessor:
         Returns:
             解析后的数据
         """
-        self.logger.info(f"开始解析JSON响应，内容长度: {len(content)}")
-        self.logger.info(f"原始内容: {content[:500]}...")
-        
         try:
             # 直接尝试解析
-            result = json.loads(content)
-            self.logger.info(f"JSON直接解析成功: {result}")
-            return result
-        except json.JSONDecodeError as e:
-            self.logger.warning(f"JSON直接解析失败: {e}")
+            return json.loads(content)
+        except json.JSONDecodeError:
             try:
                 # 提取JSON部分
                 json_match = re.search(r'\{.*\}|\[.*\]', content, re.DOTALL)
                 if json_match:
-                    json_content = json_match.group()
-                    self.logger.info(f"提取到JSON内容: {json_content}")
-                    result = json.loads(json_content)
-                    self.logger.info(f"JSON提取解析成功: {result}")
-                    return result
-                else:
-                    self.logger.error("无法找到有效的JSON内容")
-                    raise ValueError("无法找到有效的JSON内容")
+                    return json.loads(json_match.group())
+                raise ValueError("无法找到有效的JSON内容")
             except Exception as parse_error:
-                self.logger.error(f"JSON解析完全失败: {parse_error}")
-                self.logger.error(f"失败的内容: {content[:200]}")
+                # 原始内容已由遥测按采样记录，这里只记录长度
+                self.logger.warning(f"JSON解析失败: {parse_error}，内容长度: {len(content)}")
                 return {}
     
-    def generate_daily_report(self, processed_news: List[ProcessedNews]) -> Dict[str, Any]:
+    def new_report(self) -> Dict[str, Any]:
+        """创建不含新闻的报告结构（由add_to_report和finalize_report填充）"""
+        return {
+            'summary': '',
+            'total_count': 0,
+            'category_stats': {},
+            'importance_stats': {},
+            'top_stories': [],
+            'all_news': [],
+        }
+    
+    def generate_daily_report(self, processed_news: Iterable[ProcessedNews]) -> Dict[str, Any]:
         """
         生成每日AI新闻报告
         
         Args:
-            processed_news: 处理后的新闻列表
+            processed_news: 处理后的新闻（可以是生成器）
             
         Returns:
             每日报告数据
         """
-        if not processed_news:
-            return {
-                'summary': '今日暂无AI相关重要新闻',
-                'total_count': 0,
-                'category_stats': {},
-                'importance_stats': {},
-                'top_stories': [],
-                'generated_time': datetime.now(pytz.timezone('Asia/Shanghai')).isoformat()
-            }
-        
-        # 统计信息
-        category_stats = {}
-        importance_stats = {}
-        
-        for news in processed_news:
+        return self.merge_into_report(self.new_report(), processed_news)
+    
+    def merge_into_report(self, report: Dict[str, Any], new_news: Iterable[ProcessedNews]) -> Dict[str, Any]:
+        """
+        将新处理的新闻合并到已有报告中（原地更新统计），只有Top新闻变化时才重新生成每日总结
+        
+        Args:
+            report: 已有的报告数据（generate_daily_report或之前保存的报告）
+            new_news: 新处理的新闻（可以是生成器），原文链接已在报告中的新闻会被忽略
+            
+        Returns:
+            更新后的报告
+        """
+        added = self.add_to_report(report, new_news)
+        return self.finalize_report(report, added)
+    
+    def add_to_report(self, report: Dict[str, Any], new_news: Iterable[ProcessedNews]) -> int:
+        """
+        逐条把新闻转换为字典追加到报告并更新统计；传入生成器时不保留ProcessedNews对象，
+        报告中的字典是每条新闻唯一的副本（top_stories引用同一批字典）
+        
+        Args:
+            report: 报告数据
+            new_news: 新处理的新闻，原文链接已在报告中的新闻会被忽略
+            
+        Returns:
+            新增的新闻数
+        """
+        all_news = report.setdefault('all_news', [])
+        category_stats = report.setdefault('category_stats', {})
+        importance_stats = report.setdefault('importance_stats', {})
+        known_links = {news.get('original_link') for news in all_news}
+        
+        added = 0
+        for news in new_news:
+            if news.original_link in known_links:
+                continue
+            known_links.add(news.original_link)
+            all_news.append(news.to_dict())
             category_stats[news.category] = category_stats.get(news.category, 0) + 1
             importance_stats[news.importance] = importance_stats.get(news.importance, 0) + 1
+            added += 1
+        report['total_count'] = len(all_news)
+        return added
+    
+    def finalize_report(self, report: Dict[str, Any], added: int = 0) -> Dict[str, Any]:
+        """
+        选出Top新闻并更新每日总结（Top新闻未变化时沿用已有总结）
+        
+        Args:
+            report: 已由add_to_report追加新闻的报告
+            added: 本次新增的新闻数（用于日志）
+            
+        Returns:
+            更新后的报告
+        """
+        all_news = report.setdefault('all_news', [])
+        
+        if not all_news:
+            report['summary'] = '今日暂无AI相关重要新闻'
+            report['top_stories'] = []
+            report['generated_time'] = datetime.now(pytz.timezone('Asia/Shanghai')).isoformat()
+            return report
         
         # 选择top故事（高重要性优先，然后按source多样性）
-        high_importance = [n for n in processed_news if n.importance == 'high']
-        medium_importance = [n for n in processed_news if n.importance == 'medium']
+        high_importance = [n for n in all_news if n.get('importance') == 'high']
+        medium_importance = [n for n in all_news if n.get('importance') == 'medium']
+        top_stories = (high_importance[:3] + medium_importance[:2])[:5]  # 最多5个top stories
         
-        top_stories = high_importance[:3] + medium_importance[:2]
-        top_stories = top_stories[:5]  # 最多5个top stories
+        previous_top = [story.get('original_link') for story in report.get('top_stories', [])]
+        top_changed = [story.get('original_link') for story in top_stories] != previous_top
+        report['top_stories'] = top_stories
         
-        # 生成总结
-        summary = self._generate_daily_summary(processed_news, category_stats, importance_stats)
+        # 生成总结（Top新闻未变化时沿用已有总结）
+        if top_changed or not report.get('summary'):
+            with self.profiler.stage('daily_summary'):
+                report['summary'] = self._generate_daily_summary(
+                    [news.get('title', '') for news in all_news],
+                    report.get('category_stats', {}), report.get('importance_stats', {})
+                )
+        else:
+            self.profiler.increment('daily_summary_reused')
         
-        return {
-            'summary': summary,
-            'total_count': len(processed_news),
-            'category_stats': category_stats,
-            'importance_stats': importance_stats,
-            'top_stories': [story.to_dict() for story in top_stories],
-            'all_news': [news.to_dict() for news in processed_news],
-            'generated_time': datetime.now(pytz.timezone('Asia/Shanghai')).isoformat()
-        }
+        if added:
+            self.logger.info(f"报告新增 {added} 条新闻，共 {len(all_news)} 条，Top新闻{'已变化' if top_changed else '未变化'}")
+        report['generated_time'] = datetime.now(pytz.timezone('Asia/Shanghai')).isoformat()
+        return report
     
-    def _generate_daily_summary(self, processed_news: List[ProcessedNews], 
+    def _generate_daily_summary(self, all_titles: List[str], 
                                category_stats: Dict[str, int], 
                                importance_stats: Dict[str, int]) -> str:
         """
         生成每日总结
         
         Args:
-            processed_news: 处理后的新闻列表
+            all_titles: 报告中全部新闻的标题
             category_stats: 分类统计
             importance_stats: 重要性统计
             
         Returns:
             每日总结文本
         """
-        news_titles = [news.title for news in processed_news[:10]]  # 取前10个标题
+        news_titles = all_titles[:10]  # 取前10个标题
         
         prompt = f"""
         用中文回答。请基于今日AI新闻数据生成一个简洁的每日总结（100-150字）：
         
-        新闻总数: {len(processed_news)}
+        新闻总数: {len(all_titles)}
         重要新闻: {importance_stats.get('high', 0)}条
         主要分类: {', '.join([f"{self.CATEGORIES.get(k, k)}({v}条)" for k, v in category_stats.items()])}
         
@@ -979,53 +980,17 @@ class AIProcessor:
         """
         
         try:
-            client = self._get_client()
-            client = self._get_client()
-            current_model = self.current_model or self.model_manager.get_current_model()
-            
-            # 构建请求数据
-            request_data = {
-                "model": current_model.model_id if current_model else MODEL_NAME,
-                "messages": [
-                    {"role": "system", "content": "你是一个专业的AI行业分析师，擅长总结每日AI动态和趋势。"},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.4,
-                "max_tokens": 4096
-            }
-            
-            # 记录完整的请求JSON
-            self.logger.info(f"=== 每日总结 - 发送给大模型的请求 ===")
-            self.logger.info(f"请求JSON: {json.dumps(request_data, ensure_ascii=False, indent=2)}")
-            self.logger.info(f"================================")
-            
-            self.logger.info("开始调用大模型API生成每日总结...")
-            
-            response = client.chat.completions.create(**request_data)
-            
-            self.logger.info("每日总结API调用成功")
-            summary = response.choices[0].message.content.strip()
-            
-            # 构建响应数据用于日志记录
-            response_data = {
-                "choices": [{"message": {"content": summary}}],
-                "usage": {
-                    "total_tokens": response.usage.total_tokens if hasattr(response, 'usage') and response.usage else 0,
-                    "prompt_tokens": response.usage.prompt_tokens if hasattr(response, 'usage') and response.usage else 0,
-                    "completion_tokens": response.usage.completion_tokens if hasattr(response, 'usage') and response.usage else 0
-                } if hasattr(response, 'usage') and response.usage else {"total_tokens": 0}
-            }
-            
-            # 记录完整的响应JSON
-            self.logger.info(f"=== 每日总结 - 大模型返回的响应 ===")
-            self.logger.info(f"响应JSON: {json.dumps(response_data, ensure_ascii=False, indent=2)}")
-            self.logger.info(f"生成的每日总结: {summary}")
-            self.logger.info(f"================================")
+            summary = self._chat_completion(
+                'daily_summary',
+                "你是一个专业的AI行业分析师，擅长总结每日AI动态和趋势。",
+                prompt,
+                temperature=0.4
+            )
             return summary
             
         except Exception as e:
             self.logger.error(f"生成每日总结失败: {str(e)}")
-            return f"今日共收集到{len(processed_news)}条AI相关资讯，涵盖{len(category_stats)}个主要领域，其中{importance_stats.get('high', 0)}条为高重要性新闻。"
+            return f"今日共收集到{len(all_titles)}条AI相关资讯，涵盖{len(category_stats)}个主要领域，其中{importance_stats.get('high', 0)}条为高重要性新闻。"
 
 
 if __name__ == "__main__":
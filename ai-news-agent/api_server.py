@@ -7,7 +7,7 @@ import logging
 import os
 import pytz
 from datetime import datetime, date
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import threading
@@ -15,8 +15,11 @@ import time
 
 from news_agent import NewsAgent
 from rss_fetcher import setup_logging
-from config import RSS_SOURCES
+from config import (
+    SCHEDULER_ENABLED, ADAPTIVE_POLLING_ENABLED, REQUEST_CONNECT_TIMEOUT, REQUEST_READ_TIMEOUT, FETCH_DEADLINE_SECONDS
+)
 from model_manager import ModelManager
+from scheduler import Scheduler, ScheduledJob, build_jobs, job_sources
 
 # 设置上海时区
 SHANGHAI_TZ = pytz.timezone('Asia/Shanghai')
@@ -35,7 +38,7 @@ app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
 
 # 全局变量
 news_agent = NewsAgent()
-model_manager = ModelManager()
+model_manager = ModelManager.shared()
 fetch_status = {
     'is_fetching': False,
     'progress': 0,
@@ -66,6 +69,132 @@ def get_shanghai_time():
     return datetime.now(SHANGHAI_TZ)
 
 
+def begin_fetch(message: str) -> bool:
+    """
+    标记抓取任务开始（检查和设置在同一把锁内完成，API和定时任务不会同时运行）
+    
+    Returns:
+        已有抓取任务在运行时返回False
+    """
+    with fetch_lock:
+        if fetch_status['is_fetching']:
+            return False
+        fetch_status.update({
+            'is_fetching': True,
+            'progress': 0,
+            'message': message,
+            'start_time': get_shanghai_time().isoformat(),
+            'estimated_completion': None,
+            'last_error': None
+        })
+        return True
+
+
+def end_fetch():
+    """标记抓取任务结束"""
+    with fetch_lock:
+        fetch_status['is_fetching'] = False
+        logging.info("抓取任务结束，状态已重置")
+
+
+def run_collection(target_date: date, model_id: Optional[str] = None, incremental: bool = True,
+                   source_names: Optional[List[str]] = None, adaptive_polling: bool = False,
+                   resume: Union[bool, str] = False):
+    """
+    执行抓取和处理流程并更新抓取状态（调用方负责begin_fetch/end_fetch）
+    
+    Args:
+        target_date: 目标日期
+        model_id: 指定使用的模型
+        incremental: 是否只处理新增文章并合并到已有报告
+        source_names: 只抓取这些RSS源，None表示全部
+        adaptive_polling: 只抓取到了下次轮询时间的RSS源
+        resume: 从未完成运行的检查点继续（True取最近的检查点，字符串指定运行ID）
+        
+    Returns:
+        是否执行成功（失败原因记录在抓取状态的last_error中）
+    """
+    try:
+        # 如果指定了模型，先选择模型
+        if model_id:
+            update_fetch_status(5, f'选择AI模型: {model_id}...')
+            selected_model = model_manager.select_model(model_id)
+            if selected_model:
+                # 通知news_agent更新模型
+                news_agent.update_model(model_id)
+                logging.info(f"NewsAgent已更新为使用模型: {selected_model.model_name}")
+                update_fetch_status(10, f'已选择模型: {selected_model.model_name}')
+            else:
+                logging.warning(f"指定的模型 {model_id} 不存在，将使用默认模型")
+        
+        # 使用统一的进度回调执行完整的抓取和处理流程
+        def progress_callback(progress, message):
+            update_fetch_status(progress, message)
+        
+        update_fetch_status(15, '初始化新闻代理...')
+        
+        # 使用news_agent的统一方法处理所有步骤
+        report = news_agent.run_daily_collection(
+            target_date, progress_callback, incremental=incremental, source_names=source_names,
+            adaptive_polling=adaptive_polling, resume=resume
+        )
+        
+        logging.info(f"抓取任务完成: 原始文章{report.get('raw_articles_count', 0)}篇，处理后{report.get('processed_articles_count', 0)}篇")
+        return True
+        
+    except Exception as e:
+        error_msg = f'抓取失败: {str(e)}'
+        update_fetch_status(0, error_msg, str(e))
+        logging.error(f"抓取任务失败: {error_msg}", exc_info=True)
+        return False
+
+
+def scheduled_collection(job: ScheduledJob) -> bool:
+    """
+    定时任务：与API触发的抓取共用同一个运行状态，已有任务在运行时返回False由调度器稍后重试
+    
+    抓取失败时抛出异常，调度器不会把本次记为已运行。
+    """
+    if not begin_fetch(f'定时任务 {job.name} 开始抓取新闻...'):
+        return False
+    try:
+        source_names = [source['name'] for source in refresh_sources()]
+        succeeded = run_collection(
+            get_shanghai_time().date(), source_names=job_sources(job, source_names),
+            adaptive_polling=ADAPTIVE_POLLING_ENABLED
+        )
+    finally:
+        end_fetch()
+    if not succeeded:
+        raise RuntimeError(fetch_status.get('last_error') or '抓取失败')
+    return True
+
+
+# 定时任务调度器，SCHEDULER_ENABLED时由start_scheduler()创建
+scheduler: Optional[Scheduler] = None
+
+
+def refresh_sources() -> List[Dict[str, Any]]:
+    """从RSS源注册表更新源列表，调度器已启动时按新的源列表更新按源调度的任务"""
+    sources = news_agent.refresh_sources()
+    if scheduler is not None:
+        scheduler.sync_jobs(build_jobs(scheduled_collection, [source['name'] for source in sources]))
+    return sources
+
+
+def start_scheduler():
+    """
+    创建并启动定时任务调度器（后台线程）
+    
+    直接运行本文件时由 __main__ 调用；使用WSGI服务器部署时需在只执行一次的入口中显式调用，避免多个worker重复调度。
+    """
+    global scheduler
+    if scheduler is None:
+        scheduler = Scheduler([])
+        refresh_sources()
+    scheduler.start()
+
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """健康检查"""
@@ -79,10 +208,11 @@ def health_check():
 
 @app.route('/api/sources', methods=['GET'])
 def get_sources():
-    """获取RSS源列表"""
+    """获取RSS源列表（来自RSS源注册表，不包含已隔离的源）"""
+    sources = refresh_sources()
     return jsonify({
-        'sources': RSS_SOURCES,
-        'total_count': len(RSS_SOURCES)
+        'sources': sources,
+        'total_count': len(sources)
     })
 
 
@@ -95,6 +225,8 @@ def fetch_news():
     target_date_str = data.get('date')
     force_refresh = data.get('force_refresh', False)
     model_id = data.get('model_id')  # 新增：指定使用的模型
+    rebuild = data.get('rebuild', False)  # 强制刷新时重新生成整份报告，默认只合并新增文章
+    resume = data.get('resume', False)  # 从上次未完成运行的检查点继续，可传运行ID
     
     # 检查是否正在抓取
     if fetch_status['is_fetching']:
@@ -113,8 +245,8 @@ def fetch_news():
     else:
         target_date = get_shanghai_time().date()
     
-    # 检查是否已有今日报告（除非强制刷新）
-    if not force_refresh:
+    # 检查是否已有今日报告（除非强制刷新或恢复未完成的运行）
+    if not force_refresh and not resume:
         existing_report = news_agent.get_report_by_date(target_date)
         if existing_report:
             return jsonify({
@@ -124,51 +256,18 @@ def fetch_news():
             })
     
     # 启动后台抓取任务
+    if not begin_fetch('开始抓取新闻...'):
+        return jsonify({
+            'error': '正在抓取新闻，请稍后再试',
+            'status': fetch_status
+        }), 409
+    
     def fetch_task():
-        with fetch_lock:
-            fetch_status.update({
-                'is_fetching': True,
-                'progress': 0,
-                'message': '开始抓取新闻...',
-                'start_time': get_shanghai_time().isoformat(),
-                'estimated_completion': None,
-                'last_error': None
-            })
-        
         try:
-            # 如果指定了模型，先选择模型
-            if model_id:
-                update_fetch_status(5, f'选择AI模型: {model_id}...')
-                selected_model = model_manager.select_model(model_id)
-                if selected_model:
-                    # 通知news_agent更新模型
-                    news_agent.update_model(model_id)
-                    logging.info(f"NewsAgent已更新为使用模型: {selected_model.model_name}")
-                    update_fetch_status(10, f'已选择模型: {selected_model.model_name}')
-                else:
-                    logging.warning(f"指定的模型 {model_id} 不存在，将使用默认模型")
-            
-            # 使用统一的进度回调执行完整的抓取和处理流程
-            def progress_callback(progress, message):
-                update_fetch_status(progress, message)
-            
-            update_fetch_status(15, '初始化新闻代理...')
-            
-            # 使用news_agent的统一方法处理所有步骤
-            report = news_agent.run_daily_collection(target_date, progress_callback)
-            
-            logging.info(f"抓取任务完成: 原始文章{report.get('raw_articles_count', 0)}篇，处理后{report.get('processed_articles_count', 0)}篇")
-            
-        except Exception as e:
-            error_msg = f'抓取失败: {str(e)}'
-            update_fetch_status(0, error_msg, str(e))
-            logging.error(f"抓取任务失败: {error_msg}", exc_info=True)
-        
+            run_collection(target_date, model_id, incremental=not rebuild, resume=resume)
         finally:
             # 确保状态被重置
-            with fetch_lock:
-                fetch_status['is_fetching'] = False
-                logging.info("抓取任务结束，状态已重置")
+            end_fetch()
     
     # 启动后台线程
     thread = threading.Thread(target=fetch_task)
@@ -187,6 +286,25 @@ def get_fetch_status():
     return jsonify(fetch_status.copy())
 
 
+@app.route('/api/schedule', methods=['GET'])
+def get_schedule():
+    """获取定时任务状态"""
+    return jsonify({
+        'enabled': SCHEDULER_ENABLED,
+        'jobs': scheduler.status() if scheduler is not None else []
+    })
+
+
+@app.route('/api/feeds/polling', methods=['GET'])
+def get_feed_polling():
+    """获取各RSS源的轮询统计（新条目到达速率、304比例、下次轮询时间）和各站点的下载耗时"""
+    return jsonify({
+        'adaptive_polling': ADAPTIVE_POLLING_ENABLED,
+        'feeds': news_agent.fetcher.poller.snapshot(),
+        'hosts': news_agent.fetcher.downloader.host_latencies()
+    })
+
+
 @app.route('/api/reports', methods=['GET'])
 def get_reports():
     """获取报告列表"""
@@ -269,6 +387,39 @@ def get_latest_report():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/reports/latest/profile', methods=['GET'])
+def get_latest_profile():
+    """获取最近一次运行的性能档案"""
+    try:
+        profile = news_agent.get_latest_profile()
+        
+        if not profile:
+            return jsonify({'error': '暂无性能档案'}), 404
+        
+        return jsonify(profile)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/reports/<date>/profile', methods=['GET'])
+def get_profile_by_date(date):
+    """根据日期获取运行性能档案"""
+    try:
+        target_date = datetime.strptime(date, '%Y-%m-%d').date()
+        profile = news_agent.get_profile_by_date(target_date)
+        
+        if not profile:
+            return jsonify({'error': f'未找到 {date} 的性能档案'}), 404
+        
+        return jsonify(profile)
+    
+    except ValueError:
+        return jsonify({'error': '日期格式错误，应为YYYY-MM-DD'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/news/structured', methods=['GET'])
 def get_structured_news():
     """
@@ -425,6 +576,8 @@ if __name__ == '__main__':
     print("  GET  /api/sources         - RSS源列表")
     print("  POST /api/fetch-news      - 开始抓取新闻")
     print("  GET  /api/fetch-status    - 抓取状态")
+    print("  GET  /api/schedule        - 定时任务状态")
+    print("  GET  /api/feeds/polling   - RSS源轮询统计")
     print("  GET  /api/reports         - 报告列表")
     print("  GET  /api/reports/latest  - 最新报告")
     print("  GET  /api/reports/<date>  - 指定日期报告")
@@ -433,10 +586,16 @@ if __name__ == '__main__':
     print("  GET  /api/models           - 可用模型列表")
     print("  POST /api/models/select    - 选择模型")
     print("  GET  /api/models/current   - 当前选择的模型")
-    print("配置: 无超时限制，使用上海时区")
+    print(f"配置: RSS下载超时 {REQUEST_CONNECT_TIMEOUT}s/{REQUEST_READ_TIMEOUT}s，抓取截止时间 {FETCH_DEADLINE_SECONDS}s，使用上海时区")
+    
+    debug = True
+    # 启用重载器时只在子进程（WERKZEUG_RUN_MAIN）中启动调度器，避免监控进程中重复运行
+    if SCHEDULER_ENABLED and (not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+        start_scheduler()
+        print("定时抓取已启动")
     
     # 启动Flask应用，设置无超时
     from werkzeug.serving import WSGIRequestHandler
     WSGIRequestHandler.timeout = None  # 设置请求处理无超时
     
-    app.run(host='0.0.0.0', port=5001, debug=True, threaded=True)
+    app.run(host='0.0.0.0', port=5001, debug=debug, threaded=True)
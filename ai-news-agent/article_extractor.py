@@ -0,0 +1,280 @@
+"""
+全文提取
+RSS中的summary/content经常只是导语。本模块并发下载文章页面（按站点限制并发数），
+用readability式的段落打分找出正文所在的节点并提取纯文本。
+提取结果按URL缓存并保存ETag/Last-Modified，缓存有效期内不再下载，过期后用条件请求验证，
+每个页面在多次运行间最多下载和解析一次。
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import lxml.html
+from lxml import etree
+
+from config import (
+    ARTICLE_CACHE_DIR, ARTICLE_CACHE_TTL_HOURS, ARTICLE_FETCH_CONCURRENCY, ARTICLE_PER_HOST_CONCURRENCY,
+    ARTICLE_EXTRACT_MIN_LENGTH, MAX_CONTENT_LENGTH
+)
+from feed_downloader import FeedDownloader
+from run_profiler import RunProfiler
+
+logger = logging.getLogger(__name__)
+
+# 不含正文的标签，打分前整体删除
+REMOVE_TAGS = ['script', 'style', 'noscript', 'iframe', 'form', 'nav', 'header', 'footer', 'aside', 'svg', 'button']
+# class/id命中时降低或提高节点得分
+NEGATIVE_PATTERN = re.compile(
+    r'comment|footer|sidebar|menu|nav|share|social|related|promo|banner|cookie|subscribe|newsletter|advert', re.I
+)
+POSITIVE_PATTERN = re.compile(r'article|body|content|entry|main|post|story|text', re.I)
+# 参与打分的段落标签及最短长度
+PARAGRAPH_TAGS = ['p', 'pre', 'blockquote']
+MIN_PARAGRAPH_LENGTH = 25
+# 正文节点中输出的块级标签
+TEXT_TAGS = {'p', 'pre', 'blockquote', 'li', 'h2', 'h3', 'h4'}
+# 提取结果短于该长度时视为失败
+MIN_ARTICLE_LENGTH = 200
+
+
+def _class_weight(element: etree._Element) -> int:
+    weight = 0
+    for name in (element.get('class'), element.get('id')):
+        if not name:
+            continue
+        if NEGATIVE_PATTERN.search(name):
+            weight -= 25
+        if POSITIVE_PATTERN.search(name):
+            weight += 25
+    return weight
+
+
+def _link_density(element: etree._Element, text_length: int) -> float:
+    if not text_length:
+        return 1.0
+    link_length = sum(len(link.text_content()) for link in element.iter('a'))
+    return link_length / text_length
+
+
+def extract_main_text(html: bytes) -> str:
+    """
+    提取HTML页面的正文
+
+    Args:
+        html: 页面原始内容（按页面声明的编码解码）
+
+    Returns:
+        段落之间以空行分隔的正文，找不到正文时返回空字符串
+    """
+    try:
+        doc = lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        return ''
+
+    etree.strip_elements(doc, *REMOVE_TAGS, etree.Comment, with_tail=False)
+
+    # 段落得分累加到父节点，一半累加到祖父节点
+    scores: Dict[etree._Element, float] = {}
+    for paragraph in doc.iter(*PARAGRAPH_TAGS):
+        text = paragraph.text_content().strip()
+        if len(text) < MIN_PARAGRAPH_LENGTH:
+            continue
+        score = 1 + text.count(',') + text.count('，') + min(len(text) / 100, 3)
+        parent = paragraph.getparent()
+        grandparent = parent.getparent() if parent is not None else None
+        for node, share in ((parent, 1.0), (grandparent, 0.5)):
+            if node is None:
+                continue
+            if node not in scores:
+                scores[node] = _class_weight(node) + (5 if node.tag in ('div', 'article', 'section') else 0)
+            scores[node] += score * share
+
+    if not scores:
+        return ''
+
+    def final_score(node: etree._Element) -> float:
+        return scores[node] * (1 - _link_density(node, len(node.text_content())))
+
+    best = max(scores, key=final_score)
+    blocks = []
+    for element in best.iter():
+        if element.tag in TEXT_TAGS:
+            text = ' '.join(element.text_content().split())
+            # 嵌套在li中的段落只输出一次
+            if text and (element.tag != 'li' or not any(True for _ in element.iter('p'))):
+                blocks.append(text)
+    text = '\n\n'.join(blocks) if blocks else ' '.join(best.text_content().split())
+    return text if len(text) >= MIN_ARTICLE_LENGTH else ''
+
+
+class ArticleCache:
+    """
+    按URL保存提取结果和ETag/Last-Modified（每个URL一个JSON文件）
+
+    Args:
+        cache_dir: 缓存目录
+    """
+
+    def __init__(self, cache_dir: str = ARTICLE_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def _path(self, url: str) -> Path:
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return self.cache_dir / key[:2] / f'{key}.json'
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(url), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取全文缓存失败 {url}: {str(e)}")
+            return None
+
+    def put(self, url: str, entry: Dict[str, Any]):
+        path = self._path(url)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+            tmp_path.write_text(json.dumps(entry, ensure_ascii=False), encoding='utf-8')
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning(f"保存全文缓存失败 {url}: {str(e)}")
+
+
+class ArticleExtractor:
+    """
+    并发下载文章页面并提取正文
+
+    Args:
+        downloader: 下载器（超时、重试、对冲请求）
+        cache: 提取结果缓存
+        concurrency: 同时下载的页面数
+        per_host: 同一站点同时下载的页面数
+        min_length: RSS内容短于该长度的文章才提取全文
+        ttl_hours: 缓存有效期，过期后用条件请求验证
+    """
+
+    def __init__(self, downloader: Optional[FeedDownloader] = None, cache: Optional[ArticleCache] = None,
+                 concurrency: int = ARTICLE_FETCH_CONCURRENCY, per_host: int = ARTICLE_PER_HOST_CONCURRENCY,
+                 min_length: int = ARTICLE_EXTRACT_MIN_LENGTH, ttl_hours: float = ARTICLE_CACHE_TTL_HOURS):
+        self.downloader = downloader or FeedDownloader()
+        self.cache = cache or ArticleCache()
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.min_length = min_length
+        self.ttl = timedelta(hours=ttl_hours)
+        self.profiler = RunProfiler()  # 由NewsAgent在每次运行时替换
+        self._lock = threading.Lock()
+        self._host_slots: Dict[str, threading.Semaphore] = defaultdict(lambda: threading.Semaphore(self.per_host))
+
+    def _slot(self, url: str) -> threading.Semaphore:
+        with self._lock:
+            return self._host_slots[urlsplit(url).netloc]
+
+    def enrich(self, session: Any, articles: List[Any], deadline: Optional[float] = None) -> int:
+        """
+        为内容过短的文章提取全文，提取结果比原内容长时替换article.content
+
+        Args:
+            session: requests.Session或兼容对象
+            articles: RSSArticle列表（原地修改）
+            deadline: 截止时间（time.monotonic()），到期后未完成的文章保留原内容
+
+        Returns:
+            替换了内容的文章数
+        """
+        targets = [article for article in articles if article.link and len(article.content or '') < self.min_length]
+        self.profiler.increment('extraction_skipped', len(articles) - len(targets))
+        if not targets:
+            return 0
+
+        # 截止时间后仍在运行的任务只写缓存，不再修改文章，也不再计入本次（或之后替换的）profiler
+        profiler = self.profiler
+        closed = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=min(self.concurrency, len(targets)))
+        futures = [
+            executor.submit(self._extract_safely, session, article, deadline, profiler, closed) for article in targets
+        ]
+        done, not_done = wait(futures, timeout=deadline - time.monotonic() if deadline else None)
+        closed.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        if not_done:
+            self.profiler.increment('extraction_deadline_exceeded', len(not_done))
+            logger.warning(f"全文提取超过截止时间，{len(not_done)} 篇文章保留RSS内容")
+
+        enriched = 0
+        for article, future in zip(targets, futures):
+            text = future.result() if future in done else ''
+            if text and len(text) > len(article.content or ''):
+                article.content = text[:MAX_CONTENT_LENGTH]
+                article.cleaned_content = None  # 解析阶段的清理结果已过期，由AI处理器重新清理
+                enriched += 1
+        self.profiler.increment('articles_extracted', enriched)
+        logger.info(f"全文提取: {len(targets)} 篇候选，{enriched} 篇替换为正文")
+        return enriched
+
+    def _extract_safely(self, session: Any, article: Any, deadline: Optional[float],
+                        profiler: RunProfiler, closed: threading.Event) -> str:
+        if closed.is_set():
+            return ''
+        try:
+            with self._slot(article.link):
+                # 等待站点并发名额期间可能已到截止时间
+                if closed.is_set():
+                    return ''
+                return self._extract(session, article, deadline, profiler, closed)
+        except Exception as e:
+            if not closed.is_set():
+                profiler.increment('extraction_failures', feed=article.source)
+                logger.warning(f"提取全文失败 {article.link}: {str(e)}")
+            return ''
+
+    def _extract(self, session: Any, article: Any, deadline: Optional[float],
+                 profiler: RunProfiler, closed: threading.Event) -> str:
+        """下载并提取单篇文章正文（优先使用缓存）"""
+        url = article.link
+        now = datetime.now(timezone.utc)
+        entry = self.cache.get(url)
+        if entry and now - datetime.fromisoformat(entry['fetched_at']) < self.ttl:
+            profiler.increment('extraction_cache_hits', feed=article.source)
+            return entry['text']
+
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        with profiler.stage('extract_fetch', feed=article.source):
+            response = self.downloader.get(session, url, headers=headers, deadline=deadline, feed=article.source)
+        if response.status_code == 304 and entry:
+            if not closed.is_set():
+                profiler.increment('extraction_not_modified', feed=article.source)
+            entry['fetched_at'] = now.isoformat()
+            self.cache.put(url, entry)
+            return entry['text']
+        response.raise_for_status()
+
+        with profiler.stage('extract_parse', feed=article.source):
+            content_type = response.headers.get('Content-Type', 'text/html')
+            text = extract_main_text(response.content) if 'html' in content_type else ''
+        # 提取失败也写入缓存，有效期内不再重复下载
+        self.cache.put(url, {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': now.isoformat(),
+            'text': text,
+        })
+        return text
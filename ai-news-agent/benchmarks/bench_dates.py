@@ -0,0 +1,106 @@
+"""
+发布时间解析基准测试
+按真实RSS源中常见的日期写法（WordPress、Atom、国内CMS等，每个源固定一种写法）生成日期字符串，
+并加入录制RSS中的真实日期，对比逐条调用dateutil与DateNormalizer（按源记忆格式）的耗时，同时校验两者结果一致。
+
+用法：
+    python benchmarks/bench_dates.py --count 20000 --output bench_dates.json
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Tuple
+
+from dateutil import parser as date_parser
+
+from harness import FIXTURES_DIR
+from date_normalizer import DateNormalizer
+
+# 各类源的日期写法（strftime格式或渲染函数）
+SOURCE_STYLES = {
+    'wordpress_rss': lambda dt: dt.strftime('%a, %d %b %Y %H:%M:%S +0000'),
+    'gmt_rss': lambda dt: dt.strftime('%a, %d %b %Y %H:%M:%S GMT'),
+    'us_offset_rss': lambda dt: dt.astimezone(timezone(timedelta(hours=-7))).strftime('%a, %d %b %Y %H:%M:%S %z'),
+    'atom_utc': lambda dt: dt.strftime('%Y-%m-%dT%H:%M:%SZ'),
+    'atom_offset': lambda dt: dt.astimezone(timezone(timedelta(hours=8))).isoformat(),
+    'atom_fraction': lambda dt: dt.strftime('%Y-%m-%dT%H:%M:%S.%f+00:00'),
+    'cms_space_offset': lambda dt: dt.astimezone(timezone(timedelta(hours=8))).strftime('%Y-%m-%d %H:%M:%S %z'),
+    'full_month_rss': lambda dt: dt.strftime('%a, %d %B %Y %H:%M:%S +0000'),
+}
+
+
+def fixture_dates() -> List[str]:
+    """录制RSS中的真实日期字符串"""
+    pattern = re.compile(r'<(?:pubDate|published|updated|dc:date)>([^<]+)</')
+    dates = []
+    for path in sorted(FIXTURES_DIR.glob('*.xml')):
+        dates.extend(pattern.findall(path.read_text(encoding='utf-8')))
+    return dates
+
+
+def build_dates(count: int, seed: int) -> List[Tuple[str, str]]:
+    """生成(来源, 日期字符串)列表，同一来源的写法固定"""
+    rng = random.Random(seed)
+    base = datetime(2025, 9, 1, tzinfo=timezone.utc)
+    styles = list(SOURCE_STYLES.items())
+    samples = [('fixture', value) for value in fixture_dates()]
+    while len(samples) < count:
+        source, render = styles[len(samples) % len(styles)]
+        dt = base - timedelta(seconds=rng.randint(0, 365 * 86400), microseconds=rng.randint(0, 999999))
+        samples.append((source, render(dt)))
+    rng.shuffle(samples)
+    return samples[:count]
+
+
+def _dateutil_aware(value: str) -> datetime:
+    result = date_parser.parse(value)
+    return result if result.tzinfo is not None else result.replace(tzinfo=timezone.utc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='发布时间解析基准测试')
+    parser.add_argument('--count', type=int, default=20000, help='日期字符串数量')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--output', type=str, help='结果JSON文件路径，默认输出到标准输出')
+    args = parser.parse_args()
+
+    samples = build_dates(args.count, args.seed)
+
+    start = time.perf_counter()
+    expected = [_dateutil_aware(value) for _, value in samples]
+    dateutil_seconds = time.perf_counter() - start
+
+    normalizer = DateNormalizer()
+    start = time.perf_counter()
+    actual = [normalizer.parse(value, source) for source, value in samples]
+    normalizer_seconds = time.perf_counter() - start
+
+    mismatches = [samples[i][1] for i in range(len(samples)) if actual[i] != expected[i]]
+
+    output = json.dumps({
+        'benchmark': 'date_parse',
+        'timestamp': datetime.now().isoformat(),
+        'dates': len(samples),
+        'sources': len({source for source, _ in samples}),
+        'dateutil_us_per_date': round(dateutil_seconds / len(samples) * 1e6, 2),
+        'normalizer_us_per_date': round(normalizer_seconds / len(samples) * 1e6, 2),
+        'speedup': round(dateutil_seconds / normalizer_seconds, 1) if normalizer_seconds else 0.0,
+        'normalizer_stats': dict(normalizer.stats),
+        'source_formats': normalizer.source_formats(),
+        'mismatches': len(mismatches),
+        'mismatch_examples': mismatches[:5],
+    }, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding='utf-8')
+        print(f"结果已保存到: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+RSS解析基准测试
+基于录制的RSS生成大体积feed，对比流式解析（收集够MAX_ARTICLES_PER_SOURCE篇即停止）与feedparser整篇解析的耗时；
+并模拟一次抓取中大量源同时完成下载的情况，对比在抓取线程中解析与使用不同进程数的解析进程池的总耗时。
+
+用法：
+    python benchmarks/bench_feed_parse.py --entries 100,500,2000 --repeat 5 --output bench_feed_parse.json
+    python benchmarks/bench_feed_parse.py --pool-feeds 200 --workers 0,4,16
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from harness import FIXTURE_DATE, build_corpus
+from config import MAX_ARTICLES_PER_SOURCE
+from cpu_stage import ParsePool, parse_stream, parse_with_feedparser
+
+
+def _best_of(func, repeat: int) -> float:
+    """多次运行取最短耗时（毫秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def bench_pool(feed_count: int, entries: int, workers: int, repeat: int) -> dict:
+    """
+    用与抓取线程数相同的线程并发解析feed_count个源（每个源entries条，一半为需要退回feedparser的非规范文档）
+
+    Returns:
+        该进程数下的耗时统计
+    """
+    sources, feeds = build_corpus(feed_count * entries, entries)
+    payloads = []
+    for index, source in enumerate(sources):
+        content = feeds[source['url']]
+        if index % 2:
+            # 在第一个标题中加入未定义的实体使流式解析失败，退回feedparser整篇解析
+            content = content.replace(b'<title>', b'<title>&bogus;', 1)
+        payloads.append((content, source['name']))
+
+    # 先创建进程池再启动线程
+    pool = ParsePool(workers)
+    try:
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as threads:
+            elapsed_ms = _best_of(
+                lambda: list(threads.map(lambda item: pool.parse(item[0], item[1], FIXTURE_DATE), payloads)), repeat
+            )
+    finally:
+        pool.shutdown()
+    return {
+        'workers': workers,
+        'feeds': len(payloads),
+        'total_ms': round(elapsed_ms, 1),
+        'feeds_per_second': round(len(payloads) / elapsed_ms * 1000, 1) if elapsed_ms else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RSS解析基准测试')
+    parser.add_argument('--entries', type=str, default='100,500,2000', help='逗号分隔的单个feed条目数')
+    parser.add_argument('--repeat', type=int, default=5, help='每组重复次数（取最短耗时）')
+    parser.add_argument('--pool-feeds', type=int, default=0, help='进程池测试的源数量，0表示不测试')
+    parser.add_argument('--pool-entries', type=int, default=200, help='进程池测试中每个源的条目数')
+    parser.add_argument('--workers', type=str, default='0,4', help='逗号分隔的解析进程数，0表示在线程中解析')
+    parser.add_argument('--output', type=str, help='结果JSON文件路径，默认输出到标准输出')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = []
+    for entries in [int(n) for n in args.entries.split(',') if n.strip()]:
+        sources, feeds = build_corpus(entries, entries)
+        source, content = sources[0], feeds[sources[0]['url']]
+        stream_ms = _best_of(lambda: parse_stream(content, source['name'], FIXTURE_DATE), args.repeat)
+        feedparser_ms = _best_of(lambda: parse_with_feedparser(content, source['name'], FIXTURE_DATE), args.repeat)
+        results.append({
+            'entries': entries,
+            'feed_bytes': len(content),
+            'stream_ms': round(stream_ms, 2),
+            'feedparser_ms': round(feedparser_ms, 2),
+            'speedup': round(feedparser_ms / stream_ms, 1) if stream_ms else 0.0,
+        })
+
+    output = json.dumps({
+        'benchmark': 'feed_parse',
+        'timestamp': datetime.now().isoformat(),
+        'articles_per_source': MAX_ARTICLES_PER_SOURCE,
+        'results': results,
+        'cpu_count': os.cpu_count(),
+        'pool_results': [
+            bench_pool(args.pool_feeds, args.pool_entries, int(workers), args.repeat)
+            for workers in args.workers.split(',') if workers.strip()
+        ] if args.pool_feeds else [],
+    }, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding='utf-8')
+        print(f"结果已保存到: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
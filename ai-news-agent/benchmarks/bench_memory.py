@@ -0,0 +1,178 @@
+"""
+内存基准测试
+回放录制的RSS并使用无延迟的Mock大模型客户端，用tracemalloc测量 run_daily_collection 的内存峰值，
+以及单条RSSArticle/ProcessedNews记录的内存占用，用于确认大批量回填时内存随文章数线性增长且斜率可预期。
+
+用法：
+    python benchmarks/bench_memory.py --sizes 1000,10000,50000 --output bench_memory.json
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+_TMP_DIR = Path(tempfile.mkdtemp(prefix='ai_news_bench_'))
+# 遥测和轮询状态文件写到临时目录，避免污染工作目录；离线回放不访问后端的RSS源注册表
+os.environ.setdefault('LLM_TELEMETRY_FILE', str(_TMP_DIR / 'llm_calls.jsonl'))
+os.environ.setdefault('FEED_STATE_FILE', str(_TMP_DIR / 'feed_state.json'))
+os.environ.setdefault('FEED_REGISTRY_ENABLED', 'false')
+
+from harness import (  # noqa: E402
+    FIXTURE_DATE, LatencyMockOpenAIClient, OfflineModelManager, ReplaySession, build_corpus
+)
+import ai_processor  # noqa: E402
+from ai_processor import ProcessedNews  # noqa: E402
+from config import MAX_ARTICLES_PER_SOURCE  # noqa: E402
+from news_agent import NewsAgent  # noqa: E402
+from rss_fetcher import RSSArticle, RSSFetcher  # noqa: E402
+
+MB = 1024 * 1024
+
+
+def _traced(func):
+    """
+    在tracemalloc下执行函数
+
+    Returns:
+        (函数返回值, 执行期间的内存峰值增量, 执行结束后仍保留的内存增量)，单位字节
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = func()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak - baseline, current - baseline
+
+
+def bench_records(count: int) -> dict:
+    """
+    单条记录的内存占用（字段字符串由各记录共享，只统计记录本身和标签列表）
+
+    Args:
+        count: 创建的记录数
+
+    Returns:
+        每条记录的平均字节数
+    """
+    now = datetime.now()
+    title, summary, link, content = 'title', 'summary', 'https://example.com/a', 'content ' * 100
+
+    def articles():
+        return [
+            RSSArticle(title=title, summary=summary, link=link, source='Source', source_description='Description',
+                       published_date=now, content=content, tags=['AI'], cleaned_content=content)
+            for _ in range(count)
+        ]
+
+    def news():
+        return [
+            ProcessedNews(title=title, source='Source', source_description='Description', original_link=link,
+                          summary=summary, content=content, category='industry_news', importance='medium',
+                          key_points=['point'], tags=['AI'], processed_time=now)
+            for _ in range(count)
+        ]
+
+    def report_dicts(records):
+        return [item.to_dict() for item in records]
+
+    article_list, _, article_bytes = _traced(articles)
+    news_list, _, news_bytes = _traced(news)
+    dicts, _, dict_bytes = _traced(partial(report_dicts, news_list))
+    del article_list, news_list, dicts
+    return {
+        'records': count,
+        'rss_article_bytes': round(article_bytes / count, 1),
+        'processed_news_bytes': round(news_bytes / count, 1),
+        'report_dict_bytes': round(dict_bytes / count, 1),
+    }
+
+
+def run_once(article_count: int) -> dict:
+    """
+    对指定规模的合成语料执行一次完整收集流程并统计内存
+
+    Args:
+        article_count: 文章数量
+
+    Returns:
+        本次基准测试结果
+    """
+    sources, feeds = build_corpus(article_count, MAX_ARTICLES_PER_SOURCE)
+    feed_bytes = sum(len(content) for content in feeds.values())
+
+    agent = NewsAgent(output_dir=str(_TMP_DIR / f'output_{article_count}'))
+    agent.fetcher = RSSFetcher(sources=sources)
+    agent.fetcher.session = ReplaySession(feeds)
+    agent.fetcher.source_interval = 0
+    client = LatencyMockOpenAIClient(delay_ms=0, jitter_ms=0)
+    agent.processor.client = client
+
+    start = time.perf_counter()
+    report, peak, retained = _traced(lambda: agent.run_daily_collection(FIXTURE_DATE))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'articles': article_count,
+        'feeds': len(sources),
+        'feed_mb': round(feed_bytes / MB, 2),
+        'processed': report.get('processed_articles_count', 0),
+        'wall_time_seconds': round(elapsed, 3),
+        'peak_mb': round(peak / MB, 2),
+        'retained_mb': round(retained / MB, 2),
+        'peak_bytes_per_article': round(peak / article_count) if article_count else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='新闻收集流程内存基准测试')
+    parser.add_argument('--sizes', type=str, default='1000,5000',
+                        help='逗号分隔的文章数量，支持100到100000')
+    parser.add_argument('--records', type=int, default=10000, help='测量单条记录内存占用时创建的记录数')
+    parser.add_argument('--output', type=str, help='结果JSON文件路径，默认输出到标准输出')
+    args = parser.parse_args()
+
+    # 基准测试只关心内存，关闭逐篇文章的INFO日志
+    logging.getLogger().setLevel(logging.WARNING)
+    # 基准测试不访问后端，使用固定的模型配置
+    ai_processor.ModelManager = OfflineModelManager
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    results = {
+        'benchmark': 'memory',
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'articles_per_feed': MAX_ARTICLES_PER_SOURCE,
+        },
+        'records': bench_records(args.records),
+        'runs': [],
+    }
+
+    for size in sizes:
+        print(f"运行内存基准测试: {size} 篇文章...", file=sys.stderr)
+        results['runs'].append(run_once(size))
+
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding='utf-8')
+        print(f"结果已保存到: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
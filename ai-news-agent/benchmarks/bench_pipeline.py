@@ -0,0 +1,124 @@
+"""
+新闻收集流程离线基准测试
+回放录制的RSS并使用带延迟注入的Mock大模型客户端，测量 run_daily_collection 的端到端吞吐量和各阶段耗时。
+
+用法：
+    python benchmarks/bench_pipeline.py --sizes 100,1000 --delay-ms 50 --jitter-ms 20 --output bench_pipeline.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+_TMP_DIR = Path(tempfile.mkdtemp(prefix='ai_news_bench_'))
+# 遥测和轮询状态文件写到临时目录，避免污染工作目录；离线回放不访问后端的RSS源注册表
+os.environ.setdefault('LLM_TELEMETRY_FILE', str(_TMP_DIR / 'llm_calls.jsonl'))
+os.environ.setdefault('FEED_STATE_FILE', str(_TMP_DIR / 'feed_state.json'))
+os.environ.setdefault('FEED_REGISTRY_ENABLED', 'false')
+
+from harness import (  # noqa: E402
+    FIXTURE_DATE, LatencyMockOpenAIClient, OfflineModelManager, ReplaySession, build_corpus
+)
+import ai_processor  # noqa: E402
+from config import MAX_ARTICLES_PER_SOURCE  # noqa: E402
+from news_agent import NewsAgent  # noqa: E402
+from rss_fetcher import RSSFetcher  # noqa: E402
+
+
+def run_once(article_count: int, delay_ms: float, jitter_ms: float, seed: int) -> dict:
+    """
+    对指定规模的合成语料执行一次完整收集流程
+
+    Args:
+        article_count: 文章数量
+        delay_ms: 每次大模型调用的注入延迟（毫秒）
+        jitter_ms: 延迟抖动范围（毫秒）
+        seed: 随机种子
+
+    Returns:
+        本次基准测试结果
+    """
+    sources, feeds = build_corpus(article_count, MAX_ARTICLES_PER_SOURCE)
+
+    agent = NewsAgent(output_dir=str(_TMP_DIR / f'output_{article_count}'))
+    agent.fetcher = RSSFetcher(sources=sources)
+    agent.fetcher.session = ReplaySession(feeds)
+    agent.fetcher.source_interval = 0
+    client = LatencyMockOpenAIClient(delay_ms=delay_ms, jitter_ms=jitter_ms, seed=seed)
+    agent.processor.client = client
+
+    start = time.perf_counter()
+    report = agent.run_daily_collection(FIXTURE_DATE)
+    elapsed = time.perf_counter() - start
+
+    profile = agent.last_profile or {}
+    return {
+        'articles': article_count,
+        'feeds': len(sources),
+        'processed': report.get('processed_articles_count', 0),
+        'llm_calls': client.calls,
+        'llm_failures': profile.get('counters', {}).get('llm_failures', 0),
+        'wall_time_seconds': round(elapsed, 3),
+        'articles_per_second': round(article_count / elapsed, 2) if elapsed else 0.0,
+        'stages': profile.get('stages', {}),
+        'llm': profile.get('llm', {}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='新闻收集流程离线基准测试')
+    parser.add_argument('--sizes', type=str, default='100,1000',
+                        help='逗号分隔的文章数量，支持100到100000')
+    parser.add_argument('--delay-ms', type=float, default=0.0, help='每次大模型调用的注入延迟（毫秒）')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='延迟抖动范围（毫秒）')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--output', type=str, help='结果JSON文件路径，默认输出到标准输出')
+    args = parser.parse_args()
+
+    # 基准测试只关心耗时，关闭逐篇文章的INFO日志
+    logging.getLogger().setLevel(logging.WARNING)
+    # 基准测试不访问后端，使用固定的模型配置
+    ai_processor.ModelManager = OfflineModelManager
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    results = {
+        'benchmark': 'pipeline',
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'delay_ms': args.delay_ms,
+            'jitter_ms': args.jitter_ms,
+            'seed': args.seed,
+            'articles_per_feed': MAX_ARTICLES_PER_SOURCE,
+        },
+        'runs': [],
+    }
+
+    for size in sizes:
+        print(f"运行基准测试: {size} 篇文章...", file=sys.stderr)
+        results['runs'].append(run_once(size, args.delay_ms, args.jitter_ms, args.seed))
+
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding='utf-8')
+        print(f"结果已保存到: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+    # 失败的调用会扭曲各阶段耗时，结果不可用
+    failed = [run for run in results['runs'] if run['llm_failures']]
+    for run in failed:
+        print(f"基准测试失败: {run['articles']} 篇文章中有 {run['llm_failures']} 次大模型调用失败", file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+本地相关性过滤评估
+在带标签的数据上计算不同阈值下的准确率、精确率、召回率和F1，并测量批量打分吞吐量，用于选择 RELEVANCE_THRESHOLD。
+
+用法：
+    # 带标签的JSONL（每行包含 title/summary/content 和布尔字段 relevant）
+    python benchmarks/eval_relevance.py --data labeled.jsonl --output eval_relevance.json
+
+    # 分别指定正负样本；不指定时使用录制RSS作为正样本、data/relevance_negatives.jsonl作为负样本
+    python benchmarks/eval_relevance.py --positives positives.jsonl --negatives negatives.jsonl
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from harness import AGENT_DIR, fixture_articles
+from relevance_filter import RelevanceFilter, load_jsonl
+from config import RELEVANCE_MODEL_FILE
+
+
+def evaluate(scores: np.ndarray, labels: np.ndarray, threshold: float) -> dict:
+    """计算指定阈值下的分类指标"""
+    predicted = scores >= threshold
+    true_positive = int(np.sum(predicted & labels))
+    false_positive = int(np.sum(predicted & ~labels))
+    false_negative = int(np.sum(~predicted & labels))
+    precision = true_positive / (true_positive + false_positive) if true_positive + false_positive else 0.0
+    recall = true_positive / (true_positive + false_negative) if true_positive + false_negative else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        'threshold': threshold,
+        'accuracy': round(float(np.mean(predicted == labels)), 4),
+        'precision': round(precision, 4),
+        'recall': round(recall, 4),
+        'f1': round(f1, 4),
+        'kept_ratio': round(float(np.mean(predicted)), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地相关性过滤评估')
+    parser.add_argument('--data', type=str, help='带relevant标签的JSONL文件')
+    parser.add_argument('--positives', type=str, help='相关文章JSONL')
+    parser.add_argument('--negatives', type=str, help='无关文章JSONL')
+    parser.add_argument('--model', type=str, default=RELEVANCE_MODEL_FILE,
+                        help='模型文件路径，传入 lexicon 时强制使用词表打分')
+    parser.add_argument('--thresholds', type=str, default='0.3,0.4,0.5,0.6,0.7,0.8,0.9',
+                        help='逗号分隔的阈值列表')
+    parser.add_argument('--throughput-size', type=int, default=10000, help='吞吐量测试的文章数量')
+    parser.add_argument('--output', type=str, help='结果JSON文件路径，默认输出到标准输出')
+    args = parser.parse_args()
+
+    if args.data:
+        items = load_jsonl(args.data)
+        labels = np.array([bool(item.get('relevant')) for item in items])
+    else:
+        positives = load_jsonl(args.positives) if args.positives else fixture_articles()
+        negatives = load_jsonl(args.negatives or str(AGENT_DIR / 'data' / 'relevance_negatives.jsonl'))
+        items = positives + negatives
+        labels = np.array([True] * len(positives) + [False] * len(negatives))
+
+    relevance_filter = RelevanceFilter(model_path='' if args.model == 'lexicon' else args.model)
+    scores = relevance_filter.score(items)
+
+    # 吞吐量：将样本重复到指定数量后批量打分
+    batch = (items * (args.throughput_size // max(len(items), 1) + 1))[:args.throughput_size]
+    start = time.perf_counter()
+    relevance_filter.score(batch)
+    elapsed = time.perf_counter() - start
+
+    results = {
+        'benchmark': 'relevance_filter',
+        'timestamp': datetime.now().isoformat(),
+        'scorer': relevance_filter.source,
+        'samples': len(items),
+        'positives': int(labels.sum()),
+        'negatives': int((~labels).sum()),
+        'metrics': [evaluate(scores, labels, float(t)) for t in args.thresholds.split(',') if t.strip()],
+        'throughput': {
+            'articles': len(batch),
+            'seconds': round(elapsed, 3),
+            'articles_per_second': round(len(batch) / elapsed, 1) if elapsed else 0.0,
+        },
+    }
+
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding='utf-8')
+        print(f"结果已保存到: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
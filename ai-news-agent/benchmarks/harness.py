@@ -0,0 +1,212 @@
+"""
+离线基准测试工具
+提供带延迟注入的Mock大模型客户端、回放录制RSS的会话以及合成语料生成，
+使基准测试无需访问网络或后端服务即可运行。
+"""
+import copy
+import random
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+AGENT_DIR = Path(__file__).resolve().parent.parent
+if str(AGENT_DIR) not in sys.path:
+    sys.path.insert(0, str(AGENT_DIR))
+
+from ai_processor import MockOpenAIClient  # noqa: E402
+from model_manager import ModelManager, ModelConfig  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+
+# 录制RSS的发布日期，基准测试以此作为目标日期，保证结果可复现
+FIXTURE_DATE = date(2025, 9, 1)
+
+ATOM_NS = 'http://www.w3.org/2005/Atom'
+
+for _prefix, _uri in {
+    'content': 'http://purl.org/rss/1.0/modules/content/',
+    'dc': 'http://purl.org/dc/elements/1.1/',
+    'media': 'http://search.yahoo.com/mrss/',
+    '': ATOM_NS,
+}.items():
+    ET.register_namespace(_prefix, _uri)
+
+
+BENCH_MODEL = ModelConfig(
+    model_id='bench/mock-model',
+    model_name='Benchmark Mock',
+    provider_name='mock',
+    provider_type='mock',
+    api_key='bench',
+    api_base_url='http://localhost.invalid/v1',
+    max_tokens=4096,
+    support_functions=False,
+    support_vision=False
+)
+
+
+class OfflineModelManager(ModelManager):
+    """不访问后端的模型管理器，始终返回基准测试模型"""
+
+    def get_available_models(self, force_refresh: bool = False) -> List[ModelConfig]:
+        return [BENCH_MODEL]
+
+    def get_current_model(self) -> Optional[ModelConfig]:
+        return BENCH_MODEL
+
+
+class _Usage:
+    def __init__(self, prompt_tokens: int, completion_tokens: int):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.total_tokens = prompt_tokens + completion_tokens
+
+
+class LatencyMockOpenAIClient(MockOpenAIClient):
+    """
+    带延迟注入的Mock客户端
+
+    每次调用先休眠 delay_ms ± jitter_ms 毫秒，再返回MockOpenAIClient的模板回复，
+    并按字符数估算Token用量，使性能档案中的Token统计有意义。
+    """
+
+    def __init__(self, delay_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 0):
+        super().__init__()
+        self.delay_ms = delay_ms
+        self.jitter_ms = jitter_ms
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._base_completions = self.chat.completions
+        self.chat.completions = self
+
+    def create(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        delay = max(self.delay_ms + jitter, 0.0)
+        if delay:
+            time.sleep(delay / 1000)
+
+        response = self._base_completions.create(**kwargs)
+        prompt_chars = sum(len(m.get('content', '')) for m in kwargs.get('messages', []))
+        completion_chars = len(response.choices[0].message.content)
+        response.usage = _Usage(prompt_chars // 4, completion_chars // 4)
+        return response
+
+
+class _ReplayResponse:
+    def __init__(self, url: str, content: Optional[bytes]):
+        self.url = url
+        self.content = content or b''
+        self.status_code = 200 if content is not None else 404
+        self.headers: Dict[str, str] = {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"回放数据中不存在: {self.url}")
+
+
+class ReplaySession:
+    """按URL回放预先生成的RSS内容，替代requests.Session"""
+
+    def __init__(self, feeds: Dict[str, bytes]):
+        self.feeds = feeds
+        self.headers: Dict[str, str] = {}
+
+    def get(self, url: str, **kwargs) -> _ReplayResponse:
+        return _ReplayResponse(url, self.feeds.get(url))
+
+
+def _load_fixture(path: Path) -> Tuple[ET.ElementTree, List[ET.Element], bool]:
+    """读取录制的RSS/Atom文件，返回(文档, 条目模板, 是否为Atom)"""
+    tree = ET.parse(path)
+    root = tree.getroot()
+    if root.tag == f'{{{ATOM_NS}}}feed':
+        return tree, root.findall(f'{{{ATOM_NS}}}entry'), True
+    return tree, root.find('channel').findall('item'), False
+
+
+def _tag_entry(entry: ET.Element, suffix: str, is_atom: bool):
+    """为克隆的条目生成唯一的标题、链接和ID"""
+    if is_atom:
+        title = entry.find(f'{{{ATOM_NS}}}title')
+        link = entry.find(f'{{{ATOM_NS}}}link')
+        entry_id = entry.find(f'{{{ATOM_NS}}}id')
+        link.set('href', f"{link.get('href')}?bench={suffix}")
+        entry_id.text = f'{entry_id.text}-{suffix}'
+    else:
+        title = entry.find('title')
+        link = entry.find('link')
+        link.text = f'{link.text}?bench={suffix}'
+        guid = entry.find('guid')
+        if guid is not None:
+            guid.text = f'{guid.text}?bench={suffix}'
+    title.text = f'{title.text} #{suffix}'
+
+
+def fixture_articles() -> List[Dict[str, str]]:
+    """读取录制RSS中的全部条目（标题和摘要），用作评估相关性过滤的正样本"""
+    articles = []
+    for path in sorted(FIXTURES_DIR.glob('*.xml')):
+        _, entries, is_atom = _load_fixture(path)
+        for entry in entries:
+            if is_atom:
+                title = entry.findtext(f'{{{ATOM_NS}}}title', '')
+                summary = entry.findtext(f'{{{ATOM_NS}}}content', '') or entry.findtext(f'{{{ATOM_NS}}}summary', '')
+            else:
+                title = entry.findtext('title', '')
+                summary = entry.findtext('description', '')
+            articles.append({'title': title, 'summary': summary, 'content': ''})
+    return articles
+
+
+def build_corpus(article_count: int, articles_per_feed: int = 10) -> Tuple[List[Dict[str, str]], Dict[str, bytes]]:
+    """
+    基于录制的RSS生成合成语料
+
+    Args:
+        article_count: 文章总数
+        articles_per_feed: 每个合成源的文章数（不应超过MAX_ARTICLES_PER_SOURCE）
+
+    Returns:
+        (RSS源配置列表, URL到RSS内容的映射)
+    """
+    fixtures = [_load_fixture(path) for path in sorted(FIXTURES_DIR.glob('*.xml'))]
+    if not fixtures:
+        raise RuntimeError(f"未找到RSS录制文件: {FIXTURES_DIR}")
+
+    sources: List[Dict[str, str]] = []
+    feeds: Dict[str, bytes] = {}
+    produced = 0
+    feed_index = 0
+
+    while produced < article_count:
+        tree, templates, is_atom = fixtures[feed_index % len(fixtures)]
+        tree = copy.deepcopy(tree)
+        container = tree.getroot() if is_atom else tree.getroot().find('channel')
+        entry_tag = f'{{{ATOM_NS}}}entry' if is_atom else 'item'
+        for entry in container.findall(entry_tag):
+            container.remove(entry)
+
+        count = min(articles_per_feed, article_count - produced)
+        for i in range(count):
+            entry = copy.deepcopy(templates[i % len(templates)])
+            _tag_entry(entry, f'{feed_index}-{i}', is_atom)
+            container.append(entry)
+
+        url = f'https://bench.invalid/feed/{feed_index}.xml'
+        feeds[url] = ET.tostring(tree.getroot(), encoding='utf-8', xml_declaration=True)
+        sources.append({
+            'name': f'Bench Feed {feed_index}',
+            'url': url,
+            'description': f'合成基准测试源 {feed_index}'
+        })
+        produced += count
+        feed_index += 1
+
+    return sources, feeds
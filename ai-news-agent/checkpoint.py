@@ -0,0 +1,151 @@
+"""
+收集任务检查点
+每篇新闻处理完成后立即追加写入本次运行的JSONL检查点（按运行ID命名），并刷新到磁盘。
+运行中途失败时，下次以resume模式运行会读取检查点，跳过已成功处理的文章，避免重复调用大模型。
+运行成功后删除本次及该日期更早运行的检查点；早于当日报告的检查点属于之后已有运行成功完成的日期，恢复时被忽略。
+"""
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RunCheckpoint:
+    """
+    单次运行的检查点文件（线程安全）
+
+    Args:
+        path: 检查点文件路径
+        run_id: 运行ID
+    """
+
+    def __init__(self, path: Path, run_id: str):
+        self.path = path
+        self.run_id = run_id
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, directory: Path, target_date: date, run_id: str) -> 'RunCheckpoint':
+        """创建新的检查点并写入运行信息"""
+        directory.mkdir(parents=True, exist_ok=True)
+        checkpoint = cls(directory / cls._file_name(target_date, run_id), run_id)
+        checkpoint._append({
+            'type': 'run',
+            'run_id': run_id,
+            'collection_date': target_date.isoformat(),
+            'started_at': datetime.now().isoformat(),
+        })
+        return checkpoint
+
+    @staticmethod
+    def _file_name(target_date: date, run_id: str) -> str:
+        return f"ai_news_checkpoint_{target_date.strftime('%Y%m%d')}_{run_id}.jsonl"
+
+    @classmethod
+    def _list(cls, directory: Path, target_date: date, run_id: Optional[str] = None) -> List[Tuple[float, Path]]:
+        """该日期的检查点及其最后写入时间，按时间排序"""
+        checkpoints = []
+        for path in directory.glob(cls._file_name(target_date, run_id or '*')):
+            try:
+                checkpoints.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                # 其他运行刚刚删除了该检查点
+                continue
+        return sorted(checkpoints)
+
+    @classmethod
+    def find(cls, directory: Path, target_date: date, run_id: Optional[str] = None,
+             not_before: Optional[float] = None) -> Optional['RunCheckpoint']:
+        """
+        查找未完成运行的检查点
+
+        Args:
+            directory: 检查点目录
+            target_date: 目标日期
+            run_id: 指定运行ID，None时取该日期最近的检查点
+            not_before: 忽略最后写入时间早于该时间戳的检查点（传入当日报告的修改时间）
+
+        Returns:
+            检查点，不存在时返回None
+        """
+        checkpoints = cls._list(directory, target_date, run_id)
+        if not_before is not None:
+            expired = [path for mtime, path in checkpoints if mtime < not_before]
+            if expired:
+                logger.info(f"忽略 {len(expired)} 个早于当日报告的检查点: {', '.join(path.name for path in expired)}")
+            checkpoints = [(mtime, path) for mtime, path in checkpoints if mtime >= not_before]
+        if not checkpoints:
+            return None
+        path = checkpoints[-1][1]
+        return cls(path, path.stem.rsplit('_', 1)[-1])
+
+    @classmethod
+    def remove_stale(cls, directory: Path, target_date: date, before: float) -> int:
+        """
+        删除该日期最后写入时间早于指定时间的检查点（运行成功完成后调用，它们属于更早的未完成运行）
+
+        Args:
+            directory: 检查点目录
+            target_date: 目标日期
+            before: 时间戳，传入成功运行的开始时间，之后仍在写入的并发运行的检查点不受影响
+
+        Returns:
+            删除的检查点数量
+        """
+        removed = 0
+        for mtime, path in cls._list(directory, target_date):
+            if mtime >= before:
+                continue
+            cls(path, path.stem.rsplit('_', 1)[-1]).remove()
+            removed += 1
+        if removed:
+            logger.info(f"已删除 {target_date} 的 {removed} 个过期检查点")
+        return removed
+
+    def _append(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def append_news(self, news: Dict[str, Any]):
+        """追加一条处理完成的新闻（ProcessedNews.to_dict()的结果）"""
+        self._append({'type': 'news', 'news': news})
+
+    def load_news(self) -> List[Dict[str, Any]]:
+        """
+        读取检查点中已处理的新闻
+
+        Returns:
+            新闻字典列表（同一链接只保留最后一条）；进程崩溃时写了一半的末行被忽略
+        """
+        news_by_link: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line_number, line in enumerate(f, 1):
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        logger.warning(f"跳过检查点 {self.path.name} 第{line_number}行: 内容不完整")
+                        continue
+                    if record.get('type') == 'news':
+                        news_by_link[record['news']['original_link']] = record['news']
+        except OSError as e:
+            logger.error(f"读取检查点失败 {self.path}: {str(e)}")
+        return list(news_by_link.values())
+
+    def remove(self):
+        """运行完成后删除检查点"""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"删除检查点失败 {self.path}: {str(e)}")
@@ -1,6 +1,8 @@
 """
 AI新闻代理配置文件
 """
+import json
+import multiprocessing
 import os
 from typing import List, Dict, Any
 from pathlib import Path
@@ -64,26 +66,108 @@ BACKEND_PASSWORD = os.getenv('BACKEND_PASSWORD', 'admin123')
 BACKEND_JWT_TOKEN = os.getenv('BACKEND_JWT_TOKEN', '')
 BACKEND_AUTH_ENDPOINT = f"{BACKEND_BASE_URL}/api/auth/login/"
 
+# 模型配置缓存（进程内共享一份，保存到磁盘供重启后直接使用；过期后在后台刷新，刷新期间继续使用旧配置）
+MODEL_CACHE_FILE = os.getenv('MODEL_CACHE_FILE', 'output/model_cache.json')
+MODEL_CACHE_SECONDS = float(os.getenv('MODEL_CACHE_SECONDS', '86400'))  # 缓存超过该时长后在后台刷新
+MODEL_REFRESH_RETRY_SECONDS = float(os.getenv('MODEL_REFRESH_RETRY_SECONDS', '60'))  # 刷新失败后的重试间隔
+
+# RSS源注册表配置（源列表和健康统计由后端维护，后端不可用时使用上面的RSS_SOURCES）
+FEED_REGISTRY_ENABLED = os.getenv('FEED_REGISTRY_ENABLED', 'true').lower() == 'true'
+FEED_REGISTRY_CACHE_SECONDS = float(os.getenv('FEED_REGISTRY_CACHE_SECONDS', '60'))  # 源列表缓存时长（秒）
+
 # 请求配置
-REQUEST_TIMEOUT = None  # 无超时限制
-MAX_RETRIES = 3
-RETRY_DELAY = 2
+REQUEST_CONNECT_TIMEOUT = float(os.getenv('REQUEST_CONNECT_TIMEOUT', '10'))  # 建立连接超时（秒）
+REQUEST_READ_TIMEOUT = float(os.getenv('REQUEST_READ_TIMEOUT', '30'))  # 读取超时（秒），即两次收到数据之间的最长间隔
+REQUEST_TIMEOUT = (REQUEST_CONNECT_TIMEOUT, REQUEST_READ_TIMEOUT)
+MAX_RETRIES = 3  # 连接失败、超时、429和5xx的最大重试次数（RSS下载和大模型调用共用）
+RETRY_DELAY = 2  # 重试的基础退避时间（秒），第n次重试等待 RETRY_DELAY * 2^n
+HEDGE_ENABLED = os.getenv('HEDGE_ENABLED', 'true').lower() == 'true'  # 下载超过该站点p95耗时仍未返回时发起对冲请求
+HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', '95'))
+HEDGE_MIN_SAMPLES = int(os.getenv('HEDGE_MIN_SAMPLES', '5'))  # 站点耗时样本达到该数量后才启用对冲
+FETCH_DEADLINE_SECONDS = float(os.getenv('FETCH_DEADLINE_SECONDS', '300'))  # 整次抓取的截止时间，到期后返回已抓取的部分结果，0表示不限制
+SOURCE_FETCH_INTERVAL = 1  # 相邻RSS源之间的抓取间隔（秒），避免过于频繁的请求
+FETCH_CONCURRENCY = int(os.getenv('FETCH_CONCURRENCY', '4'))  # 同时抓取的RSS源数量，为1时逐个抓取并按上面的间隔等待
+PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', str(os.cpu_count() or 0) if 'fork' in multiprocessing.get_all_start_methods() else '0'))  # RSS解析和正文清理的进程数，支持fork的平台默认为CPU核数，不大于1时不使用进程池
+
+# 大模型提供商网关配置（后端未返回提供商限额时使用）
+PROVIDER_REQUESTS_PER_MINUTE = int(os.getenv('PROVIDER_REQUESTS_PER_MINUTE', '60'))  # 每个提供商/模型每分钟请求上限
+PROVIDER_MAX_CONCURRENCY = int(os.getenv('PROVIDER_MAX_CONCURRENCY', '4'))  # 最大并发请求数
+PROVIDER_LATENCY_TARGET = float(os.getenv('PROVIDER_LATENCY_TARGET', '30'))  # 单次调用超过该耗时（秒）时收缩并发
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))  # 连续失败多少次后熔断
+CIRCUIT_RECOVERY_TIMEOUT = float(os.getenv('CIRCUIT_RECOVERY_TIMEOUT', '30'))  # 熔断后多久尝试恢复（秒）
 
 # 内容过滤配置
 MAX_ARTICLES_PER_SOURCE = 10
 MIN_CONTENT_LENGTH = 50
 MAX_CONTENT_LENGTH = 10000
 
+# 全文提取配置（RSS内容只是导语时下载文章页面提取正文）
+ARTICLE_EXTRACTION_ENABLED = os.getenv('ARTICLE_EXTRACTION_ENABLED', 'false').lower() == 'true'
+ARTICLE_EXTRACT_MIN_LENGTH = int(os.getenv('ARTICLE_EXTRACT_MIN_LENGTH', '1000'))  # RSS内容短于该长度的文章才提取全文
+ARTICLE_FETCH_CONCURRENCY = int(os.getenv('ARTICLE_FETCH_CONCURRENCY', '8'))  # 同时下载的文章页面数
+ARTICLE_PER_HOST_CONCURRENCY = int(os.getenv('ARTICLE_PER_HOST_CONCURRENCY', '2'))  # 同一站点同时下载的页面数
+ARTICLE_CACHE_DIR = os.getenv('ARTICLE_CACHE_DIR', 'output/article_cache')  # 按URL缓存提取结果和ETag
+ARTICLE_CACHE_TTL_HOURS = float(os.getenv('ARTICLE_CACHE_TTL_HOURS', '168'))  # 缓存有效期，过期后用条件请求验证
+
+# 本地相关性过滤配置（在调用大模型前丢弃与AI无关的文章）
+RELEVANCE_MODEL_FILE = os.getenv('RELEVANCE_MODEL_FILE', 'models/relevance.npz')  # 显式开启过滤但模型不存在时使用AI词表打分
+# 默认只在已训练模型时开启；设为true时没有模型也用词表过滤（未经评估，不含词表关键词的文章会被丢弃）
+RELEVANCE_FILTER_ENABLED = os.getenv(
+    'RELEVANCE_FILTER_ENABLED', 'true' if Path(RELEVANCE_MODEL_FILE).exists() else 'false'
+).lower() == 'true'
+RELEVANCE_THRESHOLD = float(os.getenv('RELEVANCE_THRESHOLD', '0.5'))  # 得分低于该值的文章被丢弃
+
+# 本地分类模型配置（预测分类和重要程度，高置信度时跳过大模型分析）
+LOCAL_CLASSIFIER_ENABLED = os.getenv('LOCAL_CLASSIFIER_ENABLED', 'true').lower() == 'true'
+CLASSIFIER_MODEL_DIR = os.getenv('CLASSIFIER_MODEL_DIR', 'models')  # category.npz / importance.npz 所在目录
+CLASSIFIER_CONFIDENCE = float(os.getenv('CLASSIFIER_CONFIDENCE', '0.85'))  # 分类和重要程度概率都不低于该值时不再调用大模型
+
 # 时间配置
 TIMEZONE = "Asia/Shanghai"
 DEFAULT_FETCH_HOURS = [9, 14, 18]  # 默认抓取时间点
 
+# 定时抓取配置（开启后API服务器或 news_agent.py --daemon 按时运行收集任务）
+SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'false').lower() == 'true'
+SCHEDULE_CRON = os.getenv('SCHEDULE_CRON', f"0 {','.join(str(hour) for hour in DEFAULT_FETCH_HOURS)} * * *")  # 分 时 日 月 周
+SOURCE_SCHEDULES = json.loads(os.getenv('SOURCE_SCHEDULES', '{}'))  # 单独调度的RSS源，如 {"Reddit机器学习": "0 */2 * * *"}
+SCHEDULER_JITTER_SECONDS = float(os.getenv('SCHEDULER_JITTER_SECONDS', '300'))  # 触发时间随机延后的上限（秒）
+SCHEDULER_CATCHUP_HOURS = float(os.getenv('SCHEDULER_CATCHUP_HOURS', '6'))  # 停机期间错过的任务在该时长内重启时补跑
+SCHEDULER_STATE_FILE = os.getenv('SCHEDULER_STATE_FILE', 'output/scheduler_state.json')  # 各任务上次运行时间
+
+# 自适应轮询配置（开启后定时任务只抓取到期的RSS源，并按POLL_CRON检查到期的源）
+ADAPTIVE_POLLING_ENABLED = os.getenv('ADAPTIVE_POLLING_ENABLED', 'false').lower() == 'true'
+POLL_CRON = os.getenv('POLL_CRON', '*/15 * * * *')  # 检查到期RSS源的频率
+POLL_MIN_INTERVAL_MINUTES = float(os.getenv('POLL_MIN_INTERVAL_MINUTES', '15'))  # 单个源的最短轮询间隔
+POLL_MAX_INTERVAL_MINUTES = float(os.getenv('POLL_MAX_INTERVAL_MINUTES', '1440'))  # 没有新条目时退避的上限
+POLL_TARGET_NEW_ITEMS = float(os.getenv('POLL_TARGET_NEW_ITEMS', '3'))  # 按到达速率估计，每次轮询期望获得的新条目数
+FEED_STATE_FILE = os.getenv('FEED_STATE_FILE', 'output/feed_state.json')  # 各源的轮询统计和ETag
+
 # 输出配置
 OUTPUT_FORMAT = "json"
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 LOG_FILE = 'ai_agent.log'
 
+# LLM调用遥测配置
+LLM_TELEMETRY_FILE = os.getenv('LLM_TELEMETRY_FILE', 'llm_calls.jsonl')  # 每次调用的结构化记录（JSONL）
+LLM_LOG_SAMPLE_RATE = float(os.getenv('LLM_LOG_SAMPLE_RATE', '0.0'))  # 记录完整请求/响应内容的采样率（0-1）
+LLM_LOG_DEBUG = os.getenv('LLM_LOG_DEBUG', 'false').lower() == 'true'  # 调试模式下记录全部请求/响应内容
+
 # 模型选择配置
 DEFAULT_MODEL_PROVIDER = os.getenv('DEFAULT_MODEL_PROVIDER', 'siliconflow')
 DEFAULT_MODEL_ID = os.getenv('DEFAULT_MODEL_ID', 'Qwen/Qwen3-8B')
+
+# 分级模型路由配置
+# 开启后由小模型完成全部文章的分类和重要性判断，只有重要文章才交给大模型生成摘要和关键要点
+TIERED_ROUTING_ENABLED = os.getenv('TIERED_ROUTING_ENABLED', 'false').lower() == 'true'
+MODEL_TIERS = {
+    'triage': os.getenv('TRIAGE_MODEL_ID', ''),  # 小模型，留空则使用当前选择的模型
+    'strong': os.getenv('STRONG_MODEL_ID', ''),  # 大模型，留空则使用当前选择的模型
+}
+STAGE_MODEL_TIERS = {  # 各处理阶段使用的模型等级
+    'analyze': 'triage',
+    'summary': 'strong',
+    'key_points': 'strong',
+    'daily_summary': 'strong',
+}
+STRONG_TIER_IMPORTANCE = ['high', 'medium']  # 这些重要程度的文章由大模型生成摘要和关键要点
@@ -0,0 +1,309 @@
+"""
+CPU阶段：RSS文档解析和正文清理
+解析XML、从条目提取字段和清理HTML都是纯CPU计算。本模块的函数不依赖抓取器状态，可以在进程池中运行；
+同时下载完成的RSS文档分块提交，一个任务解析一块中的全部文档（文档内的全部条目在同一任务中解析和清理），
+结果以紧凑的可序列化记录返回。下载仍由抓取器的线程完成，下载线程只提交任务，不等待解析结果。
+"""
+import atexit
+import logging
+import multiprocessing
+import re
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+import feedparser
+import pytz
+
+from config import MAX_ARTICLES_PER_SOURCE, TIMEZONE
+from date_normalizer import date_normalizer
+from feed_reader import FeedEntry, FeedFormatError, iter_entries
+
+logger = logging.getLogger(__name__)
+
+# 发布时间与目标日期相差超过该天数的文章被过滤
+DATE_WINDOW_DAYS = 7
+
+HTML_ENTITIES = {
+    '&amp;': '&',
+    '&lt;': '<',
+    '&gt;': '>',
+    '&quot;': '"',
+    '&#32;': ' ',
+    '&nbsp;': ' ',
+    '&hellip;': '...'
+}
+
+
+class ArticleRecord(NamedTuple):
+    """解析结果的紧凑记录（来源信息由调用方补充）"""
+    title: str
+    summary: str
+    link: str
+    content: str
+    cleaned_content: str
+    published_date: Optional[datetime]
+    tags: Tuple[str, ...]
+
+
+def clean_content(content: str) -> str:
+    """
+    清理内容中的HTML标签和特殊字符
+
+    Args:
+        content: 原始内容
+
+    Returns:
+        清理后的内容
+    """
+    if not content:
+        return ""
+
+    # 移除HTML注释
+    content = re.sub(r'<!--.*?-->', '', content, flags=re.DOTALL)
+
+    # 移除HTML标签
+    content = re.sub(r'<[^>]+>', '', content)
+
+    # 解码HTML实体
+    for entity, char in HTML_ENTITIES.items():
+        content = content.replace(entity, char)
+
+    # 清理多余的空白字符
+    content = re.sub(r'\s+', ' ', content)
+    content = content.strip()
+
+    # 如果内容太短或主要是链接，尝试提取有意义的部分
+    if len(content) < 50 or content.count('http') > 3:
+        # 尝试提取第一段有意义的文本
+        sentences = content.split('.')
+        meaningful_content = []
+        for sentence in sentences:
+            if len(sentence.strip()) > 20 and 'http' not in sentence:
+                meaningful_content.append(sentence.strip())
+            if len(meaningful_content) >= 3:  # 最多3句
+                break
+
+        if meaningful_content:
+            content = '. '.join(meaningful_content) + '.'
+        else:
+            content = "内容需要查看原文链接获取详细信息。"
+
+    return content[:1000]  # 限制长度
+
+
+def in_date_window(published_date: Optional[datetime], target_date: date, tz: str = TIMEZONE) -> bool:
+    """
+    判断发布时间（换算到本地时区）是否在目标日期前后DATE_WINDOW_DAYS天内，无发布时间的文章保留
+    """
+    if published_date is None:
+        return True
+    return abs((published_date.astimezone(pytz.timezone(tz)).date() - target_date).days) <= DATE_WINDOW_DAYS
+
+
+def _record(entry: FeedEntry) -> Optional[ArticleRecord]:
+    """由条目字段构建记录，缺少标题或链接时返回None"""
+    if not entry.title or not entry.link:
+        return None
+
+    if entry.published_date is None:
+        # 如果没有时间信息，保留文章
+        logger.info(f"文章无发布时间信息，保留处理: {entry.title[:50]}")
+
+    return ArticleRecord(
+        title=entry.title,
+        summary=entry.summary,
+        link=entry.link,
+        content=entry.content,
+        cleaned_content=clean_content(entry.content),
+        published_date=entry.published_date,
+        tags=tuple(entry.tags),
+    )
+
+
+def parse_stream(content: bytes, source_name: str, target_date: date,
+                 max_articles: int = MAX_ARTICLES_PER_SOURCE) -> List[ArticleRecord]:
+    """
+    流式解析RSS feed，收集到max_articles篇时间窗口内的文章后停止
+
+    Raises:
+        FeedFormatError: 文档不是格式正确的RSS/Atom
+    """
+    records = []
+    accept = lambda published: in_date_window(published, target_date)
+    for entry in iter_entries(content, accept, source=source_name):
+        record = _record(entry)
+        if record:
+            records.append(record)
+            if len(records) >= max_articles:
+                break
+    return records
+
+
+def parse_entry(entry: Any, source_name: str, target_date: date) -> Optional[ArticleRecord]:
+    """
+    解析feedparser条目
+
+    Args:
+        entry: feedparser解析的条目
+        source_name: RSS源名称
+        target_date: 目标日期
+
+    Returns:
+        解析后的记录，如果不符合条件则返回None
+    """
+    # 解析发布时间：优先使用feedparser已解析的struct_time
+    published_date = (
+        date_normalizer.from_struct(entry.get('published_parsed'))
+        or date_normalizer.from_struct(entry.get('updated_parsed'))
+        or date_normalizer.parse(entry.get('published') or entry.get('updated'), source_name)
+    )
+
+    # 放宽时间检查：允许最近7天的文章
+    if not in_date_window(published_date, target_date):
+        return None
+
+    # 提取内容
+    summary = getattr(entry, 'summary', '').strip()
+    content = summary
+    if hasattr(entry, 'content') and entry.content:
+        # 获取第一个content条目
+        if isinstance(entry.content, list) and len(entry.content) > 0:
+            content = entry.content[0].get('value', summary)
+        else:
+            content = str(entry.content)
+
+    # 提取标签
+    tags = []
+    if hasattr(entry, 'tags'):
+        tags = [tag.get('term', '') for tag in entry.tags if tag.get('term')]
+
+    return _record(FeedEntry(
+        title=getattr(entry, 'title', '').strip(),
+        link=getattr(entry, 'link', ''),
+        summary=summary,
+        content=content,
+        published_date=published_date,
+        tags=tags
+    ))
+
+
+def parse_with_feedparser(content: bytes, source_name: str, target_date: date,
+                          max_articles: int = MAX_ARTICLES_PER_SOURCE) -> List[ArticleRecord]:
+    """用feedparser解析完整文档（流式解析失败时使用）"""
+    records = []
+    feed = feedparser.parse(content)
+
+    if feed.bozo:
+        logger.warning(f"RSS解析警告 {source_name}: {feed.bozo_exception}")
+
+    # 处理每个条目
+    for entry in feed.entries:
+        try:
+            record = parse_entry(entry, source_name, target_date)
+            if record:
+                records.append(record)
+                if len(records) >= max_articles:
+                    break
+        except Exception as e:
+            logger.error(f"解析条目失败: {str(e)}")
+            continue
+    return records
+
+
+def parse_feed(content: bytes, source_name: str, target_date: date,
+               max_articles: int = MAX_ARTICLES_PER_SOURCE) -> Tuple[List[ArticleRecord], Optional[str]]:
+    """
+    解析单个RSS文档（进程池任务）
+
+    Args:
+        content: 原始XML
+        source_name: RSS源名称
+        target_date: 目标日期
+        max_articles: 最多保留的时间窗口内文章数
+
+    Returns:
+        (记录列表, 流式解析失败时的错误信息)，错误信息非空表示结果来自feedparser
+    """
+    try:
+        return parse_stream(content, source_name, target_date, max_articles), None
+    except FeedFormatError as e:
+        # 格式不规范的feed交给容错性更好的feedparser
+        return parse_with_feedparser(content, source_name, target_date, max_articles), str(e)
+
+
+class ParseResult(NamedTuple):
+    """分块解析中单个RSS文档的结果"""
+    records: List[ArticleRecord]
+    stream_error: Optional[str]  # 流式解析失败时的错误信息，非空表示结果来自feedparser
+    error: Optional[str]  # 解析失败时的错误信息
+    seconds: float  # 解析耗时
+
+
+def parse_feeds(jobs: List[Tuple[bytes, str, date]]) -> List[ParseResult]:
+    """
+    解析一块RSS文档（进程池任务），单个文档失败不影响同一块中的其他文档
+
+    Args:
+        jobs: (原始XML, RSS源名称, 目标日期) 列表
+
+    Returns:
+        与jobs顺序一致的解析结果
+    """
+    results = []
+    for content, source_name, target_date in jobs:
+        started = time.perf_counter()
+        try:
+            records, stream_error = parse_feed(content, source_name, target_date)
+            results.append(ParseResult(records, stream_error, None, time.perf_counter() - started))
+        except Exception as e:
+            results.append(ParseResult([], None, str(e), time.perf_counter() - started))
+    return results
+
+
+def _warm_up() -> None:
+    return None
+
+
+class ParsePool:
+    """
+    RSS文档解析进程池
+
+    Args:
+        workers: 进程数，不大于1时在提交任务的线程中直接解析
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        if workers > 1:
+            # 使用fork启动并立即创建全部进程：此时抓取线程和Flask线程尚未启动，子进程不会继承被占用的锁
+            method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else None
+            self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+            self._executor.submit(_warm_up).result()
+            atexit.register(self.shutdown)
+
+    def chunks(self, items: List[Any]) -> List[List[Any]]:
+        """把同时就绪的文档分成不超过进程数的块，每块作为一个任务提交"""
+        if not items:
+            return []
+        size = -(-len(items) // max(1, min(self.workers, len(items))))
+        return [items[i:i + size] for i in range(0, len(items), size)]
+
+    def submit(self, jobs: List[Tuple[bytes, str, date]]) -> 'Future[List[ParseResult]]':
+        """
+        提交一块RSS文档，返回值同parse_feeds
+
+        未启用进程池时在当前线程中解析，返回已完成的Future
+        """
+        if self._executor is not None:
+            return self._executor.submit(parse_feeds, jobs)
+        future: 'Future[List[ParseResult]]' = Future()
+        future.set_result(parse_feeds(jobs))
+        return future
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,132 @@
+"""
+发布时间归一化
+优先使用feedparser已解析的struct_time；字符串日期按源记住上次成功的解析方式，
+同一个源的后续条目直接用该方式解析，全部失败时才交给dateutil。返回值一律带时区。
+"""
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone, tzinfo
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from dateutil import parser as date_parser
+
+
+def _parse_iso(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def _parse_rfc822(value: str) -> datetime:
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, IndexError) as e:
+        raise ValueError(str(e)) from e
+
+
+def _strptime(fmt: str) -> Callable[[str], datetime]:
+    def parse(value: str) -> datetime:
+        return datetime.strptime(value, fmt)
+    return parse
+
+
+# 按RSS/Atom中出现频率排列的解析方式；strptime格式只覆盖fromisoformat和parsedate都处理不了的常见写法
+PARSERS: List[Tuple[str, Callable[[str], datetime]]] = [
+    ('iso8601', _parse_iso),
+    ('rfc822', _parse_rfc822),
+    ('%Y-%m-%d %H:%M:%S %z', _strptime('%Y-%m-%d %H:%M:%S %z')),
+    ('%a, %d %B %Y %H:%M:%S %z', _strptime('%a, %d %B %Y %H:%M:%S %z')),
+    ('%B %d, %Y %H:%M:%S %z', _strptime('%B %d, %Y %H:%M:%S %z')),
+]
+_PARSERS_BY_NAME = dict(PARSERS)
+
+
+class DateNormalizer:
+    """
+    带按源记忆的日期解析器（线程安全）
+
+    Args:
+        default_tz: 日期字符串不含时区时使用的时区
+    """
+
+    def __init__(self, default_tz: tzinfo = timezone.utc):
+        self.default_tz = default_tz
+        self._source_formats: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = defaultdict(int)
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _aware(self, value: datetime) -> datetime:
+        return value if value.tzinfo is not None else value.replace(tzinfo=self.default_tz)
+
+    def from_struct(self, value: Optional[time.struct_time]) -> Optional[datetime]:
+        """
+        转换feedparser的 *_parsed 字段（已换算为UTC的struct_time）
+
+        Returns:
+            UTC时间，value为空或非法时返回None
+        """
+        if not value:
+            return None
+        try:
+            result = datetime(*value[:6], tzinfo=timezone.utc)
+        except (TypeError, ValueError):
+            return None
+        self._count('struct_time')
+        return result
+
+    def parse(self, value: Optional[str], source: str = '') -> Optional[datetime]:
+        """
+        解析日期字符串
+
+        Args:
+            value: RSS/Atom中的日期字符串
+            source: 来源标识（通常为RSS源名称），同一来源复用上次成功的解析方式
+
+        Returns:
+            带时区的时间，无法解析时返回None
+        """
+        value = (value or '').strip()
+        if not value:
+            return None
+
+        remembered = self._source_formats.get(source)
+        if remembered:
+            try:
+                result = _PARSERS_BY_NAME[remembered](value)
+                self._count('memo_hits')
+                return self._aware(result)
+            except ValueError:
+                pass
+
+        for name, parser in PARSERS:
+            if name == remembered:
+                continue
+            try:
+                result = parser(value)
+            except ValueError:
+                continue
+            with self._lock:
+                self._source_formats[source] = name
+                self.stats['learned'] += 1
+            return self._aware(result)
+
+        try:
+            result = date_parser.parse(value)
+        except (ValueError, OverflowError):
+            self._count('failed')
+            return None
+        self._count('dateutil')
+        return self._aware(result)
+
+    def source_formats(self) -> Dict[str, str]:
+        """各来源当前记住的解析方式"""
+        with self._lock:
+            return dict(self._source_formats)
+
+
+# 进程内共享的实例，各RSS源的解析方式在多次运行间复用
+date_normalizer = DateNormalizer()
@@ -0,0 +1,125 @@
+"""
+抽取式摘要
+大模型不可用或超出配额时的本地摘要引擎：切分中英文句子，用哈希n-gram稀疏向量计算句子相似度，
+结合TextRank和质心相似度为句子打分，在长度预算内选出得分最高的句子。
+"""
+import re
+from typing import List
+
+import numpy as np
+
+from text_features import HashingVectorizer
+
+# 中文句末标点之后，或英文句末标点加空白之后断句
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[。！？；!?])\s*|(?<=[.])\s+(?=[A-Z0-9"“(\u4e00-\u9fff])|\n+')
+_MIN_SENTENCE_CHARS = 10
+
+_vectorizer = HashingVectorizer(n_features=2 ** 16)
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    切分中英文句子
+
+    Args:
+        text: 清理后的纯文本
+
+    Returns:
+        去除过短片段后的句子列表
+    """
+    sentences = (sentence.strip() for sentence in _SENTENCE_SPLIT_RE.split(text or ''))
+    return [sentence for sentence in sentences if len(sentence) >= _MIN_SENTENCE_CHARS]
+
+
+def score_sentences(sentences: List[str], damping: float = 0.85, iterations: int = 30,
+                    centroid_weight: float = 0.3) -> np.ndarray:
+    """
+    为句子打分：TextRank（句子相似度图上的PageRank）与质心相似度的加权和
+
+    Args:
+        sentences: 句子列表
+        damping: PageRank阻尼系数
+        iterations: 幂迭代次数
+        centroid_weight: 质心相似度的权重
+
+    Returns:
+        每个句子的得分
+    """
+    n = len(sentences)
+    if n <= 2:
+        return np.ones(n)
+
+    vectors = _vectorizer.transform(sentences).to_compact_dense()
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0.0)
+
+    # 行归一化得到转移矩阵，孤立句子均匀跳转
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    transition = np.where(row_sums > 0, similarity / np.where(row_sums > 0, row_sums, 1.0), 1.0 / n)
+    rank = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        updated = (1 - damping) / n + damping * (transition.T @ rank)
+        if np.abs(updated - rank).sum() < 1e-6:
+            rank = updated
+            break
+        rank = updated
+
+    centroid = vectors.mean(axis=0)
+    norm = np.linalg.norm(centroid)
+    centroid_similarity = vectors @ (centroid / norm) if norm else np.zeros(n)
+
+    return (1 - centroid_weight) * rank / rank.max() + centroid_weight * centroid_similarity
+
+
+def summarize(text: str, max_chars: int = 200, max_sentences: int = 3) -> str:
+    """
+    生成抽取式摘要
+
+    Args:
+        text: 清理后的纯文本
+        max_chars: 摘要长度上限
+        max_sentences: 最多选取的句子数
+
+    Returns:
+        按原文顺序拼接的摘要，无法切分出句子时返回空字符串
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return ''
+
+    scores = score_sentences(sentences)
+    selected, length = [], 0
+    for index in np.argsort(-scores, kind='stable'):
+        sentence = sentences[index]
+        if length + len(sentence) > max_chars and selected:
+            continue
+        selected.append(index)
+        length += len(sentence)
+        if len(selected) >= max_sentences or length >= max_chars:
+            break
+
+    summary = ' '.join(sentences[i] for i in sorted(selected))
+    return summary if len(summary) <= max_chars else summary[:max_chars - 1] + '…'
+
+
+def key_sentences(text: str, count: int = 3, max_chars: int = 80) -> List[str]:
+    """
+    选出得分最高的若干句子作为关键要点
+
+    Args:
+        text: 清理后的纯文本
+        count: 要点数量
+        max_chars: 单个要点的长度上限
+
+    Returns:
+        按得分排序的要点列表
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return []
+    scores = score_sentences(sentences)
+    points = []
+    for index in np.argsort(-scores, kind='stable')[:count]:
+        sentence = sentences[index]
+        points.append(sentence if len(sentence) <= max_chars else sentence[:max_chars - 1] + '…')
+    return points
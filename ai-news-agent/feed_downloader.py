@@ -0,0 +1,202 @@
+"""
+RSS下载层
+为每次下载设置连接/读取超时，对连接失败、超时、429和5xx按指数退避重试；
+按站点统计下载耗时，单个请求超过该站点的p95耗时仍未返回时发出一个对冲请求，先返回的结果胜出。
+所有等待都受整次抓取的截止时间约束，到期后放弃剩余的重试和等待。
+"""
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from config import (
+    REQUEST_CONNECT_TIMEOUT, REQUEST_READ_TIMEOUT, MAX_RETRIES, RETRY_DELAY, FETCH_CONCURRENCY,
+    HEDGE_ENABLED, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES
+)
+from run_profiler import RunProfiler, percentile
+
+logger = logging.getLogger(__name__)
+
+# 需要重试的HTTP状态码
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# 每个站点保留的最近耗时样本数
+LATENCY_WINDOW = 50
+# 剩余时间不足该秒数时不再发起新请求
+MIN_ATTEMPT_SECONDS = 0.5
+
+
+class DeadlineExceeded(requests.Timeout):
+    """整次抓取的截止时间已到"""
+
+
+def _retry_after(response: Any) -> Optional[float]:
+    """读取429/503响应中的Retry-After（秒）"""
+    try:
+        value = response.headers.get('Retry-After')
+        return float(value) if value is not None else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class FeedDownloader:
+    """
+    带超时、重试和对冲请求的下载器（线程安全，各站点耗时统计跨运行保留）
+
+    Args:
+        connect_timeout: 建立连接超时（秒）
+        read_timeout: 读取超时（秒），即两次收到数据之间的最长间隔
+        max_retries: 最大重试次数
+        retry_delay: 重试的基础退避时间（秒），第n次重试等待 retry_delay * 2^n
+        hedge: 是否启用对冲请求
+    """
+
+    def __init__(self, connect_timeout: float = REQUEST_CONNECT_TIMEOUT, read_timeout: float = REQUEST_READ_TIMEOUT,
+                 max_retries: int = MAX_RETRIES, retry_delay: float = RETRY_DELAY, hedge: bool = HEDGE_ENABLED):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.hedge = hedge
+        self.profiler = RunProfiler()  # 由RSSFetcher在每次运行时替换
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # 主请求和对冲请求各占一个线程
+                self._pool = ThreadPoolExecutor(max_workers=max(FETCH_CONCURRENCY, 1) * 2, thread_name_prefix='feed-hedge')
+            return self._pool
+
+    def hedge_delay(self, host: str) -> Optional[float]:
+        """
+        该站点的对冲等待时间（最近下载耗时的p95，秒）
+
+        Returns:
+            样本不足或未启用对冲时返回None
+        """
+        if not self.hedge:
+            return None
+        with self._lock:
+            samples = list(self._latencies.get(host, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return percentile(samples, HEDGE_PERCENTILE)
+
+    def _timeout(self, deadline: Optional[float]) -> Tuple[float, float]:
+        """按剩余时间收紧连接/读取超时"""
+        if deadline is None:
+            return self.connect_timeout, self.read_timeout
+        remaining = deadline - time.monotonic()
+        if remaining < MIN_ATTEMPT_SECONDS:
+            raise DeadlineExceeded("抓取截止时间已到")
+        return min(self.connect_timeout, remaining), min(self.read_timeout, remaining)
+
+    def _request(self, session: Any, url: str, headers: Dict[str, str], host: str,
+                 deadline: Optional[float]) -> Any:
+        start = time.monotonic()
+        response = session.get(url, timeout=self._timeout(deadline), headers=headers)
+        if response.status_code < 500:
+            with self._lock:
+                self._latencies[host].append(time.monotonic() - start)
+        return response
+
+    def _attempt(self, session: Any, url: str, headers: Dict[str, str], host: str,
+                 deadline: Optional[float], feed: Optional[str]) -> Any:
+        """发起一次请求，超过站点p95耗时仍未返回时再发起一个对冲请求"""
+        hedge_after = self.hedge_delay(host)
+        if hedge_after is None:
+            return self._request(session, url, headers, host, deadline)
+
+        pool = self._executor()
+        primary = pool.submit(self._request, session, url, headers, host, deadline)
+        done, _ = wait([primary], timeout=self._wait_time(hedge_after, deadline))
+        if done:
+            return primary.result()
+
+        self.profiler.increment('hedged_requests', feed=feed)
+        logger.info(f"{host} 超过p95耗时 {hedge_after:.2f}s 未返回，发起对冲请求: {url}")
+        hedged = pool.submit(self._request, session, url, headers, host, deadline)
+        pending = {primary, hedged}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, timeout=self._wait_time(None, deadline), return_when=FIRST_COMPLETED)
+            if not done:
+                raise DeadlineExceeded(f"抓取截止时间已到: {url}")
+            for future in done:
+                if future.exception() is None:
+                    if future is hedged:
+                        self.profiler.increment('hedge_wins', feed=feed)
+                    # 落后的请求不可取消，其结果被丢弃，耗时受读取超时约束
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    @staticmethod
+    def _wait_time(limit: Optional[float], deadline: Optional[float]) -> Optional[float]:
+        if deadline is None:
+            return limit
+        remaining = max(deadline - time.monotonic(), 0.0)
+        return remaining if limit is None else min(limit, remaining)
+
+    def get(self, session: Any, url: str, headers: Optional[Dict[str, str]] = None,
+            deadline: Optional[float] = None, feed: Optional[str] = None) -> Any:
+        """
+        下载URL
+
+        Args:
+            session: requests.Session或兼容对象
+            url: 地址
+            headers: 额外的请求头
+            deadline: 截止时间（time.monotonic()），None表示不限制
+            feed: RSS源名称，用于性能档案的分项统计
+
+        Returns:
+            响应对象；重试用尽后仍为429/5xx时返回最后一次响应，由调用方处理状态码
+
+        Raises:
+            requests.RequestException: 连接失败或超时且重试用尽
+            DeadlineExceeded: 截止时间已到
+        """
+        host = urlsplit(url).netloc
+        headers = headers or {}
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = self._attempt(session, url, headers, host, deadline, feed)
+                if response.status_code not in RETRY_STATUS or attempt >= self.max_retries:
+                    return response
+                retry_after = _retry_after(response)
+                reason = f"HTTP {response.status_code}"
+            except DeadlineExceeded:
+                raise
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                reason = str(e)
+
+            delay = retry_after if retry_after is not None else self.retry_delay * (2 ** attempt)
+            if deadline is not None and time.monotonic() + delay + MIN_ATTEMPT_SECONDS > deadline:
+                raise DeadlineExceeded(f"重试等待将超过抓取截止时间: {url} ({reason})")
+            self.profiler.increment('fetch_retries', feed=feed)
+            logger.warning(f"下载失败({reason})，{delay:.1f}秒后第{attempt + 1}次重试: {url}")
+            time.sleep(delay)
+
+    def host_latencies(self) -> Dict[str, Dict[str, float]]:
+        """各站点最近下载耗时的p50/p95（毫秒）"""
+        with self._lock:
+            snapshot = {host: list(samples) for host, samples in self._latencies.items()}
+        return {
+            host: {
+                'samples': len(samples),
+                'p50_ms': round(percentile(samples, 50) * 1000, 1),
+                'p95_ms': round(percentile(samples, 95) * 1000, 1),
+            }
+            for host, samples in snapshot.items()
+        }
@@ -0,0 +1,179 @@
+"""
+自适应RSS轮询
+按源记录新条目到达速率和304（未修改）比例，据此计算每个源的下次轮询时间：
+更新频繁的源缩短间隔，连续没有新条目的源按指数退避拉长间隔。
+同时保存ETag/Last-Modified用于条件请求。状态持久化到JSON文件，跨运行保留。
+"""
+import json
+import logging
+import threading
+import zlib
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import (
+    FEED_STATE_FILE, POLL_MIN_INTERVAL_MINUTES, POLL_MAX_INTERVAL_MINUTES, POLL_TARGET_NEW_ITEMS
+)
+
+logger = logging.getLogger(__name__)
+
+# 新条目速率的指数滑动平均系数
+RATE_SMOOTHING = 0.3
+# 每个源记住的最近条目数量（用于判断条目是否为新）
+SEEN_LIMIT = 200
+
+
+def _link_key(link: str) -> int:
+    return zlib.crc32(link.encode('utf-8'))
+
+
+@dataclass
+class FeedPollState:
+    """单个RSS源的轮询统计"""
+    polls: int = 0
+    not_modified: int = 0
+    new_items: int = 0
+    rate_per_hour: Optional[float] = None  # 新条目到达速率（指数滑动平均）
+    interval_minutes: float = POLL_MIN_INTERVAL_MINUTES
+    last_poll: Optional[str] = None
+    next_poll: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    seen: List[int] = field(default_factory=list)
+
+    @property
+    def not_modified_ratio(self) -> float:
+        return self.not_modified / self.polls if self.polls else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop('seen')
+        data['not_modified_ratio'] = round(self.not_modified_ratio, 3)
+        data['rate_per_hour'] = round(self.rate_per_hour, 4) if self.rate_per_hour is not None else None
+        data['interval_minutes'] = round(self.interval_minutes, 1)
+        return data
+
+
+class FeedPoller:
+    """
+    各RSS源的轮询状态（线程安全）
+
+    Args:
+        state_file: 状态文件路径
+    """
+
+    def __init__(self, state_file: str = FEED_STATE_FILE):
+        self.state_file = Path(state_file)
+        self._lock = threading.Lock()
+        self._states: Dict[str, FeedPollState] = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._states = {name: FeedPollState(**state) for name, state in data.items()}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"读取RSS轮询状态失败: {str(e)}")
+
+    def save(self):
+        """保存轮询状态"""
+        with self._lock:
+            data = {name: asdict(state) for name, state in self._states.items()}
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_file.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+            tmp_path.replace(self.state_file)
+        except OSError as e:
+            logger.warning(f"保存RSS轮询状态失败: {str(e)}")
+
+    def _state(self, name: str) -> FeedPollState:
+        if name not in self._states:
+            self._states[name] = FeedPollState()
+        return self._states[name]
+
+    def is_due(self, name: str, now: Optional[datetime] = None) -> bool:
+        """是否到了该源的下次轮询时间（从未轮询过的源总是到期）"""
+        with self._lock:
+            state = self._states.get(name)
+            if state is None or not state.next_poll:
+                return True
+            return (now or datetime.now(timezone.utc)) >= datetime.fromisoformat(state.next_poll)
+
+    def conditional_headers(self, name: str) -> Dict[str, str]:
+        """条件请求头（If-None-Match / If-Modified-Since）"""
+        with self._lock:
+            state = self._states.get(name)
+            headers = {}
+            if state and state.etag:
+                headers['If-None-Match'] = state.etag
+            if state and state.last_modified:
+                headers['If-Modified-Since'] = state.last_modified
+            return headers
+
+    def record_not_modified(self, name: str, now: Optional[datetime] = None):
+        """记录一次304响应"""
+        with self._lock:
+            state = self._state(name)
+            state.not_modified += 1
+            self._update(state, 0, now or datetime.now(timezone.utc))
+
+    def record_fetch(self, name: str, links: List[str], etag: Optional[str] = None,
+                     last_modified: Optional[str] = None, now: Optional[datetime] = None) -> int:
+        """
+        记录一次成功抓取
+
+        Args:
+            name: RSS源名称
+            links: 本次抓取到的文章链接
+            etag: 响应的ETag
+            last_modified: 响应的Last-Modified
+
+        Returns:
+            本次抓取中之前未见过的条目数
+        """
+        with self._lock:
+            state = self._state(name)
+            seen = set(state.seen)
+            keys = [_link_key(link) for link in links]
+            new_keys = [key for key in keys if key not in seen]
+            # 首次轮询没有历史可比较，只记录条目不计算速率
+            first_poll = state.polls == 0
+            state.seen = (state.seen + new_keys)[-SEEN_LIMIT:]
+            state.etag = etag
+            state.last_modified = last_modified
+            self._update(state, None if first_poll else len(new_keys), now or datetime.now(timezone.utc))
+            return len(new_keys)
+
+    def _update(self, state: FeedPollState, new_items: Optional[int], now: datetime):
+        """更新到达速率并计算下次轮询时间"""
+        previous = datetime.fromisoformat(state.last_poll) if state.last_poll else None
+        state.polls += 1
+        state.last_poll = now.isoformat()
+
+        if new_items is not None and previous is not None:
+            state.new_items += new_items
+            hours = max((now - previous).total_seconds() / 3600, 1 / 60)
+            rate = new_items / hours
+            state.rate_per_hour = rate if state.rate_per_hour is None else (
+                RATE_SMOOTHING * rate + (1 - RATE_SMOOTHING) * state.rate_per_hour
+            )
+            if new_items == 0:
+                # 没有新条目：指数退避
+                interval = state.interval_minutes * 2
+            else:
+                # 按速率估计出现POLL_TARGET_NEW_ITEMS个新条目所需的时间
+                interval = POLL_TARGET_NEW_ITEMS / state.rate_per_hour * 60
+            state.interval_minutes = min(max(interval, POLL_MIN_INTERVAL_MINUTES), POLL_MAX_INTERVAL_MINUTES)
+
+        state.next_poll = (now + timedelta(minutes=state.interval_minutes)).isoformat()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """各源的轮询统计"""
+        with self._lock:
+            return {name: state.to_dict() for name, state in self._states.items()}
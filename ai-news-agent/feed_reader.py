@@ -0,0 +1,152 @@
+"""
+流式RSS/Atom解析
+用iterparse增量解析RSS 2.0、RSS 1.0(RDF)和Atom，条目解析完立即释放；先读取发布时间，
+时间窗口外的条目不提取其他字段，收集够指定数量的条目后停止解析剩余文档。
+XML格式错误或无法识别的文档抛出 FeedFormatError，由调用方退回feedparser。
+"""
+import io
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional
+
+from date_normalizer import date_normalizer
+
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+RSS1_NS = '{http://purl.org/rss/1.0/}'
+RDF_ROOT = '{http://www.w3.org/1999/02/22-rdf-syntax-ns#}RDF'
+CONTENT_ENCODED = '{http://purl.org/rss/1.0/modules/content/}encoded'
+DC_DATE = '{http://purl.org/dc/elements/1.1/}date'
+DC_SUBJECT = '{http://purl.org/dc/elements/1.1/}subject'
+
+
+class FeedFormatError(Exception):
+    """文档不是可流式解析的RSS/Atom"""
+
+
+@dataclass
+class FeedEntry:
+    """流式解析出的条目字段（与feedparser条目的同名属性含义一致）"""
+    title: str
+    link: str
+    summary: str
+    content: str
+    published_date: Optional[datetime] = None
+    tags: List[str] = field(default_factory=list)
+
+
+def _text(element: Optional[ET.Element]) -> str:
+    if element is None:
+        return ''
+    if element.get('type') == 'xhtml':
+        return ''.join(element.itertext()).strip()
+    return (element.text or '').strip()
+
+
+def _rss_date(item: ET.Element, source: str) -> Optional[datetime]:
+    return date_normalizer.parse(item.findtext('pubDate') or item.findtext(DC_DATE), source)
+
+
+def _atom_date(entry: ET.Element, source: str) -> Optional[datetime]:
+    return date_normalizer.parse(entry.findtext(f'{ATOM_NS}published') or entry.findtext(f'{ATOM_NS}updated'), source)
+
+
+def _rss_entry(item: ET.Element, ns: str, published_date: Optional[datetime]) -> FeedEntry:
+    link = _text(item.find(f'{ns}link'))
+    if not link:
+        guid = item.find('guid')
+        if guid is not None and guid.get('isPermaLink', 'true') != 'false':
+            link = _text(guid)
+    summary = _text(item.find(f'{ns}description'))
+    content = _text(item.find(CONTENT_ENCODED))
+    tags = [_text(tag) for tag in item.findall('category') + item.findall(DC_SUBJECT)]
+    return FeedEntry(
+        title=_text(item.find(f'{ns}title')),
+        link=link,
+        summary=summary or content,
+        content=content or summary,
+        published_date=published_date,
+        tags=[tag for tag in tags if tag],
+    )
+
+
+def _atom_entry(entry: ET.Element, published_date: Optional[datetime]) -> FeedEntry:
+    link = ''
+    for link_element in entry.findall(f'{ATOM_NS}link'):
+        if link_element.get('rel', 'alternate') == 'alternate' and link_element.get('href'):
+            link = link_element.get('href')
+            break
+    summary = _text(entry.find(f'{ATOM_NS}summary'))
+    content = _text(entry.find(f'{ATOM_NS}content'))
+    tags = [tag.get('term', '') for tag in entry.findall(f'{ATOM_NS}category')]
+    return FeedEntry(
+        title=_text(entry.find(f'{ATOM_NS}title')),
+        link=link,
+        summary=summary or content,
+        content=content or summary,
+        published_date=published_date,
+        tags=[tag for tag in tags if tag],
+    )
+
+
+def iter_entries(content: bytes, accept: Callable[[Optional[datetime]], bool] = lambda _: True,
+                 source: str = '', chunk_size: int = 64 * 1024) -> Iterator[FeedEntry]:
+    """
+    增量解析RSS/Atom文档，按文档顺序逐个产出条目
+
+    Args:
+        content: 原始XML
+        accept: 根据发布时间判断是否保留条目，返回False的条目只解析日期就被丢弃
+        source: 来源标识，用于按源记住日期格式
+        chunk_size: 每次送入解析器的字节数
+
+    Yields:
+        通过accept检查的条目；调用方停止迭代后剩余文档不再解析
+
+    Raises:
+        FeedFormatError: XML格式错误或根元素不是rss/RDF/feed
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    stream = io.BytesIO(content)
+    entry_tags = None
+    parents: List[ET.Element] = []
+
+    while True:
+        chunk = stream.read(chunk_size)
+        try:
+            if chunk:
+                parser.feed(chunk)
+            else:
+                parser.close()
+            events = list(parser.read_events())
+        except ET.ParseError as e:
+            raise FeedFormatError(str(e)) from e
+
+        for event, element in events:
+            if event == 'start':
+                if entry_tags is None:
+                    if element.tag == 'rss':
+                        entry_tags = {'item': ''}
+                    elif element.tag == RDF_ROOT:
+                        entry_tags = {f'{RSS1_NS}item': RSS1_NS}
+                    elif element.tag == f'{ATOM_NS}feed':
+                        entry_tags = {f'{ATOM_NS}entry': None}
+                    else:
+                        raise FeedFormatError(f"不支持的根元素: {element.tag}")
+                parents.append(element)
+                continue
+
+            parents.pop()
+            if element.tag not in entry_tags:
+                continue
+
+            ns = entry_tags[element.tag]
+            published_date = _atom_date(element, source) if ns is None else _rss_date(element, source)
+            if accept(published_date):
+                yield _atom_entry(element, published_date) if ns is None else _rss_entry(element, ns, published_date)
+            # 解析完的条目从文档树中移除，内存占用与文档长度无关
+            if parents:
+                parents[-1].remove(element)
+
+        if not chunk:
+            return
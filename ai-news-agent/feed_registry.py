@@ -0,0 +1,98 @@
+"""
+RSS源注册表客户端
+RSS源列表由后端的源注册表维护（/api/news/feeds/），后端按每次抓取上报的耗时、字节数、条目数和错误
+统计各源的健康状况，并自动隔离连续失败或持续过慢的源，隔离到期后只放行一次探测抓取。
+后端不可用时退回config中的RSS_SOURCES。
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from config import BACKEND_BASE_URL, RSS_SOURCES, FEED_REGISTRY_CACHE_SECONDS
+from model_manager import ModelManager
+
+logger = logging.getLogger(__name__)
+
+
+class FeedRegistry:
+    """
+    后端RSS源注册表
+
+    Args:
+        model_manager: 复用其后端认证（JWT优先，其次API Token）和连接，默认使用进程内共享的实例
+        cache_seconds: 源列表缓存时长（秒）
+    """
+
+    def __init__(self, model_manager: Optional[ModelManager] = None,
+                 cache_seconds: float = FEED_REGISTRY_CACHE_SECONDS):
+        self.model_manager = model_manager or ModelManager.shared()
+        self.cache_seconds = cache_seconds
+        self.base_url = f"{BACKEND_BASE_URL}/api/news/feeds"
+        self._lock = threading.Lock()
+        self._sources: Optional[List[Dict[str, Any]]] = None
+        self._expiry = 0.0
+
+    def get_sources(self, force_refresh: bool = False) -> List[Dict[str, Any]]:
+        """
+        获取当前应抓取的RSS源（已启用且未隔离，或隔离到期等待探测的源）
+
+        Args:
+            force_refresh: 忽略缓存
+
+        Returns:
+            RSS源配置列表，每项包含name、url、description，探测抓取的源带 probe=True
+        """
+        with self._lock:
+            if not force_refresh and self._sources is not None and time.time() < self._expiry:
+                return list(self._sources)
+
+        try:
+            response = self.model_manager.session.get(
+                f"{self.base_url}/active/", headers=self.model_manager.get_backend_headers(), timeout=10
+            )
+            response.raise_for_status()
+            sources = response.json()
+        except Exception as e:
+            with self._lock:
+                fallback = self._sources if self._sources is not None else RSS_SOURCES
+            logger.warning(f"获取RSS源注册表失败: {str(e)}，使用{'上次获取的' if fallback is not RSS_SOURCES else '配置中的'}RSS源")
+            return list(fallback)
+
+        probes = [source['name'] for source in sources if source.get('probe')]
+        if probes:
+            logger.info(f"隔离到期，本次探测抓取: {', '.join(probes)}")
+        with self._lock:
+            self._sources = sources
+            self._expiry = time.time() + self.cache_seconds
+        return list(sources)
+
+    def report(self, health: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        上报本次运行各源的抓取结果
+
+        Args:
+            health: 每项包含name、success、latency_ms、bytes、items、error
+
+        Returns:
+            后端的处理结果（updated、unknown、quarantined），上报失败时返回None
+        """
+        if not health:
+            return None
+        try:
+            response = self.model_manager.session.post(
+                f"{self.base_url}/report/", json=health,
+                headers=self.model_manager.get_backend_headers(), timeout=10
+            )
+            response.raise_for_status()
+            result = response.json()
+        except Exception as e:
+            logger.warning(f"上报RSS源健康数据失败: {str(e)}")
+            return None
+
+        if result.get('quarantined'):
+            logger.warning(f"以下RSS源已被隔离: {', '.join(result['quarantined'])}")
+            # 隔离状态变化后下次运行重新获取源列表
+            with self._lock:
+                self._expiry = 0.0
+        return result
@@ -0,0 +1,147 @@
+"""
+本地线性分类模型
+基于哈希n-gram稀疏特征的多项逻辑回归（softmax），纯NumPy实现，
+训练和推理都只依赖CPU，模型以 .npz 文件保存。
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from text_features import HashingVectorizer, SparseMatrix
+
+logger = logging.getLogger(__name__)
+
+
+def _softmax(scores: np.ndarray) -> np.ndarray:
+    scores = scores - scores.max(axis=1, keepdims=True)
+    exp = np.exp(scores)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class SoftmaxClassifier:
+    """
+    多项逻辑回归分类器
+
+    Args:
+        classes: 类别标签列表
+        vectorizer: 特征提取器，训练时可先调用 fit_idf 得到TF-IDF特征
+    """
+
+    def __init__(self, classes: List[str], vectorizer: Optional[HashingVectorizer] = None):
+        self.classes = list(classes)
+        self.vectorizer = vectorizer or HashingVectorizer()
+        self.weights = np.zeros((self.vectorizer.n_features, len(self.classes)), dtype=np.float32)
+        self.bias = np.zeros(len(self.classes), dtype=np.float32)
+        self.meta: Dict[str, Any] = {}
+
+    def fit(self, texts: List[str], labels: List[str], epochs: int = 60, learning_rate: float = 0.1,
+            l2: float = 1e-5, balanced: bool = True) -> 'SoftmaxClassifier':
+        """
+        使用全量梯度下降（Adam）训练
+
+        Args:
+            texts: 训练文本
+            labels: 对应的类别标签，不在classes中的样本会被忽略
+            epochs: 迭代轮数
+            learning_rate: 学习率
+            l2: L2正则系数
+            balanced: 是否按类别频率的倒数加权，缓解类别不平衡
+
+        Returns:
+            训练后的分类器
+        """
+        index = {label: i for i, label in enumerate(self.classes)}
+        pairs = [(text, index[label]) for text, label in zip(texts, labels) if label in index]
+        if not pairs:
+            raise ValueError("没有可用的训练样本")
+
+        X = self.vectorizer.transform([text for text, _ in pairs])
+        y = np.array([label for _, label in pairs])
+        targets = np.eye(len(self.classes))[y]
+
+        counts = np.bincount(y, minlength=len(self.classes)).astype(np.float64)
+        if balanced:
+            class_weights = np.where(counts > 0, len(y) / (len(self.classes) * np.maximum(counts, 1)), 0.0)
+        else:
+            class_weights = np.ones(len(self.classes))
+        sample_weights = class_weights[y] / len(y)
+
+        weights = np.zeros((X.shape[1], len(self.classes)))
+        bias = np.log(np.maximum(counts, 1) / counts.sum())
+        m_w, v_w = np.zeros_like(weights), np.zeros_like(weights)
+        m_b, v_b = np.zeros_like(bias), np.zeros_like(bias)
+        beta1, beta2, eps = 0.9, 0.999, 1e-8
+
+        for step in range(1, epochs + 1):
+            proba = _softmax(X.dot(weights) + bias)
+            error = (proba - targets) * sample_weights[:, None]
+            grad_w = X.transpose_dot(error) + l2 * weights
+            grad_b = error.sum(axis=0)
+
+            m_w = beta1 * m_w + (1 - beta1) * grad_w
+            v_w = beta2 * v_w + (1 - beta2) * grad_w ** 2
+            m_b = beta1 * m_b + (1 - beta1) * grad_b
+            v_b = beta2 * v_b + (1 - beta2) * grad_b ** 2
+            correction1, correction2 = 1 - beta1 ** step, 1 - beta2 ** step
+            weights -= learning_rate * (m_w / correction1) / (np.sqrt(v_w / correction2) + eps)
+            bias -= learning_rate * (m_b / correction1) / (np.sqrt(v_b / correction2) + eps)
+
+        self.weights = weights.astype(np.float32)
+        self.bias = bias.astype(np.float32)
+        self.meta.update({
+            'samples': int(len(y)),
+            'class_counts': {label: int(counts[i]) for i, label in enumerate(self.classes)},
+            'epochs': epochs,
+        })
+        return self
+
+    def predict_proba_matrix(self, X: SparseMatrix) -> np.ndarray:
+        """对已提取的特征矩阵计算各类别概率，形状为 (n, n_classes)"""
+        if X.shape[0] == 0:
+            return np.zeros((0, len(self.classes)))
+        return _softmax(X.dot(self.weights) + self.bias)
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """批量计算各类别概率，形状为 (n, n_classes)"""
+        return self.predict_proba_matrix(self.vectorizer.transform(texts))
+
+    def predict(self, texts: List[str]) -> List[str]:
+        """批量预测类别"""
+        proba = self.predict_proba(texts)
+        return [self.classes[i] for i in proba.argmax(axis=1)]
+
+    def save(self, path: str):
+        """保存模型（稀疏存储非零权重行）"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        rows = np.flatnonzero(np.any(self.weights != 0, axis=1))
+        np.savez_compressed(
+            path,
+            rows=rows,
+            weights=self.weights[rows],
+            bias=self.bias,
+            idf=self.vectorizer.idf if self.vectorizer.idf is not None else np.array([]),
+            config=np.array(json.dumps({
+                'classes': self.classes,
+                'n_features': self.vectorizer.n_features,
+                'sublinear_tf': self.vectorizer.sublinear_tf,
+                'meta': self.meta,
+            }, ensure_ascii=False)),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'SoftmaxClassifier':
+        """从 .npz 文件加载模型"""
+        with np.load(path, allow_pickle=False) as data:
+            config = json.loads(str(data['config']))
+            vectorizer = HashingVectorizer(n_features=config['n_features'], sublinear_tf=config['sublinear_tf'])
+            if data['idf'].size:
+                vectorizer.idf = data['idf']
+            model = cls(config['classes'], vectorizer)
+            model.weights[data['rows']] = data['weights']
+            model.bias = data['bias']
+            model.meta = config.get('meta', {})
+        return model
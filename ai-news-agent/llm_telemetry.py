@@ -0,0 +1,126 @@
+"""
+LLM调用遥测
+为每次大模型调用记录紧凑的结构化记录（模型、耗时、Token用量、缓存命中等），
+通过队列异步写入JSONL文件，避免在调用线程中进行文件I/O和大体积序列化。
+完整的请求/响应内容仅按采样率或在调试模式下记录。
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from config import LLM_TELEMETRY_FILE, LLM_LOG_SAMPLE_RATE, LLM_LOG_DEBUG, LOG_LEVEL
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """不在调用线程中格式化记录，序列化工作交给监听线程完成"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _JSONLineFormatter(logging.Formatter):
+    """将记录中的字典序列化为一行JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        if isinstance(record.msg, dict):
+            return json.dumps(record.msg, ensure_ascii=False, default=str)
+        return super().format(record)
+
+
+class LLMTelemetry:
+    """LLM调用遥测记录器"""
+
+    def __init__(self, log_file: str = LLM_TELEMETRY_FILE,
+                 sample_rate: float = LLM_LOG_SAMPLE_RATE,
+                 debug: bool = LLM_LOG_DEBUG or LOG_LEVEL.upper() == 'DEBUG'):
+        self.sample_rate = sample_rate
+        self.debug = debug
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._listeners_lock = threading.Lock()
+
+        self.logger = logging.getLogger('llm_telemetry')
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+
+        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler.setFormatter(_JSONLineFormatter())
+
+        self._queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+        self.logger.addHandler(_DeferredQueueHandler(self._queue))
+        self._queue_listener = logging.handlers.QueueListener(self._queue, file_handler)
+        self._queue_listener.start()
+        atexit.register(self._queue_listener.stop)
+
+    def should_capture_payload(self) -> bool:
+        """本次调用是否记录完整的请求/响应内容"""
+        return self.debug or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def record(self, stage: str, model: str, provider: str, latency_ms: float, tier: str = '',
+               prompt_tokens: int = 0, completion_tokens: int = 0, total_tokens: int = 0,
+               cached_tokens: int = 0, success: bool = True, error: str = '', retries: int = 0,
+               request: Optional[Dict[str, Any]] = None, response: Optional[str] = None) -> Dict[str, Any]:
+        """
+        记录一次LLM调用
+
+        Args:
+            stage: 调用所属的处理阶段（如 analyze、summary）
+            tier: 分级路由时的模型等级（triage / strong）
+            cached_tokens: 命中提供商提示词缓存的输入Token数（usage.prompt_tokens_details.cached_tokens），大于0时记为cache_hit
+            retries: 网关因429或服务端故障进行的重试次数
+            request: 完整请求内容，仅在采样命中时写入
+            response: 完整响应内容，仅在采样命中时写入
+
+        Returns:
+            写入的记录
+        """
+        entry = {
+            'timestamp': datetime.now().isoformat(),
+            'stage': stage,
+            'model': model,
+            'provider': provider,
+            'tier': tier,
+            'latency_ms': round(latency_ms, 1),
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': total_tokens or prompt_tokens + completion_tokens,
+            'cached_tokens': cached_tokens,
+            'cache_hit': cached_tokens > 0,
+            'success': success,
+            'retries': retries,
+        }
+        if error:
+            entry['error'] = error[:500]
+        if (request is not None or response is not None) and self.should_capture_payload():
+            entry['payload'] = {'request': request, 'response': response}
+
+        self.logger.info(entry)
+
+        with self._listeners_lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(entry)
+            except Exception:
+                pass
+
+        return entry
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """注册调用记录监听器（如运行性能统计）"""
+        with self._listeners_lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """移除调用记录监听器"""
+        with self._listeners_lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+
+telemetry = LLMTelemetry()
@@ -1,12 +1,17 @@
 """
 AI模型管理器
-负责从后端获取AI配置，管理模型选择，并提供统一的模型调用接口
+负责从后端获取AI配置，管理模型选择，并提供统一的模型调用接口。
+进程内共享一个实例（ModelManager.shared()），模型配置保存到磁盘，重启后直接使用；
+缓存过期后在后台线程刷新，刷新完成前继续返回旧配置，启动和切换模型都不在调用路径上访问后端。
 """
 import json
 import logging
+import threading
+import time
 import requests
+from pathlib import Path
 from typing import Dict, Any, Optional, List
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 import config
 
 logger = logging.getLogger(__name__)
@@ -24,24 +29,83 @@ class ModelConfig:
     max_tokens: int
     support_functions: bool
     support_vision: bool
+    requests_per_minute: Optional[int] = None  # 提供商限额，None时使用网关默认配置
+    max_concurrency: Optional[int] = None
+
+
+_shared_lock = threading.Lock()
 
 
 class ModelManager:
-    """AI模型管理器"""
+    """
+    AI模型管理器（线程安全）
+    
+    Args:
+        cache_file: 模型配置的磁盘缓存（不保存API密钥）
+        cache_duration: 缓存有效期（秒），过期后在后台刷新
+    """
     
-    def __init__(self):
-        self.models_cache = {}
+    def __init__(self, cache_file: str = config.MODEL_CACHE_FILE, cache_duration: float = config.MODEL_CACHE_SECONDS):
+        self.models_cache: Dict[str, ModelConfig] = {}
         self.providers_cache = {}
         self.current_model: Optional[ModelConfig] = None
+        self.cache_file = Path(cache_file)
         self.cache_expiry = 0
-        self.cache_duration = 86400  # 24小时缓存
+        self.cache_duration = cache_duration
         self.jwt_token = None
         self.token_expiry = 0
+        self.session = requests.Session()  # 复用到后端的连接
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self._loaded = False  # 是否已有从后端或磁盘缓存得到的模型列表
+        self._retry_at = 0.0
+        self._load_cache()
+    
+    @classmethod
+    def shared(cls) -> 'ModelManager':
+        """进程内共享的实例（AI处理器、RSS源注册表和API服务器共用同一份模型配置和后端连接）"""
+        with _shared_lock:
+            instance = cls.__dict__.get('_instance')
+            if instance is None:
+                instance = cls()
+                cls._instance = instance
+            return instance
+    
+    def _load_cache(self):
+        """读取磁盘缓存，API密钥使用当前配置"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            models = [
+                ModelConfig(api_key=config.SILICONFLOW_API_KEY or "", **model) for model in data['models']
+            ]
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            logger.warning(f"读取模型配置缓存失败: {str(e)}")
+            return
+        self.models_cache = {model.model_id: model for model in models}
+        self.cache_expiry = data.get('fetched_at', 0) + self.cache_duration
+        self._loaded = True
+        logger.info(f"从磁盘缓存加载 {len(models)} 个模型配置")
+    
+    def _save_cache(self, models: List[ModelConfig]):
+        data = {
+            'fetched_at': time.time(),
+            'models': [{key: value for key, value in asdict(model).items() if key != 'api_key'} for model in models],
+        }
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_file.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+            tmp_path.replace(self.cache_file)
+        except OSError as e:
+            logger.warning(f"保存模型配置缓存失败: {str(e)}")
         
     def _authenticate_jwt(self) -> bool:
         """使用JWT进行后端认证"""
         try:
-            import time
             current_time = time.time()
             
             # 检查token是否还有效（提前5分钟刷新）
@@ -55,7 +119,7 @@ class ModelManager:
                 'password': config.BACKEND_PASSWORD
             }
             
-            response = requests.post(
+            response = self.session.post(
                 config.BACKEND_AUTH_ENDPOINT,
                 json=auth_data,
                 timeout=10
@@ -90,37 +154,98 @@ class ModelManager:
             headers['Authorization'] = f'Token {config.BACKEND_API_TOKEN}'
         
         return headers
-    
+
+    def get_backend_headers(self) -> Dict[str, str]:
+        """获取访问后端API的认证头（JWT认证失败时退回API Token）"""
+        self._authenticate_jwt()
+        return self._get_auth_headers()
+
     def get_available_models(self, force_refresh: bool = False) -> List[ModelConfig]:
-        """获取可用的AI模型列表"""
-        try:
-            # 检查缓存是否过期
-            if not force_refresh and self.cache_expiry > 0:
-                import time
-                if time.time() < self.cache_expiry:
-                    logger.info("使用缓存的模型配置")
-                    return list(self.models_cache.values())
+        """
+        获取可用的AI模型列表
+        
+        有缓存时直接返回（过期则在后台刷新）；只有首次运行且没有磁盘缓存，或force_refresh时才同步访问后端。
+        
+        Args:
+            force_refresh: 同步刷新缓存
             
+        Returns:
+            模型配置列表，后端不可用且没有缓存时返回默认模型配置
+        """
+        if force_refresh:
+            self._refresh()
+        elif not self._loaded:
+            if time.time() >= self._retry_at:
+                self._refresh()
+        elif time.time() >= self.cache_expiry:
+            self._refresh_in_background()
+        
+        with self._lock:
+            if self._loaded:
+                return list(self.models_cache.values())
+        return self._get_default_models()
+    
+    def _refresh_in_background(self):
+        """缓存过期时启动后台刷新，刷新完成前调用方继续使用旧配置"""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        logger.info("模型配置缓存已过期，在后台刷新")
+        threading.Thread(target=self._refresh, name='model-config-refresh', daemon=True).start()
+    
+    def _refresh(self) -> bool:
+        """从后端刷新模型配置并写入磁盘缓存，失败时保留旧配置并在MODEL_REFRESH_RETRY_SECONDS后重试"""
+        try:
+            with self._refresh_lock:
+                models = self._fetch_models()
+                now = time.time()
+                with self._lock:
+                    if models is None:
+                        self._retry_at = now + config.MODEL_REFRESH_RETRY_SECONDS
+                        if self._loaded:
+                            self.cache_expiry = self._retry_at
+                        return False
+                    self.models_cache = {model.model_id: model for model in models}
+                    self.cache_expiry = now + self.cache_duration
+                    self._loaded = True
+                    # 当前选择的模型指向刷新后的配置
+                    if self.current_model and self.current_model.model_id in self.models_cache:
+                        self.current_model = self.models_cache[self.current_model.model_id]
+                self._save_cache(models)
+                return True
+        finally:
+            with self._lock:
+                self._refreshing = False
+    
+    def _fetch_models(self) -> Optional[List[ModelConfig]]:
+        """
+        从后端获取AI模型配置
+        
+        Returns:
+            已激活的模型配置列表，认证或请求失败时返回None
+        """
+        try:
             logger.info("从后端获取最新的AI模型配置...")
             
             # 首先尝试JWT认证
             if not self._authenticate_jwt():
                 logger.warning("JWT认证失败，尝试使用Token认证...")
                 if not config.BACKEND_API_TOKEN:
-                    logger.warning("没有可用的认证方式，将使用默认模型配置")
-                    return self._get_default_models()
+                    logger.warning("没有可用的认证方式，继续使用缓存或默认模型配置")
+                    return None
             
             # 从后端获取AI提供商配置
             providers_url = f"{config.BACKEND_BASE_URL}/api/chat/providers/"
             headers = self._get_auth_headers()
             
-            response = requests.get(providers_url, headers=headers, timeout=10)
+            response = self.session.get(providers_url, headers=headers, timeout=10)
             if response.status_code != 200:
                 if response.status_code == 401:
-                    logger.warning("获取AI提供商需要认证，将使用默认模型配置")
+                    logger.warning("获取AI提供商需要认证，继续使用缓存或默认模型配置")
                 else:
                     logger.warning(f"获取AI提供商失败: {response.status_code}")
-                return self._get_default_models()
+                return None
             
             providers_data = response.json()
             logger.info(f"获取到 {len(providers_data)} 个AI提供商")
@@ -129,7 +254,7 @@ class ModelManager:
             all_models = []  # 初始化模型列表
             models_url = f"{config.BACKEND_BASE_URL}/api/chat/models/"
             logger.info(f"获取模型URL: {models_url}")
-            models_response = requests.get(models_url, headers=headers, timeout=10)
+            models_response = self.session.get(models_url, headers=headers, timeout=10)
             
             logger.info(f"模型API响应状态: {models_response.status_code}")
             if models_response.status_code == 200:
@@ -161,30 +286,28 @@ class ModelManager:
                             api_base_url=provider.get('api_base_url', config.SILICONFLOW_BASE_URL),
                             max_tokens=model.get('max_tokens', 4096),
                             support_functions=model.get('support_functions', False),
-                            support_vision=model.get('support_vision', False)
+                            support_vision=model.get('support_vision', False),
+                            requests_per_minute=provider.get('requests_per_minute'),
+                            max_concurrency=provider.get('max_concurrency')
                         )
                         all_models.append(model_config)
-                        self.models_cache[model['model_id']] = model_config
                         logger.info(f"添加模型: {model['model_name']}")
                     else:
                         logger.warning(f"模型 {model.get('model_name')} 没有找到对应的提供商信息")
             else:
                 logger.warning(f"获取模型失败: {models_response.status_code} - {models_response.text}")
+                return None
             
             # 保存提供商信息到缓存
             for provider in providers_data:
                 self.providers_cache[provider['id']] = provider
             
-            # 更新缓存过期时间
-            import time
-            self.cache_expiry = time.time() + self.cache_duration
-            
             logger.info(f"成功获取 {len(all_models)} 个可用模型")
             return all_models
             
         except Exception as e:
             logger.error(f"获取AI模型配置失败: {str(e)}")
-            return self._get_default_models()
+            return None
     
     def _get_default_models(self) -> List[ModelConfig]:
         """获取默认模型配置（当无法连接后端时使用）"""
@@ -5,13 +5,25 @@ AI新闻代理主程序
 import json
 import logging
 import sys
+import time
 import argparse
+from itertools import chain
 from datetime import datetime, date
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Union
 
+import pytz
+
+from config import (
+    TIMEZONE, ADAPTIVE_POLLING_ENABLED, FEED_REGISTRY_ENABLED, ARTICLE_EXTRACTION_ENABLED, FETCH_DEADLINE_SECONDS
+)
 from rss_fetcher import RSSFetcher, setup_logging
-from ai_processor import AIProcessor
+from ai_processor import AIProcessor, ProcessedNews
+from article_extractor import ArticleExtractor
+from checkpoint import RunCheckpoint
+from feed_registry import FeedRegistry
+from run_profiler import RunProfiler
+from scheduler import Scheduler, ScheduledJob, build_jobs, job_sources
 
 
 class NewsAgent:
@@ -20,19 +32,44 @@ class NewsAgent:
     def __init__(self, output_dir: str = "output", model_id: str = None):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
+        self.checkpoint_dir = self.output_dir / 'checkpoints'
         
         self.fetcher = RSSFetcher()
         self.processor = AIProcessor(model_id=model_id)
+        self.registry = FeedRegistry(self.processor.model_manager) if FEED_REGISTRY_ENABLED else None
+        # 全文提取与RSS抓取共用下载器，复用各站点的耗时统计
+        self.extractor = ArticleExtractor(self.fetcher.downloader) if ARTICLE_EXTRACTION_ENABLED else None
         self.logger = logging.getLogger(__name__)
         self.current_model_id = model_id
+        self.last_profile: Optional[Dict[str, Any]] = None
+    
+    def refresh_sources(self) -> List[Dict[str, Any]]:
+        """
+        从RSS源注册表更新抓取的源列表（未启用注册表时保持config中的RSS_SOURCES）
+        
+        Returns:
+            当前RSS源配置列表
+        """
+        if self.registry is not None:
+            self.fetcher.sources = self.registry.get_sources()
+        return self.fetcher.get_available_sources()
     
-    def run_daily_collection(self, target_date: Optional[date] = None, progress_callback=None) -> Dict[str, Any]:
+    def run_daily_collection(self, target_date: Optional[date] = None, progress_callback=None,
+                             incremental: bool = True, source_names: Optional[List[str]] = None,
+                             adaptive_polling: bool = False, resume: Union[bool, str] = False) -> Dict[str, Any]:
         """
         执行每日新闻收集和处理
         
+        每篇新闻处理完成后立即写入本次运行的检查点，运行成功后删除本次及该日期更早运行的检查点；RSS轮询状态在运行成功后才保存。
+        
         Args:
             target_date: 目标日期，默认为今天
             progress_callback: 进度回调函数
+            incremental: 已有当日报告时只处理新增文章并合并到报告中，为False时重新生成整份报告
+            source_names: 只抓取这些RSS源（定时任务按源调度时使用），None表示全部
+            adaptive_polling: 只抓取到了下次轮询时间的RSS源（定时任务使用）
+            resume: 从未完成运行的检查点继续，跳过已处理成功的文章；为True时取该日期最近的检查点，为字符串时指定运行ID，
+                早于当日报告的检查点被忽略
             
         Returns:
             处理结果报告
@@ -42,64 +79,217 @@ class NewsAgent:
         
         self.logger.info(f"开始执行 {target_date} 的AI新闻收集任务")
         
+        run_started = time.time()
+        checkpoint = None
+        resumed_news: List[ProcessedNews] = []
+        if resume:
+            run_id = resume if isinstance(resume, str) else None
+            # 当日报告保存之后，更早的检查点中的新闻已由后来成功的运行处理
+            report_file = self.output_dir / f"ai_news_report_{target_date.strftime('%Y%m%d')}.json"
+            not_before = report_file.stat().st_mtime if report_file.exists() else None
+            checkpoint = RunCheckpoint.find(self.checkpoint_dir, target_date, run_id, not_before)
+            if checkpoint:
+                resumed_news = [ProcessedNews.from_dict(news) for news in checkpoint.load_news()]
+                self.logger.info(f"从运行 {checkpoint.run_id} 的检查点恢复 {len(resumed_news)} 条已处理新闻")
+            else:
+                self.logger.warning(f"没有找到 {target_date} 的{'运行 ' + run_id + ' ' if run_id else ''}检查点，重新开始收集")
+        
+        profiler = RunProfiler(run_id=checkpoint.run_id if checkpoint else None)
+        self.fetcher.profiler = profiler
+        self.processor.profiler = profiler
+        profiler.start()
+        
         try:
             # 第一步：抓取RSS文章
             self.logger.info("步骤1: 抓取RSS文章")
             if progress_callback:
                 progress_callback(15, "抓取RSS文章...")
             
-            articles = self.fetcher.fetch_all_sources(target_date)
+            self.refresh_sources()
+            articles = self.fetcher.fetch_all_sources(target_date, source_names, adaptive=adaptive_polling)
+            if self.registry is not None:
+                result = self.registry.report(self.fetcher.feed_health)
+                if result:
+                    profiler.increment('feeds_quarantined', len(result.get('quarantined', [])))
             
-            if not articles:
+            if not articles and not resumed_news:
                 self.logger.warning("未抓取到任何文章")
+                self.fetcher.commit_polling()
+                RunCheckpoint.remove_stale(self.checkpoint_dir, target_date, run_started)
                 if progress_callback:
                     progress_callback(100, "完成，但未抓取到文章")
                 return self._create_empty_report(target_date)
             
             self.logger.info(f"成功抓取 {len(articles)} 篇文章")
+            
+            # 增量模式：跳过已在当日报告中的文章
+            existing_report = self.get_report_by_date(target_date) if incremental else None
+            new_articles = articles
+            if existing_report and existing_report.get('all_news'):
+                known_links = {news.get('original_link') for news in existing_report['all_news']}
+                new_articles = [article for article in articles if article.link not in known_links]
+                profiler.increment('articles_already_reported', len(articles) - len(new_articles))
+                self.logger.info(f"当日报告已有 {len(known_links)} 条新闻，新增文章 {len(new_articles)} 篇")
+                if not new_articles and not resumed_news:
+                    self.fetcher.commit_polling()
+                    RunCheckpoint.remove_stale(self.checkpoint_dir, target_date, run_started)
+                    if progress_callback:
+                        progress_callback(100, "完成，没有新增文章")
+                    return existing_report
+            else:
+                existing_report = None
+            # 已在报告中的文章不再需要，只保留原始文章数
+            raw_articles_count = len(articles)
+            del articles
+            
+            # 恢复模式：跳过检查点中已处理成功的文章
+            if resumed_news:
+                done_links = {news.original_link for news in resumed_news}
+                new_articles = [article for article in new_articles if article.link not in done_links]
+                profiler.increment('articles_resumed', len(resumed_news))
+            
+            if self.extractor is not None:
+                if progress_callback:
+                    progress_callback(30, f"提取{len(new_articles)}篇新文章的全文...")
+                self.extractor.profiler = profiler
+                deadline = time.monotonic() + FETCH_DEADLINE_SECONDS if FETCH_DEADLINE_SECONDS else None
+                with profiler.stage('extract'):
+                    self.extractor.enrich(self.fetcher.session, new_articles, deadline)
+            
             if progress_callback:
-                progress_callback(40, f"抓取到{len(articles)}篇文章，开始AI处理...")
+                progress_callback(40, f"抓取到{len(new_articles)}篇新文章，开始AI处理...")
             
             # 第二步：AI处理和分析
             self.logger.info("步骤2: AI处理和分析")
-            processed_news = self.processor.process_articles(articles, progress_callback)
+            if checkpoint is None:
+                checkpoint = RunCheckpoint.create(self.checkpoint_dir, target_date, profiler.run_id)
+            
+            def checkpointed_news():
+                for news in self.processor.iter_processed(new_articles, progress_callback):
+                    checkpoint.append_news(news.to_dict())
+                    yield news
             
-            if not processed_news:
+            # 处理结果逐条写入检查点并直接追加到报告，不保留中间列表
+            report = existing_report if existing_report is not None else self.processor.new_report()
+            added = self.processor.add_to_report(report, chain(resumed_news, checkpointed_news()))
+            
+            if not report['all_news']:
                 self.logger.warning("没有文章通过AI处理")
+                # 文章没有处理成功，下次运行需要重新抓取
+                self.fetcher.discard_polling()
+                checkpoint.remove()
                 if progress_callback:
                     progress_callback(100, "完成，但没有文章通过AI处理")
                 return self._create_empty_report(target_date)
             
-            self.logger.info(f"成功处理 {len(processed_news)} 篇新闻")
+            self.logger.info(f"成功处理 {added} 篇新闻")
             
-            # 第三步：生成每日报告
+            # 第三步：生成每日报告（已有报告时合并新增新闻）
             self.logger.info("步骤3: 生成每日报告")
             if progress_callback:
                 progress_callback(75, "生成每日报告...")
             
-            report = self.processor.generate_daily_report(processed_news)
+            self.processor.finalize_report(report, added)
+            report['raw_articles_count'] = max(report.get('raw_articles_count', 0), raw_articles_count)
             report['collection_date'] = target_date.isoformat()
-            report['raw_articles_count'] = len(articles)
-            report['processed_articles_count'] = len(processed_news)
+            report['processed_articles_count'] = report['total_count']
             
             # 第四步：保存结果
             self.logger.info("步骤4: 保存结果")
             if progress_callback:
                 progress_callback(90, "保存结果...")
             
-            self._save_results(report, target_date)
+            with profiler.stage('save'):
+                self._save_results(report, target_date)
+            # 报告保存后才写入RSS轮询状态，中途失败时下次运行仍会重新抓取这些文章
+            self.fetcher.commit_polling()
+            checkpoint.remove()
+            RunCheckpoint.remove_stale(self.checkpoint_dir, target_date, run_started)
             
             self.logger.info("每日新闻收集任务完成")
             if progress_callback:
-                progress_callback(100, f"完成！处理了{len(processed_news)}篇新闻")
+                progress_callback(100, f"完成！处理了{added}篇新闻，报告共{report['total_count']}篇")
             
             return report
             
         except Exception as e:
             self.logger.error(f"执行每日收集任务失败: {str(e)}")
+            profiler.increment('failed_runs')
+            self.fetcher.discard_polling()
             if progress_callback:
                 progress_callback(0, f"处理失败: {str(e)}")
             raise
+        
+        finally:
+            profiler.finish()
+            self._save_profile(profiler, target_date)
+    
+    def _save_profile(self, profiler: RunProfiler, target_date: date):
+        """
+        保存本次运行的性能档案（与报告文件放在同一目录）
+        
+        Args:
+            profiler: 本次运行的性能统计器
+            target_date: 目标日期
+        """
+        profile = profiler.to_dict()
+        profile['collection_date'] = target_date.isoformat()
+        self.last_profile = profile
+        
+        profile_file = self.output_dir / f"ai_news_profile_{target_date.strftime('%Y%m%d')}.json"
+        try:
+            with open(profile_file, 'w', encoding='utf-8') as f:
+                json.dump(profile, f, ensure_ascii=False, indent=2)
+            self.logger.info(
+                f"性能档案已保存到: {profile_file}，总耗时 {profile['wall_time_seconds']}s，"
+                f"LLM调用 {profile['counters'].get('llm_calls', 0)} 次，"
+                f"p95延迟 {profile['llm']['latency_ms']['p95']}ms"
+            )
+        except Exception as e:
+            self.logger.error(f"保存性能档案失败: {str(e)}")
+    
+    def get_profile_by_date(self, target_date: date) -> Optional[Dict[str, Any]]:
+        """
+        根据日期获取运行性能档案
+        
+        Args:
+            target_date: 目标日期
+            
+        Returns:
+            性能档案数据，如果没有则返回None
+        """
+        profile_file = self.output_dir / f"ai_news_profile_{target_date.strftime('%Y%m%d')}.json"
+        
+        if not profile_file.exists():
+            return None
+        
+        try:
+            with open(profile_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.error(f"读取 {target_date} 性能档案失败: {str(e)}")
+            return None
+    
+    def get_latest_profile(self) -> Optional[Dict[str, Any]]:
+        """
+        获取最近一次运行的性能档案
+        
+        Returns:
+            性能档案数据，如果没有则返回None
+        """
+        if self.last_profile:
+            return self.last_profile
+        
+        profile_files = list(self.output_dir.glob("ai_news_profile_*.json"))
+        if not profile_files:
+            return None
+        
+        try:
+            with open(sorted(profile_files)[-1], 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.error(f"读取最新性能档案失败: {str(e)}")
+            return None
     
     def _create_empty_report(self, target_date: date) -> Dict[str, Any]:
         """创建空报告"""
@@ -232,6 +422,7 @@ class NewsAgent:
         date_str = target_date.strftime('%Y%m%d')
         report_file = self.output_dir / f"ai_news_report_{date_str}.json"
         simplified_file = self.output_dir / f"ai_news_simplified_{date_str}.json"
+        profile_file = self.output_dir / f"ai_news_profile_{date_str}.json"
         
         deleted_files = []
         
@@ -248,6 +439,11 @@ class NewsAgent:
                 deleted_files.append(str(simplified_file))
                 self.logger.info(f"已删除简化报告文件: {simplified_file}")
             
+            # 删除性能档案
+            if profile_file.exists():
+                profile_file.unlink()
+                deleted_files.append(str(profile_file))
+            
             if deleted_files:
                 self.logger.info(f"成功删除 {target_date} 的报告，共删除 {len(deleted_files)} 个文件")
                 return True
@@ -268,8 +464,8 @@ class NewsAgent:
         """
         if model_id != self.current_model_id:
             self.logger.info(f"更新AI模型从 {self.current_model_id} 到 {model_id}")
-            # 重新创建processor实例以使用新模型
-            self.processor = AIProcessor(model_id=model_id)
+            # 处理器保留本地模型和统计，只更换大模型客户端
+            self.processor.set_model(model_id)
             self.current_model_id = model_id
 
 
@@ -283,6 +479,10 @@ def main():
                        help='日志级别')
     parser.add_argument('--show-latest', action='store_true', help='显示最新报告')
     parser.add_argument('--list-reports', action='store_true', help='列出所有报告')
+    parser.add_argument('--rebuild', action='store_true', help='重新生成当日报告，而不是只合并新增文章')
+    parser.add_argument('--daemon', action='store_true', help='常驻运行，按SCHEDULE_CRON和SOURCE_SCHEDULES定时收集')
+    parser.add_argument('--resume', nargs='?', const=True, default=False, metavar='RUN_ID',
+                       help='从上次未完成运行的检查点继续，跳过已处理成功的文章（可指定运行ID）')
     
     args = parser.parse_args()
     
@@ -320,6 +520,24 @@ def main():
             else:
                 print("暂无可用报告")
         
+        elif args.daemon:
+            # 定时收集：任务在调度线程中依次执行，不会并发堆积
+            def scheduled_collection(job: ScheduledJob) -> bool:
+                today = datetime.now(pytz.timezone(TIMEZONE)).date()
+                source_names = [source['name'] for source in agent.refresh_sources()]
+                # RSS源注册表中新增的源如在SOURCE_SCHEDULES中单独配置，加入调度
+                scheduler.sync_jobs(build_jobs(scheduled_collection, source_names))
+                report = agent.run_daily_collection(
+                    today, source_names=job_sources(job, source_names), adaptive_polling=ADAPTIVE_POLLING_ENABLED
+                )
+                print(f"[{job.name}] {report['collection_date']} 报告共 {report['total_count']} 条新闻")
+                return True
+            
+            source_names = [source['name'] for source in agent.refresh_sources()]
+            scheduler = Scheduler(build_jobs(scheduled_collection, source_names))
+            print("定时收集已启动，按 Ctrl+C 退出")
+            scheduler.run_forever()
+        
         else:
             # 执行新闻收集
             target_date = None
@@ -331,7 +549,7 @@ def main():
                     sys.exit(1)
             
             print(f"开始执行AI新闻收集任务...")
-            report = agent.run_daily_collection(target_date)
+            report = agent.run_daily_collection(target_date, incremental=not args.rebuild, resume=args.resume)
             
             print("\n=== 收集完成 ===")
             print(f"日期: {report['collection_date']}")
@@ -0,0 +1,177 @@
+"""
+本地新闻分类器
+用TF-IDF哈希特征和线性模型预测文章的分类和重要程度，训练数据为后端NewsItem中由大模型标注的历史新闻。
+置信度足够高时可直接替代大模型的内容分析，大模型不可用时作为降级分析。
+
+训练：
+    cd ../backend && python manage.py export_news_dataset --output ../ai-news-agent/data/news_dataset.jsonl
+    python news_classifier.py --data data/news_dataset.jsonl
+"""
+import argparse
+import json
+import logging
+import random
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config import CLASSIFIER_MODEL_DIR, CLASSIFIER_CONFIDENCE
+from linear_model import SoftmaxClassifier
+from relevance_filter import article_text, load_jsonl
+from text_features import HashingVectorizer
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_MODEL = 'category.npz'
+IMPORTANCE_MODEL = 'importance.npz'
+
+
+class NewsClassifier:
+    """
+    分类和重要程度的联合分类器（两个模型共享同一份TF-IDF特征）
+
+    Args:
+        model_dir: 模型文件目录
+        confidence: 两项预测的概率都不低于该值时视为高置信度
+    """
+
+    def __init__(self, model_dir: str = CLASSIFIER_MODEL_DIR, confidence: float = CLASSIFIER_CONFIDENCE):
+        self.model_dir = model_dir
+        self.confidence = confidence
+        self.category_model: Optional[SoftmaxClassifier] = None
+        self.importance_model: Optional[SoftmaxClassifier] = None
+        self._loaded = False
+
+    @property
+    def available(self) -> bool:
+        """模型文件是否存在并已成功加载"""
+        self._load()
+        return self.category_model is not None and self.importance_model is not None
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        category_path = Path(self.model_dir) / CATEGORY_MODEL
+        importance_path = Path(self.model_dir) / IMPORTANCE_MODEL
+        if not (category_path.exists() and importance_path.exists()):
+            logger.info(f"未找到本地分类模型（{self.model_dir}），将完全依赖大模型分析")
+            return
+        try:
+            self.category_model = SoftmaxClassifier.load(str(category_path))
+            self.importance_model = SoftmaxClassifier.load(str(importance_path))
+            logger.info(f"已加载本地分类模型: {self.model_dir}")
+        except Exception as e:
+            logger.error(f"加载本地分类模型失败: {str(e)}")
+            self.category_model = self.importance_model = None
+
+    def predict(self, articles: List[Any]) -> List[Optional[Dict[str, Any]]]:
+        """
+        批量预测分类和重要程度
+
+        Args:
+            articles: RSSArticle或字典列表
+
+        Returns:
+            每篇文章的预测结果（category、importance、对应的置信度和confident标记），模型不可用时为None
+        """
+        if not articles or not self.available:
+            return [None] * len(articles)
+
+        # 两个模型使用相同的特征配置，只需提取一次特征
+        X = self.category_model.vectorizer.transform([article_text(article) for article in articles])
+        category_proba = self.category_model.predict_proba_matrix(X)
+        importance_proba = self.importance_model.predict_proba_matrix(X)
+        category_index = category_proba.argmax(axis=1)
+        importance_index = importance_proba.argmax(axis=1)
+        category_confidence = category_proba[np.arange(len(articles)), category_index]
+        importance_confidence = importance_proba[np.arange(len(articles)), importance_index]
+
+        return [
+            {
+                'category': self.category_model.classes[category_index[i]],
+                'importance': self.importance_model.classes[importance_index[i]],
+                'category_confidence': float(category_confidence[i]),
+                'importance_confidence': float(importance_confidence[i]),
+                'confident': bool(min(category_confidence[i], importance_confidence[i]) >= self.confidence),
+            }
+            for i in range(len(articles))
+        ]
+
+
+def _evaluate(model: SoftmaxClassifier, X, labels: List[str], confidence: float) -> Dict[str, Any]:
+    proba = model.predict_proba_matrix(X)
+    predicted = np.array([model.classes[i] for i in proba.argmax(axis=1)])
+    labels = np.array(labels)
+    confident = proba.max(axis=1) >= confidence
+    return {
+        'accuracy': round(float(np.mean(predicted == labels)), 4),
+        'confident_coverage': round(float(np.mean(confident)), 4),
+        'confident_accuracy': round(float(np.mean(predicted[confident] == labels[confident])), 4) if confident.any() else None,
+    }
+
+
+def train(items: List[Dict[str, Any]], model_dir: str, holdout: float = 0.2, seed: int = 42,
+          epochs: int = 80, confidence: float = CLASSIFIER_CONFIDENCE) -> Dict[str, Any]:
+    """
+    训练分类和重要程度模型并保存
+
+    Args:
+        items: 带category和importance字段的新闻（export_news_dataset导出）
+        model_dir: 模型保存目录
+        holdout: 留出评估的比例
+        seed: 随机种子
+        epochs: 训练轮数
+        confidence: 评估高置信度覆盖率时使用的阈值
+
+    Returns:
+        留出集上的评估结果
+    """
+    items = [item for item in items if item.get('category') and item.get('importance')]
+    if not items:
+        raise ValueError("没有带分类和重要程度标注的样本")
+    items = list(items)
+    random.Random(seed).shuffle(items)
+    split = int(len(items) * (1 - holdout)) if holdout else len(items)
+    train_items, test_items = items[:split], items[split:]
+    texts = [article_text(item) for item in train_items]
+
+    vectorizer = HashingVectorizer().fit_idf(texts)
+    category_model = SoftmaxClassifier(sorted({item['category'] for item in items}), vectorizer)
+    importance_model = SoftmaxClassifier(sorted({item['importance'] for item in items}), vectorizer)
+    category_model.fit(texts, [item['category'] for item in train_items], epochs=epochs)
+    importance_model.fit(texts, [item['importance'] for item in train_items], epochs=epochs)
+
+    category_model.save(str(Path(model_dir) / CATEGORY_MODEL))
+    importance_model.save(str(Path(model_dir) / IMPORTANCE_MODEL))
+
+    if not test_items:
+        return {}
+    X = vectorizer.transform([article_text(item) for item in test_items])
+    return {
+        'holdout_samples': len(test_items),
+        'category': _evaluate(category_model, X, [item['category'] for item in test_items], confidence),
+        'importance': _evaluate(importance_model, X, [item['importance'] for item in test_items], confidence),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='训练本地新闻分类模型')
+    parser.add_argument('--data', required=True, help='新闻JSONL（export_news_dataset导出）')
+    parser.add_argument('--output-dir', default=CLASSIFIER_MODEL_DIR, help='模型保存目录')
+    parser.add_argument('--holdout', type=float, default=0.2, help='留出评估的比例')
+    parser.add_argument('--epochs', type=int, default=80, help='训练轮数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    items = load_jsonl(args.data)
+    print(f"训练样本: {len(items)} 条")
+    metrics = train(items, args.output_dir, args.holdout, args.seed, args.epochs)
+    print(f"模型已保存到: {args.output_dir}")
+    if metrics:
+        print(json.dumps(metrics, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""
+本地相关性预过滤
+在任何大模型调用之前，用CPU上的哈希n-gram线性模型批量判断文章是否与AI相关，丢弃无关文章。
+默认只在训练好的模型（RELEVANCE_MODEL_FILE）存在时启用；显式开启但模型不存在时，退化为基于AI词表的打分。
+
+训练：
+    cd ../backend && python manage.py export_news_dataset --output ../ai-news-agent/data/news_dataset.jsonl
+    python relevance_filter.py --positives data/news_dataset.jsonl --negatives data/relevance_negatives.jsonl
+"""
+import argparse
+import json
+import logging
+import random
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import RELEVANCE_MODEL_FILE, RELEVANCE_THRESHOLD
+from linear_model import SoftmaxClassifier
+from rss_fetcher import RSSArticle
+from text_features import HashingVectorizer
+
+logger = logging.getLogger(__name__)
+
+RELEVANT = 'relevant'
+IRRELEVANT = 'irrelevant'
+
+# 未训练模型时使用的AI词表
+AI_LEXICON = [
+    'ai', 'artificial intelligence', 'machine learning', 'deep learning', 'neural', 'neural network',
+    'llm', 'llms', 'gpt', 'chatgpt', 'transformer', 'transformers', 'diffusion', 'language model',
+    'foundation model', 'generative', 'genai', 'reinforcement learning', 'computer vision', 'nlp',
+    'dataset', 'datasets', 'benchmark', 'fine-tuning', 'fine-tune', 'inference', 'embedding', 'embeddings',
+    'agent', 'agents', 'agentic', 'multimodal', 'reasoning', 'robotics', 'robot', 'pytorch', 'tensorflow',
+    'jax', 'hugging face', 'openai', 'deepmind', 'anthropic', 'gemini', 'claude', 'llama', 'qwen', 'mistral',
+    'prompt', 'alignment', 'training data', 'model training', 'classifier', 'algorithm', 'gpu', 'gpus',
+    'foundation models', 'language models', 'vision-language', 'lora', 'quantization', 'arxiv',
+    'neurips', 'icml', 'iclr', 'cvpr',
+    '人工智能', '机器学习', '深度学习', '神经网络', '大模型', '模型', '算法', '智能体', '生成式', '训练', '推理',
+    '数据集', '机器人', '自然语言', '计算机视觉', '强化学习', '多模态', '算力', '芯片',
+]
+
+
+def article_text(article: Any) -> str:
+    """拼接文章中用于相关性判断的文本（支持RSSArticle和字典）"""
+    if isinstance(article, dict):
+        title, summary, content = article.get('title', ''), article.get('summary', ''), article.get('content', '')
+    else:
+        title, summary, content = article.title, article.summary, article.content
+    return f"{title or ''}\n{summary or ''}\n{(content or '')[:2000]}"
+
+
+class LexiconScorer:
+    """基于AI词表命中数的打分（命中0个约0.27，命中1个约0.73，命中2个以上接近1）"""
+
+    def __init__(self, terms: List[str] = AI_LEXICON):
+        # 词表很小，使用更大的哈希空间降低无关n-gram与词表碰撞的概率
+        self.vectorizer = HashingVectorizer(n_features=2 ** 22, binary=True, normalize=False)
+        self.mask = np.zeros(self.vectorizer.n_features, dtype=np.uint8)
+        self.mask[self.vectorizer.hash_terms(terms)] = 1.0
+
+    def score_texts(self, texts: List[str]) -> np.ndarray:
+        hits = self.vectorizer.transform(texts).dot(self.mask)
+        return 1.0 / (1.0 + np.exp(-(2.0 * hits - 1.0)))
+
+
+class RelevanceFilter:
+    """
+    文章相关性过滤器
+
+    Args:
+        model_path: 训练好的模型文件路径
+        threshold: 相关性得分阈值，低于阈值的文章被丢弃
+    """
+
+    def __init__(self, model_path: str = RELEVANCE_MODEL_FILE, threshold: float = RELEVANCE_THRESHOLD):
+        self.model_path = model_path
+        self.threshold = threshold
+        self._model: Optional[SoftmaxClassifier] = None
+        self._lexicon: Optional[LexiconScorer] = None
+        self._loaded = False
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.model_path and Path(self.model_path).exists():
+            try:
+                self._model = SoftmaxClassifier.load(self.model_path)
+                logger.info(f"已加载相关性模型: {self.model_path}")
+                return
+            except Exception as e:
+                logger.error(f"加载相关性模型失败: {str(e)}")
+        else:
+            logger.warning(f"相关性模型不存在: {self.model_path}")
+        # 词表打分未经训练和评估，不含词表关键词的文章得分约0.27，会被默认阈值丢弃
+        logger.warning(
+            f"相关性过滤使用内置AI词表打分（阈值 {self.threshold}），不含词表关键词的文章将被丢弃；"
+            f"训练模型后再开启过滤，或设置 RELEVANCE_FILTER_ENABLED=false 关闭"
+        )
+        self._lexicon = LexiconScorer()
+
+    @property
+    def source(self) -> str:
+        """当前使用的打分方式（model / lexicon）"""
+        self._load()
+        return 'model' if self._model is not None else 'lexicon'
+
+    def score_texts(self, texts: List[str]) -> np.ndarray:
+        """批量计算相关性得分（0-1）"""
+        self._load()
+        if not texts:
+            return np.zeros(0)
+        if self._model is not None:
+            return self._model.predict_proba(texts)[:, self._model.classes.index(RELEVANT)]
+        return self._lexicon.score_texts(texts)
+
+    def score(self, articles: List[Any]) -> np.ndarray:
+        """批量计算文章的相关性得分"""
+        return self.score_texts([article_text(article) for article in articles])
+
+    def filter(self, articles: List[RSSArticle]) -> Tuple[List[RSSArticle], List[RSSArticle]]:
+        """
+        过滤无关文章
+
+        Returns:
+            (保留的文章, 丢弃的文章)
+        """
+        kept, dropped = [], []
+        for article, score in zip(articles, self.score(articles)):
+            if score >= self.threshold:
+                kept.append(article)
+            else:
+                dropped.append(article)
+                logger.info(f"相关性过滤丢弃({score:.2f}): {article.title[:50]}")
+        return kept, dropped
+
+
+def load_jsonl(path: str) -> List[Dict[str, Any]]:
+    """读取JSONL文件"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def train(positives: List[Dict[str, Any]], negatives: List[Dict[str, Any]], output: str,
+          holdout: float = 0.2, seed: int = 42, epochs: int = 60) -> Dict[str, Any]:
+    """
+    训练相关性模型并保存
+
+    Args:
+        positives: 相关文章（通常为后端导出的NewsItem）
+        negatives: 无关文章
+        output: 模型文件路径
+        holdout: 留出评估的比例
+        seed: 随机种子
+        epochs: 训练轮数
+
+    Returns:
+        留出集上的评估结果
+    """
+    samples = [(article_text(item), RELEVANT) for item in positives]
+    samples += [(article_text(item), IRRELEVANT) for item in negatives]
+    random.Random(seed).shuffle(samples)
+    split = int(len(samples) * (1 - holdout)) if holdout else len(samples)
+    train_set, test_set = samples[:split], samples[split:]
+
+    model = SoftmaxClassifier([RELEVANT, IRRELEVANT], HashingVectorizer())
+    model.fit([text for text, _ in train_set], [label for _, label in train_set], epochs=epochs)
+    model.save(output)
+
+    if not test_set:
+        return {}
+    scores = model.predict_proba([text for text, _ in test_set])[:, 0]
+    labels = np.array([label == RELEVANT for _, label in test_set])
+    predicted = scores >= RELEVANCE_THRESHOLD
+    true_positive = int(np.sum(predicted & labels))
+    precision = true_positive / max(int(predicted.sum()), 1)
+    recall = true_positive / max(int(labels.sum()), 1)
+    return {
+        'holdout_samples': len(test_set),
+        'accuracy': round(float(np.mean(predicted == labels)), 4),
+        'precision': round(precision, 4),
+        'recall': round(recall, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='训练本地相关性过滤模型')
+    parser.add_argument('--positives', required=True, help='相关文章JSONL（export_news_dataset导出）')
+    parser.add_argument('--negatives', required=True, action='append', help='无关文章JSONL，可指定多次')
+    parser.add_argument('--output', default=RELEVANCE_MODEL_FILE, help='模型文件路径')
+    parser.add_argument('--holdout', type=float, default=0.2, help='留出评估的比例')
+    parser.add_argument('--epochs', type=int, default=60, help='训练轮数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    positives = load_jsonl(args.positives)
+    negatives = [item for path in args.negatives for item in load_jsonl(path)]
+    print(f"训练样本: 相关 {len(positives)} 条, 无关 {len(negatives)} 条")
+    metrics = train(positives, negatives, args.output, args.holdout, args.seed, args.epochs)
+    print(f"模型已保存到: {args.output}")
+    if metrics:
+        print(json.dumps(metrics, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,22 +1,35 @@
 """
 RSS新闻抓取器
 """
-import feedparser
 import requests
 import logging
+import sys
+import threading
 import time
-from datetime import datetime, date, timedelta
-from typing import List, Dict, Any, Optional
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, date, timezone
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
-from dateutil import parser as date_parser
-import pytz
 
-from config import RSS_SOURCES, REQUEST_TIMEOUT, MAX_RETRIES, RETRY_DELAY, MAX_ARTICLES_PER_SOURCE
+from config import (
+    RSS_SOURCES, SOURCE_FETCH_INTERVAL, FETCH_CONCURRENCY, FETCH_DEADLINE_SECONDS, PARSE_WORKERS, MAX_CONTENT_LENGTH
+)
+from cpu_stage import ArticleRecord, ParsePool, ParseResult
+from feed_downloader import FeedDownloader
+from feed_polling import FeedPoller
+from run_profiler import RunProfiler
+# 截止时间到后再等待的秒数，让恰好在截止时间超时的下载记录失败结果
+DEADLINE_GRACE_SECONDS = 1
 
 
-@dataclass
+def intern_text(value: Optional[str]) -> Optional[str]:
+    """驻留重复出现的短字符串（来源名称、分类等），同值的记录共享同一个对象"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@dataclass(slots=True)
 class RSSArticle:
-    """RSS文章数据结构"""
+    """RSS文章数据结构（使用__slots__，大批量回填时每条记录不带实例字典）"""
     title: str
     summary: str
     link: str
@@ -25,31 +38,101 @@ class RSSArticle:
     published_date: Optional[datetime] = None
     content: str = ""
     tags: List[str] = None
+    cleaned_content: Optional[str] = None  # 解析阶段预先清理的正文，为None时由AI处理器清理
     
     def __post_init__(self):
         if self.tags is None:
             self.tags = []
+        self.source = intern_text(self.source)
+        self.source_description = intern_text(self.source_description)
+    
+    def release_content(self):
+        """AI处理完成后释放原文，清理后的正文已保存在ProcessedNews中"""
+        self.content = ""
+        self.cleaned_content = None
+
+
+@dataclass(slots=True)
+class FeedDownload:
+    """已下载、等待解析的RSS文档"""
+    source_config: Dict[str, str]
+    content: bytes
+    started: float  # 开始抓取的时间（time.perf_counter()）
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class FetchRun:
+    """
+    单次抓取的结果：各源的文章、健康数据和待写入的轮询状态（线程安全）
+    
+    截止时间到后close()，之后完成的源（截止时间后仍在运行的线程）的结果被丢弃，
+    不会修改已返回的健康数据，也不会写入轮询状态。
+    """
+    
+    def __init__(self):
+        self.articles: Dict[str, List[RSSArticle]] = {}
+        self.health: List[Dict[str, Any]] = []
+        # (源名称, 文章链接（304时为None）, ETag, Last-Modified, 抓取时间)
+        self.poll_updates: List[Tuple[str, Optional[List[str]], Optional[str], Optional[str], datetime]] = []
+        self._lock = threading.Lock()
+        self._closed = False
+    
+    def add(self, health: Dict[str, Any], articles: Optional[List[RSSArticle]] = None,
+            poll_update: Optional[Tuple] = None) -> bool:
+        """记录一个源的结果，抓取已结束时返回False"""
+        with self._lock:
+            if self._closed:
+                return False
+            self.health.append(health)
+            self.articles[health['name']] = articles or []
+            if poll_update is not None:
+                self.poll_updates.append(poll_update)
+            return True
+    
+    def close(self):
+        with self._lock:
+            self._closed = True
 
 
 class RSSFetcher:
     """RSS抓取器"""
     
-    def __init__(self):
+    def __init__(self, sources: Optional[List[Dict[str, str]]] = None):
+        """
+        Args:
+            sources: RSS源配置列表，默认使用config中的RSS_SOURCES
+        """
         self.logger = logging.getLogger(__name__)
+        self.sources = sources if sources is not None else RSS_SOURCES
+        self.source_interval = SOURCE_FETCH_INTERVAL
+        self.concurrency = FETCH_CONCURRENCY
+        self.poller = FeedPoller()
         self.session = requests.Session()
-        # 移除超时限制
-        
+        self.downloader = FeedDownloader()
+        self.parse_pool = ParsePool(PARSE_WORKERS)
+        self.deadline_seconds = FETCH_DEADLINE_SECONDS
+        self.profiler = RunProfiler()  # 由NewsAgent在每次运行时替换
+        self.feed_health: List[Dict[str, Any]] = []  # 最近一次运行各源的抓取结果，上报给RSS源注册表
+        self._pending_run: Optional[FetchRun] = None  # 尚未写入轮询状态的抓取结果，由commit_polling()写入
         # 设置用户代理
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
     
-    def fetch_all_sources(self, target_date: Optional[date] = None) -> List[RSSArticle]:
+    def fetch_all_sources(self, target_date: Optional[date] = None,
+                          source_names: Optional[List[str]] = None, adaptive: bool = False) -> List[RSSArticle]:
         """
         从所有RSS源抓取文章
         
+        轮询状态（ETag/Last-Modified、已见条目、下次轮询时间）不会立即保存：调用方在文章处理完成后
+        调用 commit_polling() 写入，失败时调用 discard_polling() 丢弃，避免下次条件请求返回304而漏掉
+        本次未处理完的文章。
+        
         Args:
             target_date: 目标日期，如果为None则抓取今天的文章
+            source_names: 只抓取这些名称的RSS源，None表示全部
+            adaptive: 只抓取到了下次轮询时间的源，并使用条件请求（304时不返回文章）
             
         Returns:
             抓取到的文章列表
@@ -57,143 +140,295 @@ class RSSFetcher:
         if target_date is None:
             target_date = date.today()
         
-        self.logger.info(f"开始抓取 {target_date} 的AI资讯")
+        sources = self.sources
+        if source_names is not None:
+            sources = [config for config in self.sources if config['name'] in source_names]
+        if adaptive:
+            due = [config for config in sources if self.poller.is_due(config['name'])]
+            self.profiler.increment('polls_skipped', len(sources) - len(due))
+            if len(due) < len(sources):
+                self.logger.info(f"自适应轮询: {len(due)}/{len(sources)} 个RSS源到期")
+            sources = due
         
-        all_articles = []
+        self.logger.info(f"开始抓取 {target_date} 的AI资讯")
+        run = FetchRun()
+        self.downloader.profiler = self.profiler
+        # 到截止时间仍未完成的源被放弃，返回已抓取的部分结果
+        deadline = time.monotonic() + self.deadline_seconds if self.deadline_seconds else None
         
-        for source_config in RSS_SOURCES:
-            try:
-                self.logger.info(f"正在抓取: {source_config['name']}")
-                articles = self._fetch_source(source_config, target_date)
-                all_articles.extend(articles)
-                self.logger.info(f"从 {source_config['name']} 抓取到 {len(articles)} 篇文章")
-                
+        if self.concurrency > 1 and len(sources) > 1:
+            unfinished = self._fetch_concurrently(run, sources, target_date, adaptive, deadline)
+        else:
+            unfinished = []
+            for index, source_config in enumerate(sources):
+                if deadline and time.monotonic() >= deadline:
+                    unfinished = [config['name'] for config in sources[index:]]
+                    break
+                self._fetch_source_safely(run, source_config, target_date, adaptive, deadline)
                 # 避免过于频繁的请求
-                time.sleep(1)
-                
-            except Exception as e:
-                self.logger.error(f"抓取 {source_config['name']} 失败: {str(e)}")
-                continue
+                if self.source_interval:
+                    time.sleep(self.source_interval)
         
+        if unfinished:
+            self.profiler.increment('sources_deadline_exceeded', len(unfinished))
+            self.logger.warning(f"抓取超过截止时间 {self.deadline_seconds}s，未完成的RSS源: {', '.join(unfinished)}")
+        
+        run.close()
+        self.feed_health = run.health
+        self._pending_run = run
+        
+        # 按源的配置顺序合并，与并发完成顺序无关
+        all_articles = [article for config in sources for article in run.articles.get(config['name'], [])]
         self.logger.info(f"总共抓取到 {len(all_articles)} 篇文章")
         return all_articles
     
-    def _fetch_source(self, source_config: Dict[str, str], target_date: date) -> List[RSSArticle]:
+    def commit_polling(self):
+        """把最近一次 fetch_all_sources 的结果写入并保存轮询状态（没有待写入的结果时不做任何事）"""
+        run, self._pending_run = self._pending_run, None
+        if run is None:
+            return
+        self._apply_poll_updates(run)
+        self.poller.save()
+    
+    def discard_polling(self):
+        """丢弃最近一次 fetch_all_sources 的轮询结果，下次仍使用上次成功运行的条件请求头"""
+        if self._pending_run is not None:
+            self.logger.info("本次运行未完成，不保存RSS轮询状态")
+        self._pending_run = None
+    
+    def _apply_poll_updates(self, run: FetchRun):
+        """把本次抓取各源的结果写入轮询状态"""
+        for feed_name, links, etag, last_modified, fetched_at in run.poll_updates:
+            if links is None:
+                self.poller.record_not_modified(feed_name, now=fetched_at)
+                continue
+            new_items = self.poller.record_fetch(feed_name, links, etag=etag, last_modified=last_modified, now=fetched_at)
+            self.profiler.increment('new_items', new_items, feed=feed_name)
+    
+    def _fetch_concurrently(self, run: FetchRun, sources: List[Dict[str, str]], target_date: date,
+                            conditional: bool, deadline: Optional[float]) -> List[str]:
         """
-        从单个RSS源抓取文章
+        并发抓取多个RSS源
+        
+        下载线程只负责下载，不等待解析；当前线程收集下载完成的文档，分块提交给解析进程池，
+        并在解析完成后构建文章、记录结果。下载和解析都只等待到截止时间为止。
         
         Args:
-            source_config: RSS源配置
+            run: 本次抓取的结果
+            sources: RSS源配置列表
             target_date: 目标日期
+            conditional: 是否使用条件请求
+            deadline: 整次抓取的截止时间（time.monotonic()）
             
         Returns:
-            从该源抓取到的文章列表
+            截止时间到时仍未完成的源名称
         """
-        articles = []
+        # 各源位于不同站点，并发抓取时不再等待抓取间隔
+        executor = ThreadPoolExecutor(max_workers=min(self.concurrency, len(sources)))
+        downloads: Dict[Future, Dict[str, str]] = {
+            executor.submit(self._download_source, run, config, conditional, deadline): config
+            for config in sources
+        }
+        parses: Dict[Future, List[FeedDownload]] = {}
         
-        try:
-            # 解析RSS feed
-            feed = feedparser.parse(source_config['url'])
-            
-            if feed.bozo:
-                self.logger.warning(f"RSS解析警告 {source_config['name']}: {feed.bozo_exception}")
+        while downloads or parses:
+            timeout = deadline - time.monotonic() + DEADLINE_GRACE_SECONDS if deadline else None
+            done, _ = wait(list(downloads) + list(parses), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break
             
-            # 处理每个条目
-            for entry in feed.entries[:MAX_ARTICLES_PER_SOURCE]:
+            ready = []
+            for future in done:
+                if future in downloads:
+                    source_config = downloads.pop(future)
+                    try:
+                        download = future.result()
+                    except Exception as e:
+                        self.logger.error(f"抓取 {source_config['name']} 失败: {str(e)}")
+                        continue
+                    if download is not None:
+                        ready.append(download)
+                    continue
+                
+                chunk = parses.pop(future)
                 try:
-                    article = self._parse_entry(entry, source_config, target_date)
-                    if article:
-                        articles.append(article)
+                    results = future.result()
                 except Exception as e:
-                    self.logger.error(f"解析条目失败: {str(e)}")
-                    continue
+                    results = [ParseResult([], None, str(e), 0.0)] * len(chunk)
+                for download, result in zip(chunk, results):
+                    try:
+                        self._complete_source(run, download, result)
+                    except Exception as e:
+                        self.logger.error(f"抓取 {download.source_config['name']} 失败: {str(e)}")
             
-        except Exception as e:
-            self.logger.error(f"获取RSS feed失败 {source_config['name']}: {str(e)}")
-            raise
+            for chunk in self.parse_pool.chunks(ready):
+                jobs = [(download.content, download.source_config['name'], target_date) for download in chunk]
+                parses[self.parse_pool.submit(jobs)] = chunk
         
-        return articles
+        # 下载受截止时间约束，未完成的任务很快结束，不在此等待；关闭后它们的结果被丢弃
+        run.close()
+        executor.shutdown(wait=False, cancel_futures=True)
+        for future in parses:
+            future.cancel()
+        pending = {config['name'] for config in downloads.values()}
+        pending.update(download.source_config['name'] for chunk in parses.values() for download in chunk)
+        return [config['name'] for config in sources if config['name'] in pending]
     
-    def _parse_entry(self, entry: Any, source_config: Dict[str, str], target_date: date) -> Optional[RSSArticle]:
+    def _fetch_source_safely(self, run: FetchRun, source_config: Dict[str, str], target_date: date,
+                             conditional: bool = False, deadline: Optional[float] = None) -> List[RSSArticle]:
         """
-        解析RSS条目
+        抓取单个RSS源，失败时记录日志并返回空列表
         
         Args:
-            entry: feedparser解析的条目
+            run: 本次抓取的结果
             source_config: RSS源配置
             target_date: 目标日期
+            conditional: 是否使用条件请求
+            deadline: 整次抓取的截止时间（time.monotonic()）
             
         Returns:
-            解析后的文章对象，如果不符合条件则返回None
+            从该源抓取到的文章列表
         """
         try:
-            # 解析发布时间
-            published_date = None
-            if hasattr(entry, 'published'):
-                try:
-                    published_date = date_parser.parse(entry.published)
-                except:
-                    pass
-            elif hasattr(entry, 'updated'):
-                try:
-                    published_date = date_parser.parse(entry.updated)
-                except:
-                    pass
-            elif hasattr(entry, 'published_parsed') and entry.published_parsed:
-                try:
-                    published_date = datetime(*entry.published_parsed[:6])
-                except:
-                    pass
-            
-            # 放宽时间检查：允许最近3天的文章
-            # 放宽时间检查：允许最近7天的文章
-            if published_date:
-                days_diff = abs((published_date.date() - target_date).days)
-                if days_diff > 7:  # 超过7天的文章才过滤掉
-                    return None
-            else:
-                # 如果没有时间信息，保留文章
-                self.logger.info(f"文章无发布时间信息，保留处理: {getattr(entry, 'title', 'Unknown')[:50]}")
-            
-            # 提取文章信息
-            title = getattr(entry, 'title', '').strip()
-            summary = getattr(entry, 'summary', '').strip()
-            link = getattr(entry, 'link', '')
-            
-            # 基本验证
-            if not title or not link:
-                return None
-            
-            # 提取内容
-            content = summary
-            if hasattr(entry, 'content') and entry.content:
-                # 获取第一个content条目
-                if isinstance(entry.content, list) and len(entry.content) > 0:
-                    content = entry.content[0].get('value', summary)
-                else:
-                    content = str(entry.content)
+            return self._fetch_source(run, source_config, target_date, conditional, deadline)
+        except Exception as e:
+            self.logger.error(f"抓取 {source_config['name']} 失败: {str(e)}")
+            return []
+    
+    def _fetch_source(self, run: FetchRun, source_config: Dict[str, str], target_date: date,
+                      conditional: bool = False, deadline: Optional[float] = None) -> List[RSSArticle]:
+        """
+        从单个RSS源抓取文章（下载后在当前线程等待解析结果）
+        
+        Args:
+            run: 本次抓取的结果，健康数据和轮询状态记录在其中
+            source_config: RSS源配置
+            target_date: 目标日期
+            conditional: 携带上次的ETag/Last-Modified，源未更新（304）时返回空列表
+            deadline: 整次抓取的截止时间（time.monotonic()），None表示不限制
             
-            # 提取标签
-            tags = []
-            if hasattr(entry, 'tags'):
-                tags = [tag.get('term', '') for tag in entry.tags if tag.get('term')]
+        Returns:
+            从该源抓取到的文章列表（时间窗口内的前MAX_ARTICLES_PER_SOURCE篇），抓取已结束时返回空列表
+        """
+        download = self._download_source(run, source_config, conditional, deadline)
+        if download is None:
+            return []
+        result, = self.parse_pool.submit([(download.content, source_config['name'], target_date)]).result()
+        return self._complete_source(run, download, result)
+    
+    def _download_source(self, run: FetchRun, source_config: Dict[str, str], conditional: bool = False,
+                         deadline: Optional[float] = None) -> Optional[FeedDownload]:
+        """
+        下载单个RSS源的文档
+        
+        Args:
+            run: 本次抓取的结果，304和下载失败记录在其中
+            source_config: RSS源配置
+            conditional: 携带上次的ETag/Last-Modified，源未更新（304）时返回None
+            deadline: 整次抓取的截止时间（time.monotonic()），None表示不限制
             
-            article = RSSArticle(
-                title=title,
-                summary=summary,
-                link=link,
-                source=source_config['name'],
-                source_description=source_config['description'],
-                published_date=published_date,
-                content=content,
-                tags=tags
+        Returns:
+            待解析的文档，源未更新时返回None
+        """
+        feed_name = source_config['name']
+        started = time.perf_counter()
+        self.logger.info(f"正在抓取: {feed_name}")
+        
+        try:
+            with self.profiler.stage('fetch', feed=feed_name):
+                headers = self.poller.conditional_headers(feed_name) if conditional else {}
+                response = self.downloader.get(
+                    self.session, source_config['url'], headers=headers, deadline=deadline, feed=feed_name
+                )
+                if response.status_code == 304:
+                    self.profiler.increment('not_modified', feed=feed_name)
+                    self._record(run, feed_name, started, 0, 0, poll_update=(
+                        feed_name, None, None, None, datetime.now(timezone.utc)
+                    ))
+                    return None
+                response.raise_for_status()
+            return FeedDownload(
+                source_config, response.content, started,
+                response.headers.get('ETag'), response.headers.get('Last-Modified')
             )
             
-            return article
-            
         except Exception as e:
-            self.logger.error(f"解析RSS条目失败: {str(e)}")
-            return None
+            self.logger.error(f"获取RSS feed失败 {feed_name}: {str(e)}")
+            self._record(run, feed_name, started, 0, 0, error=str(e))
+            raise
+    
+    def _complete_source(self, run: FetchRun, download: FeedDownload, result: ParseResult) -> List[RSSArticle]:
+        """
+        由解析结果构建文章，记录该源本次的抓取结果
+        
+        Args:
+            run: 本次抓取的结果
+            download: 已下载的文档
+            result: 该文档的解析结果
+            
+        Returns:
+            该源的文章列表，抓取已结束时返回空列表
+        """
+        source_config = download.source_config
+        feed_name = source_config['name']
+        size = len(download.content)
+        self.profiler.add_time('parse', result.seconds, feed=feed_name)
+        
+        if result.error:
+            self.logger.error(f"解析RSS feed失败 {feed_name}: {result.error}")
+            self._record(run, feed_name, download.started, size, 0, error=result.error)
+            raise ValueError(result.error)
+        if result.stream_error:
+            self.logger.warning(f"流式解析失败 {feed_name}: {result.stream_error}，已改用feedparser")
+            self.profiler.increment('feedparser_fallbacks', feed=feed_name)
+        articles = [self._build_article(record, source_config) for record in result.records]
+        
+        poll_update = (
+            feed_name, [article.link for article in articles],
+            download.etag, download.last_modified, datetime.now(timezone.utc)
+        )
+        if not self._record(run, feed_name, download.started, size, len(articles), articles, poll_update):
+            self.logger.warning(f"{feed_name} 在抓取截止时间之后才完成，结果已丢弃")
+            return []
+        self.profiler.increment('articles', len(articles), feed=feed_name)
+        self.logger.info(f"从 {feed_name} 抓取到 {len(articles)} 篇文章")
+        return articles
+    
+    def _record(self, run: FetchRun, feed_name: str, started: float, size: int, items: int,
+                articles: Optional[List[RSSArticle]] = None, poll_update: Optional[Tuple] = None,
+                error: Optional[str] = None) -> bool:
+        """记录单个源本次抓取的耗时、字节数、条目数和错误，抓取已结束时返回False"""
+        return run.add({
+            'name': feed_name,
+            'success': error is None,
+            'latency_ms': round((time.perf_counter() - started) * 1000),
+            'bytes': size,
+            'items': items,
+            'error': (error or '')[:500],
+        }, articles, poll_update)
+    
+    def _build_article(self, record: ArticleRecord, source_config: Dict[str, str]) -> RSSArticle:
+        """
+        由解析记录构建文章对象
+        
+        Args:
+            record: 解析阶段返回的记录
+            source_config: RSS源配置
+            
+        Returns:
+            文章对象
+        """
+        return RSSArticle(
+            title=record.title,
+            summary=record.summary,
+            link=record.link,
+            source=source_config['name'],
+            source_description=source_config['description'],
+            published_date=record.published_date,
+            content=record.content[:MAX_CONTENT_LENGTH],
+            tags=[intern_text(tag) for tag in record.tags],
+            cleaned_content=record.cleaned_content
+        )
     
     def fetch_source_by_name(self, source_name: str, target_date: Optional[date] = None) -> List[RSSArticle]:
         """
@@ -210,7 +445,7 @@ class RSSFetcher:
             target_date = date.today()
         
         source_config = None
-        for config in RSS_SOURCES:
+        for config in self.sources:
             if config['name'] == source_name:
                 source_config = config
                 break
@@ -218,7 +453,10 @@ class RSSFetcher:
         if not source_config:
             raise ValueError(f"未找到RSS源: {source_name}")
         
-        return self._fetch_source(source_config, target_date)
+        run = FetchRun()
+        articles = self._fetch_source(run, source_config, target_date)
+        self._apply_poll_updates(run)
+        return articles
     
     def get_available_sources(self) -> List[Dict[str, str]]:
         """
@@ -227,7 +465,7 @@ class RSSFetcher:
         Returns:
             RSS源配置列表
         """
-        return RSS_SOURCES.copy()
+        return list(self.sources)
 
 
 def setup_logging(level: str = "INFO"):
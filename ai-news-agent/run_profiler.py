@@ -0,0 +1,155 @@
+"""
+运行性能统计
+记录单次新闻收集任务的各阶段耗时、LLM调用延迟分位数、Token用量、重试和缓存命中次数，
+生成可机器读取的性能档案，便于逐次对比发现性能回退。
+"""
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from llm_telemetry import telemetry
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """计算分位数（线性插值），values为空时返回0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    """汇总延迟分布（毫秒）"""
+    return {
+        'count': len(values),
+        'p50': round(percentile(values, 50), 1),
+        'p90': round(percentile(values, 90), 1),
+        'p95': round(percentile(values, 95), 1),
+        'p99': round(percentile(values, 99), 1),
+        'max': round(max(values), 1) if values else 0.0,
+    }
+
+
+class RunProfiler:
+    """单次运行的性能统计器（线程安全）"""
+
+    def __init__(self, run_id: Optional[str] = None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self._finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+        self.stages: Dict[str, Dict[str, float]] = defaultdict(lambda: {'seconds': 0.0, 'count': 0})
+        self.feeds: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(int))
+        self.counters: Dict[str, int] = defaultdict(int)
+
+        self.llm_latencies: Dict[str, List[float]] = defaultdict(list)
+        self.llm_tokens: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {'calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0, 'cached_tokens': 0}
+        )
+        self.llm_tier_latencies: Dict[str, List[float]] = defaultdict(list)
+        self.llm_tier_tokens: Dict[str, int] = defaultdict(int)
+
+    @contextmanager
+    def stage(self, name: str, feed: Optional[str] = None):
+        """
+        统计代码块耗时
+
+        Args:
+            name: 阶段名称
+            feed: RSS源名称，指定时同时计入该源的分项统计
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start, feed)
+
+    def add_time(self, name: str, seconds: float, feed: Optional[str] = None):
+        """累加阶段耗时"""
+        with self._lock:
+            stage = self.stages[name]
+            stage['seconds'] += seconds
+            stage['count'] += 1
+            if feed:
+                self.feeds[feed][f'{name}_seconds'] += seconds
+
+    def increment(self, name: str, amount: int = 1, feed: Optional[str] = None):
+        """累加计数器"""
+        with self._lock:
+            self.counters[name] += amount
+            if feed:
+                self.feeds[feed][name] += amount
+
+    def record_llm_call(self, entry: Dict[str, Any]):
+        """接收LLM遥测记录（作为telemetry监听器使用）"""
+        with self._lock:
+            self.llm_latencies[entry.get('stage', 'unknown')].append(entry.get('latency_ms', 0.0))
+            tokens = self.llm_tokens[entry.get('model', 'unknown')]
+            tokens['calls'] += 1
+            tokens['prompt_tokens'] += entry.get('prompt_tokens', 0)
+            tokens['completion_tokens'] += entry.get('completion_tokens', 0)
+            tokens['total_tokens'] += entry.get('total_tokens', 0)
+            tokens['cached_tokens'] += entry.get('cached_tokens', 0)
+            if entry.get('tier'):
+                self.llm_tier_latencies[entry['tier']].append(entry.get('latency_ms', 0.0))
+                self.llm_tier_tokens[entry['tier']] += entry.get('total_tokens', 0)
+            self.counters['llm_calls'] += 1
+            self.counters['llm_retries'] += entry.get('retries', 0)
+            if entry.get('cache_hit'):
+                self.counters['llm_cache_hits'] += 1
+            if not entry.get('success', True):
+                self.counters['llm_failures'] += 1
+
+    def start(self):
+        """开始订阅LLM遥测"""
+        telemetry.add_listener(self.record_llm_call)
+
+    def finish(self):
+        """停止订阅LLM遥测并标记运行结束"""
+        telemetry.remove_listener(self.record_llm_call)
+        if self._finished_at is None:
+            self._finished_at = time.perf_counter()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出性能档案"""
+        end = self._finished_at if self._finished_at is not None else time.perf_counter()
+        with self._lock:
+            all_latencies = [v for values in self.llm_latencies.values() for v in values]
+            return {
+                'run_id': self.run_id,
+                'started_at': self.started_at.isoformat(),
+                'wall_time_seconds': round(end - self._start, 3),
+                'stages': {
+                    name: {
+                        'seconds': round(stage['seconds'], 3),
+                        'count': stage['count'],
+                        'avg_ms': round(stage['seconds'] * 1000 / stage['count'], 1) if stage['count'] else 0.0,
+                    }
+                    for name, stage in self.stages.items()
+                },
+                'feeds': {
+                    feed: {key: round(value, 3) if isinstance(value, float) else value for key, value in stats.items()}
+                    for feed, stats in self.feeds.items()
+                },
+                'llm': {
+                    'latency_ms': latency_summary(all_latencies),
+                    'latency_ms_by_stage': {
+                        stage: latency_summary(values) for stage, values in self.llm_latencies.items()
+                    },
+                    'tokens_by_model': {model: dict(tokens) for model, tokens in self.llm_tokens.items()},
+                    'by_tier': {
+                        tier: {'latency_ms': latency_summary(values), 'total_tokens': self.llm_tier_tokens[tier]}
+                        for tier, values in self.llm_tier_latencies.items()
+                    },
+                },
+                'counters': dict(self.counters),
+            }
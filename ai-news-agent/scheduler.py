@@ -0,0 +1,354 @@
+"""
+定时抓取调度器
+按cron表达式定时触发新闻收集，支持按RSS源单独配置的调度、随机抖动、防止重叠运行，
+以及服务停机期间错过的任务在重启后补跑（多次错过只补跑一次）。
+所有任务在同一个调度线程中依次执行，收集任务不会并发堆积。
+"""
+import json
+import logging
+import random
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+import pytz
+
+from config import (
+    TIMEZONE, SCHEDULE_CRON, SOURCE_SCHEDULES, SCHEDULER_JITTER_SECONDS, SCHEDULER_CATCHUP_HOURS,
+    SCHEDULER_STATE_FILE, ADAPTIVE_POLLING_ENABLED, POLL_CRON
+)
+
+logger = logging.getLogger(__name__)
+
+# 任务被占用（已有收集任务在运行）时的重试间隔（秒）
+BUSY_RETRY_SECONDS = 60
+# 调度线程最长休眠时间（秒）
+MAX_SLEEP_SECONDS = 30
+
+
+def _parse_field(expr: str, low: int, high: int) -> Set[int]:
+    """解析cron表达式的单个字段（支持 *、列表、范围和步长）"""
+    values = set()
+    for part in expr.split(','):
+        part, _, step = part.partition('/')
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = (int(x) for x in part.split('-', 1))
+        else:
+            start = end = int(part)
+            if step:
+                end = high
+        if start < low or end > high or start > end:
+            raise ValueError(f"cron字段超出范围: {expr}")
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return values
+
+
+class CronTrigger:
+    """
+    五字段cron触发器（分 时 日 月 周），周字段0和7均表示周日
+
+    Args:
+        expression: cron表达式，如 "0 9,14,18 * * *"
+        tz: 表达式所在时区
+    """
+
+    def __init__(self, expression: str, tz: str = TIMEZONE):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron表达式应包含5个字段: {expression}")
+        self.expression = expression
+        self.tz = pytz.timezone(tz)
+        self.minutes = sorted(_parse_field(fields[0], 0, 59))
+        self.hours = sorted(_parse_field(fields[1], 0, 23))
+        self.days = _parse_field(fields[2], 1, 31)
+        self.months = _parse_field(fields[3], 1, 12)
+        self.weekdays = {day % 7 for day in _parse_field(fields[4], 0, 7)}
+        self._any_day = fields[2] == '*'
+        self._any_weekday = fields[4] == '*'
+
+    def _day_matches(self, day: datetime) -> bool:
+        if day.month not in self.months:
+            return False
+        day_match = day.day in self.days
+        weekday_match = (day.weekday() + 1) % 7 in self.weekdays
+        # 与cron一致：日和周都有限定时满足其一即可
+        if self._any_day or self._any_weekday:
+            return day_match and weekday_match
+        return day_match or weekday_match
+
+    def next_after(self, moment: datetime) -> datetime:
+        """
+        计算严格晚于moment的下一个触发时间
+
+        Args:
+            moment: 带时区的时间
+
+        Returns:
+            下一个触发时间（表达式所在时区）
+        """
+        local = moment.astimezone(self.tz)
+        day = local.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+        for _ in range(366 * 5):
+            if self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = self.tz.localize(day.replace(hour=hour, minute=minute))
+                        if candidate > moment:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError(f"cron表达式没有可用的触发时间: {self.expression}")
+
+
+@dataclass
+class ScheduledJob:
+    """
+    定时任务
+
+    Args:
+        name: 任务名称（用于持久化上次运行时间）
+        trigger: 触发器
+        func: 任务函数，接收任务本身，返回False表示已有任务在运行、需要稍后重试；执行失败时抛出异常
+        sources: 限定抓取的RSS源名称，None表示默认源集合（见job_sources）
+        jitter_seconds: 触发时间的随机延后上限
+    """
+    name: str
+    trigger: CronTrigger
+    func: Callable[['ScheduledJob'], bool]
+    sources: Optional[List[str]] = None
+    jitter_seconds: float = SCHEDULER_JITTER_SECONDS
+    next_run: Optional[datetime] = None
+    last_run: Optional[datetime] = None
+    pending: bool = False
+    runs: int = field(default=0)
+    failures: int = field(default=0)
+
+    def schedule_next(self, after: datetime):
+        """计算下一次运行时间（含随机抖动）"""
+        fire_time = self.trigger.next_after(after)
+        self.next_run = fire_time + timedelta(seconds=random.uniform(0, self.jitter_seconds))
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            'name': self.name,
+            'cron': self.trigger.expression,
+            'sources': self.sources,
+            'next_run': self.next_run.isoformat() if self.next_run else None,
+            'last_run': self.last_run.isoformat() if self.last_run else None,
+            'pending': self.pending,
+            'runs': self.runs,
+            'failures': self.failures,
+        }
+
+
+class Scheduler:
+    """
+    调度器
+
+    Args:
+        jobs: 定时任务列表
+        state_file: 保存各任务上次运行时间的文件，用于重启后补跑
+        catchup_hours: 只补跑错过时间在该小时数以内的任务，0表示不补跑
+    """
+
+    def __init__(self, jobs: List[ScheduledJob], state_file: str = SCHEDULER_STATE_FILE,
+                 catchup_hours: float = SCHEDULER_CATCHUP_HOURS):
+        self.jobs = jobs
+        self.state_file = Path(state_file)
+        self.catchup_hours = catchup_hours
+        self.tz = pytz.timezone(TIMEZONE)
+        self._lock = threading.Lock()  # 保护jobs，sync_jobs可能在其他线程中调用
+        self._restored = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _now(self) -> datetime:
+        return datetime.now(self.tz)
+
+    def _load_state(self) -> Dict[str, str]:
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取调度状态失败: {str(e)}")
+            return {}
+
+    def _save_state(self):
+        # 保留暂时不在任务列表中的任务（如RSS源被隔离）的上次运行时间
+        state = self._load_state()
+        with self._lock:
+            state.update({job.name: job.last_run.isoformat() for job in self.jobs if job.last_run})
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_file.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding='utf-8')
+            tmp_path.replace(self.state_file)
+        except OSError as e:
+            logger.warning(f"保存调度状态失败: {str(e)}")
+
+    def _restore(self):
+        """恢复上次运行时间，并标记停机期间错过的任务"""
+        now = self._now()
+        state = self._load_state()
+        with self._lock:
+            for job in self.jobs:
+                self._restore_job(job, state, now)
+            self._restored = True
+    
+    def _restore_job(self, job: ScheduledJob, state: Dict[str, str], now: datetime):
+        """计算任务的下次运行时间，恢复上次运行时间并判断是否需要补跑"""
+        job.schedule_next(now)
+        if job.name not in state:
+            return
+        job.last_run = datetime.fromisoformat(state[job.name])
+        missed = job.trigger.next_after(job.last_run)
+        if missed <= now and self.catchup_hours and now - missed <= timedelta(hours=self.catchup_hours):
+            logger.info(f"任务 {job.name} 在 {missed.isoformat()} 错过运行，立即补跑")
+            job.pending = True
+    
+    def sync_jobs(self, jobs: List[ScheduledJob]):
+        """
+        按新的任务列表更新调度（RSS源列表变化后重新生成按源调度的任务时调用）
+        
+        同名且cron表达式未变的任务保留原有的运行状态；调度已开始时，新增的任务立即计算下次运行时间。
+        
+        Args:
+            jobs: 新的任务列表
+        """
+        state = self._load_state()
+        now = self._now()
+        with self._lock:
+            current = {job.name: job for job in self.jobs}
+            merged = []
+            for job in jobs:
+                existing = current.get(job.name)
+                if existing and existing.trigger.expression == job.trigger.expression:
+                    existing.func, existing.sources = job.func, job.sources
+                    merged.append(existing)
+                    continue
+                if self._restored:
+                    self._restore_job(job, state, now)
+                    logger.info(f"新增定时任务 {job.name} ({job.trigger.expression})，下次运行: {job.next_run.isoformat()}")
+                merged.append(job)
+            for name in current.keys() - {job.name for job in merged}:
+                logger.info(f"移除定时任务: {name}")
+            self.jobs = merged
+
+    def run_pending(self):
+        """执行所有到期或等待补跑的任务（依次执行）"""
+        with self._lock:
+            jobs = list(self.jobs)
+        for job in jobs:
+            if self._stop.is_set():
+                return
+            now = self._now()
+            if job.next_run and now >= job.next_run:
+                job.pending = True
+                job.schedule_next(now)
+            if not job.pending:
+                continue
+
+            logger.info(f"开始执行定时任务: {job.name}")
+            try:
+                started = job.func(job)
+            except Exception as e:
+                # 失败的运行不记为上次运行时间，服务重启时仍在补跑范围内
+                logger.error(f"定时任务 {job.name} 执行失败: {str(e)}", exc_info=True)
+                job.pending = False
+                job.failures += 1
+                continue
+            if started is False:
+                # 已有收集任务在运行，稍后重试而不是排队叠加
+                logger.info(f"已有收集任务在运行，{BUSY_RETRY_SECONDS}秒后重试定时任务: {job.name}")
+                job.next_run = min(job.next_run, self._now() + timedelta(seconds=BUSY_RETRY_SECONDS))
+                continue
+
+            job.pending = False
+            job.runs += 1
+            job.last_run = now
+            self._save_state()
+
+    def _loop(self):
+        self._restore()
+        for job in self.status():
+            logger.info(f"定时任务 {job['name']} ({job['cron']}) 下次运行: {job['next_run']}")
+        while not self._stop.is_set():
+            self.run_pending()
+            with self._lock:
+                next_runs = [job.next_run for job in self.jobs if job.next_run]
+            wait = min((run - self._now()).total_seconds() for run in next_runs) if next_runs else MAX_SLEEP_SECONDS
+            self._stop.wait(min(max(wait, 1), MAX_SLEEP_SECONDS))
+
+    def start(self):
+        """在后台线程中启动调度"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='news-scheduler', daemon=True)
+        self._thread.start()
+
+    def run_forever(self):
+        """在当前线程中运行调度，直到stop被调用或收到KeyboardInterrupt"""
+        self._stop.clear()
+        try:
+            self._loop()
+        except KeyboardInterrupt:
+            self.stop()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self) -> List[Dict[str, object]]:
+        """各任务的调度状态"""
+        with self._lock:
+            return [job.to_dict() for job in self.jobs]
+
+
+def build_jobs(func: Callable[[ScheduledJob], bool], source_names: List[str]) -> List[ScheduledJob]:
+    """
+    根据配置生成定时任务：SOURCE_SCHEDULES中单独配置的源各自一个任务，其余源共用SCHEDULE_CRON；
+    开启自适应轮询时另按POLL_CRON检查到期的源
+
+    Args:
+        func: 任务函数
+        source_names: 全部RSS源名称
+
+    Returns:
+        定时任务列表
+    """
+    jobs = []
+    if any(name not in SOURCE_SCHEDULES for name in source_names):
+        # 默认任务的源在运行时解析，RSS源注册表中新增的源无需重建任务
+        jobs.append(ScheduledJob('daily_collection', CronTrigger(SCHEDULE_CRON), func))
+        if ADAPTIVE_POLLING_ENABLED:
+            jobs.append(ScheduledJob('feed_poll', CronTrigger(POLL_CRON), func, jitter_seconds=0))
+    for name, expression in SOURCE_SCHEDULES.items():
+        if name not in source_names:
+            # RSS源注册表中新增该源后，下次刷新源列表时由Scheduler.sync_jobs加入
+            logger.info(f"SOURCE_SCHEDULES中的RSS源当前不存在，暂不调度: {name}")
+            continue
+        jobs.append(ScheduledJob(f'source:{name}', CronTrigger(expression), func, sources=[name]))
+    return jobs
+
+
+def job_sources(job: ScheduledJob, source_names: List[str]) -> Optional[List[str]]:
+    """
+    任务本次运行应抓取的RSS源
+
+    Args:
+        job: 定时任务
+        source_names: 当前全部RSS源名称
+
+    Returns:
+        单独调度的任务返回其自身的源；默认任务返回SOURCE_SCHEDULES以外的源，没有需要排除的源时返回None（全部）
+    """
+    if job.sources is not None:
+        return job.sources
+    if not any(name in SOURCE_SCHEDULES for name in source_names):
+        return None
+    return [name for name in source_names if name not in SOURCE_SCHEDULES]
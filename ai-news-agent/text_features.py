@@ -0,0 +1,197 @@
+"""
+文本特征提取
+基于哈希技巧的n-gram特征（无需维护词表），中文按字二元组、英文按词一元/二元组切分，
+输出CSR格式的稀疏矩阵，供本地相关性过滤、分类和抽取式摘要使用。
+"""
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]+')
+_TOKEN_RE = re.compile(r'[\u4e00-\u9fff]+|[a-z0-9][a-z0-9+#\-]*')
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    切分文本为n-gram：英文词一元组和相邻词二元组，中文连续片段的字二元组
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        n-gram列表（保留重复项，用于计算词频）
+    """
+    tokens: List[str] = []
+    previous_word = None
+    for piece in _TOKEN_RE.findall(text.lower()):
+        if _CJK_RE.match(piece):
+            previous_word = None
+            if len(piece) == 1:
+                tokens.append(piece)
+            else:
+                tokens.extend(piece[i:i + 2] for i in range(len(piece) - 1))
+        else:
+            tokens.append(piece)
+            if previous_word is not None:
+                tokens.append(f'{previous_word} {piece}')
+            previous_word = piece
+    return tokens
+
+
+def hash_token(token: str, n_features: int) -> int:
+    """
+    稳定的n-gram哈希（不受PYTHONHASHSEED影响，保证模型文件可跨进程复用）
+
+    CRC32是线性的，相近的字符串低位容易相同，因此先乘以黄金分割常数再取高位映射到哈希空间。
+    """
+    mixed = (zlib.crc32(token.encode('utf-8')) * 2654435761) & 0xFFFFFFFF
+    return (mixed * n_features) >> 32
+
+
+class SparseMatrix:
+    """最小化的CSR稀疏矩阵，只实现线性模型和相似度计算需要的运算"""
+
+    def __init__(self, data: np.ndarray, indices: np.ndarray, indptr: np.ndarray, n_features: int):
+        self.data = data
+        self.indices = indices
+        self.indptr = indptr
+        self.shape = (len(indptr) - 1, n_features)
+
+    @property
+    def row_ids(self) -> np.ndarray:
+        """每个非零元素所在的行号"""
+        return np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+
+    def dot(self, weights: np.ndarray) -> np.ndarray:
+        """
+        与稠密权重相乘
+
+        Args:
+            weights: 形状为 (n_features,) 或 (n_features, k) 的权重
+
+        Returns:
+            形状为 (n_rows,) 或 (n_rows, k) 的结果
+        """
+        rows = self.row_ids
+        if weights.ndim == 1:
+            return np.bincount(rows, weights=self.data * weights[self.indices], minlength=self.shape[0])
+        products = self.data[:, None] * weights[self.indices]
+        return np.stack([
+            np.bincount(rows, weights=products[:, k], minlength=self.shape[0])
+            for k in range(weights.shape[1])
+        ], axis=1)
+
+    def transpose_dot(self, values: np.ndarray) -> np.ndarray:
+        """
+        计算 X^T · values（用于梯度计算）
+
+        Args:
+            values: 形状为 (n_rows,) 或 (n_rows, k) 的数组
+
+        Returns:
+            形状为 (n_features,) 或 (n_features, k) 的结果
+        """
+        rows = self.row_ids
+        if values.ndim == 1:
+            return np.bincount(self.indices, weights=self.data * values[rows], minlength=self.shape[1])
+        return np.stack([
+            np.bincount(self.indices, weights=self.data * values[rows, k], minlength=self.shape[1])
+            for k in range(values.shape[1])
+        ], axis=1)
+
+    def take_rows(self, rows: np.ndarray) -> 'SparseMatrix':
+        """按行号抽取子矩阵"""
+        starts = self.indptr[rows]
+        lengths = self.indptr[rows + 1] - starts
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        positions = np.arange(indptr[-1]) - np.repeat(indptr[:-1], lengths) + np.repeat(starts, lengths)
+        return SparseMatrix(self.data[positions], self.indices[positions], indptr, self.shape[1])
+
+    def to_compact_dense(self) -> np.ndarray:
+        """
+        转换为只包含出现过的特征列的稠密矩阵（用于少量行之间的相似度计算）
+        """
+        columns, inverse = np.unique(self.indices, return_inverse=True)
+        dense = np.zeros((self.shape[0], len(columns)))
+        dense[self.row_ids, inverse] = self.data
+        return dense
+
+
+class HashingVectorizer:
+    """
+    哈希n-gram向量化器
+
+    Args:
+        n_features: 哈希空间大小
+        sublinear_tf: 是否使用 1+log(tf) 代替原始词频
+        binary: 只记录n-gram是否出现
+        normalize: 是否对每行做L2归一化
+    """
+
+    def __init__(self, n_features: int = 2 ** 18, sublinear_tf: bool = True,
+                 binary: bool = False, normalize: bool = True):
+        self.n_features = n_features
+        self.sublinear_tf = sublinear_tf
+        self.binary = binary
+        self.normalize = normalize
+        self.idf: Optional[np.ndarray] = None
+        self._hash_cache: Dict[str, int] = {}
+
+    def _hash_tokens(self, tokens: Iterable[str]) -> np.ndarray:
+        cache = self._hash_cache
+        if len(cache) > 500000:
+            cache.clear()
+        hashed = []
+        for token in tokens:
+            index = cache.get(token)
+            if index is None:
+                index = cache[token] = hash_token(token, self.n_features)
+            hashed.append(index)
+        return np.array(hashed, dtype=np.int64)
+
+    def transform(self, texts: List[str]) -> SparseMatrix:
+        """将文本批量转换为稀疏特征矩阵"""
+        all_indices, all_data = [], []
+        indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+        for row, text in enumerate(texts):
+            hashed = self._hash_tokens(tokenize(text or ''))
+            indices, counts = np.unique(hashed, return_counts=True)
+            all_indices.append(indices)
+            all_data.append(counts.astype(np.float64))
+            indptr[row + 1] = indptr[row] + len(indices)
+
+        indices = np.concatenate(all_indices) if all_indices else np.array([], dtype=np.int64)
+        data = np.concatenate(all_data) if all_data else np.array([], dtype=np.float64)
+        if self.binary:
+            data = np.ones_like(data)
+        elif self.sublinear_tf:
+            data = 1.0 + np.log(data)
+        if self.idf is not None:
+            data = data * self.idf[indices]
+
+        matrix = SparseMatrix(data, indices, indptr, self.n_features)
+        if self.normalize and len(data):
+            norms = np.sqrt(np.bincount(matrix.row_ids, weights=data ** 2, minlength=len(texts)))
+            norms[norms == 0] = 1.0
+            matrix.data = data / norms[matrix.row_ids]
+        return matrix
+
+    def fit_idf(self, texts: List[str]) -> 'HashingVectorizer':
+        """根据语料计算IDF权重（之后的transform结果为TF-IDF）"""
+        self.idf = None
+        matrix = self.transform(texts)
+        document_frequency = np.bincount(matrix.indices, minlength=self.n_features)
+        self.idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1.0
+        return self
+
+    def hash_terms(self, terms: Iterable[str]) -> np.ndarray:
+        """
+        返回一组词语对应的哈希下标（去重）；英文词组只取二元组，避免其中的单个常见词被单独匹配
+        """
+        grams = []
+        for term in terms:
+            tokens = tokenize(term)
+            grams.extend([token for token in tokens if ' ' in token] or tokens)
+        return np.unique(self._hash_tokens(grams))
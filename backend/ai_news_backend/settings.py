@@ -177,9 +177,36 @@ SILICONFLOW_API_KEY = os.getenv('SILICONFLOW_API_KEY')
 SILICONFLOW_BASE_URL = os.getenv('SILICONFLOW_BASE_URL', 'https://api.siliconflow.cn/v1')
 MODEL_NAME = os.getenv('MODEL_NAME', 'Qwen/Qwen2.5-7B-Instruct')
 
+# AI客户端连接池配置
+AI_CLIENT_IDLE_TIMEOUT = int(os.getenv('AI_CLIENT_IDLE_TIMEOUT', '600'))  # 空闲客户端回收时间（秒）
+AI_CLIENT_POOL_SIZE = int(os.getenv('AI_CLIENT_POOL_SIZE', '64'))  # 最多缓存的客户端数量
+
+# 聊天上下文配置
+CHAT_CONTEXT_SUMMARY_ENABLED = os.getenv('CHAT_CONTEXT_SUMMARY_ENABLED', 'False').lower() == 'true'  # 是否将早期对话压缩为滚动摘要
+CHAT_CONTEXT_SUMMARY_MAX_TOKENS = int(os.getenv('CHAT_CONTEXT_SUMMARY_MAX_TOKENS', '512'))
+CHAT_CONFIG_CACHE_TIMEOUT = int(os.getenv('CHAT_CONFIG_CACHE_TIMEOUT', '300'))  # 用户AI配置缓存时间（秒）
+CHAT_AI_TIMEOUT = float(os.getenv('CHAT_AI_TIMEOUT')) if os.getenv('CHAT_AI_TIMEOUT') else None  # 聊天请求AI超时时间（秒），默认不限制
+CHAT_LOG_SAMPLE_RATE = float(os.getenv('CHAT_LOG_SAMPLE_RATE', '0.0'))  # 记录完整对话内容的采样率（0-1），DEBUG级别下始终记录
+CHAT_STREAM_INCLUDE_USAGE = os.getenv('CHAT_STREAM_INCLUDE_USAGE', 'True').lower() == 'true'  # 流式请求是否要求服务端返回usage（不支持的提供商会自动关闭）
+
+# AI提供商网关：每个提供商的速率和并发上限在AIProvider中配置，以下为全局策略
+AI_GATEWAY_MAX_RETRIES = int(os.getenv('AI_GATEWAY_MAX_RETRIES', '2'))  # 429或服务端故障时的重试次数
+AI_GATEWAY_RETRY_DELAY = float(os.getenv('AI_GATEWAY_RETRY_DELAY', '2.0'))  # 重试基础退避时间（秒）
+AI_GATEWAY_LATENCY_TARGET = float(os.getenv('AI_GATEWAY_LATENCY_TARGET', '60.0'))  # 超过该耗时（秒）时收缩并发
+AI_GATEWAY_FAILURE_THRESHOLD = int(os.getenv('AI_GATEWAY_FAILURE_THRESHOLD', '5'))  # 连续失败多少次后熔断
+AI_GATEWAY_RECOVERY_TIMEOUT = float(os.getenv('AI_GATEWAY_RECOVERY_TIMEOUT', '30.0'))  # 熔断后多久尝试恢复（秒）
+
 # AI新闻代理配置
 NEWS_AGENT_BASE_URL = os.getenv('NEWS_AGENT_BASE_URL', 'http://localhost:5001')
 
+# RSS源注册表：连续失败或持续缓慢的源自动隔离，隔离期按指数退避，到期后重新探测
+FEED_QUARANTINE_FAILURES = int(os.getenv('FEED_QUARANTINE_FAILURES', '3'))  # 连续失败多少次后隔离
+FEED_SLOW_LATENCY_MS = float(os.getenv('FEED_SLOW_LATENCY_MS', '20000'))  # 平均抓取耗时超过该值（毫秒）视为缓慢
+FEED_SLOW_MIN_FETCHES = int(os.getenv('FEED_SLOW_MIN_FETCHES', '5'))  # 至少抓取多少次后才按耗时判断
+FEED_QUARANTINE_BASE_MINUTES = float(os.getenv('FEED_QUARANTINE_BASE_MINUTES', '30'))  # 首次隔离时长
+FEED_QUARANTINE_MAX_MINUTES = float(os.getenv('FEED_QUARANTINE_MAX_MINUTES', '10080'))  # 隔离时长上限（7天）
+FEED_PROBE_WINDOW_MINUTES = float(os.getenv('FEED_PROBE_WINDOW_MINUTES', '15'))  # 探测被领取后，在此时间内不再交给其他抓取任务
+
 # JWT配置
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
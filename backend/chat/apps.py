@@ -5,3 +5,6 @@ class ChatConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chat'
     verbose_name = 'AI聊天'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
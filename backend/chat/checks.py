@@ -0,0 +1,29 @@
+"""
+聊天应用系统检查
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.core.checks import Error, register
+
+GATEWAY_FILE = Path(__file__).resolve().parent / 'provider_gateway.py'
+AGENT_GATEWAY_FILE = Path(settings.BASE_DIR).parent / 'ai-news-agent' / 'provider_gateway.py'
+
+
+@register()
+def check_provider_gateway_in_sync(app_configs, **kwargs):
+    """
+    检查 chat/provider_gateway.py 与 ai-news-agent/provider_gateway.py 内容一致
+
+    只在完整代码仓库中（两份文件都存在时）检查；单独构建的后端镜像中没有 ai-news-agent 目录，跳过检查。
+    """
+    if not AGENT_GATEWAY_FILE.is_file():
+        return []
+    if GATEWAY_FILE.read_bytes() == AGENT_GATEWAY_FILE.read_bytes():
+        return []
+    return [Error(
+        '提供商网关的两份副本不一致',
+        hint=f'请将 {AGENT_GATEWAY_FILE} 的修改同步到 {GATEWAY_FILE}（两份文件内容应完全相同）',
+        obj='chat.provider_gateway',
+        id='chat.E001',
+    )]
@@ -0,0 +1,244 @@
+"""
+OpenAI客户端连接池
+
+按 (API地址, API密钥哈希) 缓存进程级共享的 OpenAI 客户端，复用 HTTP keep-alive 连接，
+避免每次请求都重新建立连接池和 TLS 握手。空闲过久的客户端会被回收，
+AIProvider 更新或删除时由信号处理器使其失效。
+
+客户端通过 lease()/alease() 借出，借出期间（包括整个流式输出过程）不会被关闭：
+失效、超出容量或空闲回收只把客户端移出注册表，最后一个借用结束后才关闭。
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
+
+import httpx
+import openai
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _hash_api_key(api_key: str) -> str:
+    """计算API密钥的哈希，避免明文密钥作为缓存键常驻内存"""
+    return hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()
+
+
+class _PooledClient:
+    """注册表中的客户端及其借用状态（由 OpenAIClientPool 的锁保护）"""
+
+    __slots__ = ('client', 'loop', 'last_used', 'leases', 'retired')
+
+    def __init__(self, client, loop: Optional[asyncio.AbstractEventLoop], now: float):
+        self.client = client
+        self.loop = loop  # 异步客户端所属的事件循环，同步客户端为None
+        self.last_used = now
+        self.leases = 0
+        self.retired = False
+
+
+class OpenAIClientPool:
+    """进程级 OpenAI 客户端注册表"""
+
+    def __init__(self, idle_timeout: float = 600, max_clients: int = 64,
+                 max_connections: int = 20, max_keepalive_connections: int = 10):
+        self.idle_timeout = idle_timeout
+        self.max_clients = max_clients
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        # key -> 同步客户端
+        self._clients: "OrderedDict[Tuple[str, str], _PooledClient]" = OrderedDict()
+        # (事件循环ID, key) -> 异步客户端；异步客户端的连接绑定在创建它的事件循环上
+        self._async_clients: "OrderedDict[Tuple[int, str, str], _PooledClient]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(api_base_url: str, api_key: str) -> Tuple[str, str]:
+        """生成缓存键"""
+        return (api_base_url or '').rstrip('/'), _hash_api_key(api_key)
+
+    @contextmanager
+    def lease(self, api_base_url: str, api_key: str, timeout: Optional[float] = None) -> Iterator[openai.OpenAI]:
+        """
+        借出（或创建）共享客户端，with块结束前客户端不会被关闭
+
+        Args:
+            api_base_url: API基础地址
+            api_key: API密钥
+            timeout: 本次调用的超时时间，None表示不限制；不同超时共享同一连接池
+        """
+        key = self.make_key(api_base_url, api_key)
+        entry = self._acquire(self._clients, key, None, lambda: self._create_client(api_base_url, api_key))
+        try:
+            # with_options 复制客户端配置，但复用同一个底层 HTTP 连接池
+            yield entry.client.with_options(timeout=timeout)
+        finally:
+            self._release(entry)
+
+    @asynccontextmanager
+    async def alease(self, api_base_url: str, api_key: str,
+                     timeout: Optional[float] = None) -> AsyncIterator[openai.AsyncOpenAI]:
+        """
+        借出（或创建）当前事件循环共享的异步客户端，async with块结束前客户端不会被关闭
+
+        必须在事件循环中调用；同一事件循环内的请求复用同一个连接池。
+        """
+        loop = asyncio.get_running_loop()
+        key = (id(loop),) + self.make_key(api_base_url, api_key)
+        entry = self._acquire(self._async_clients, key, loop, lambda: self._create_async_client(api_base_url, api_key))
+        try:
+            yield entry.client.with_options(timeout=timeout)
+        finally:
+            self._release(entry)
+
+    def invalidate(self, api_base_url: str, api_key: str):
+        """使指定地址和密钥的客户端（包括异步客户端）失效，借出中的客户端在归还后关闭"""
+        key = self.make_key(api_base_url, api_key)
+        with self._lock:
+            removed = []
+            if key in self._clients:
+                removed.append(self._clients.pop(key))
+            for async_key in [async_key for async_key in self._async_clients if async_key[1:] == key]:
+                removed.append(self._async_clients.pop(async_key))
+            to_close = self._retire(removed)
+        self._close_all(to_close)
+        if removed:
+            logger.info(f"AI客户端已失效: {key[0]}")
+
+    def clear(self):
+        """清空所有客户端，借出中的客户端在归还后关闭"""
+        with self._lock:
+            removed = list(self._clients.values()) + list(self._async_clients.values())
+            self._clients.clear()
+            self._async_clients.clear()
+            to_close = self._retire(removed)
+        self._close_all(to_close)
+
+    def _acquire(self, clients: OrderedDict, key: tuple, loop: Optional[asyncio.AbstractEventLoop],
+                 factory) -> _PooledClient:
+        """从注册表借出客户端，不存在时创建"""
+        now = time.monotonic()
+        with self._lock:
+            to_close = self._retire(self._pop_idle(clients, now))
+
+            entry = clients.get(key)
+            if entry and entry.loop is loop:
+                clients.move_to_end(key)
+            else:
+                if entry:
+                    # 事件循环ID被新的事件循环复用
+                    to_close += self._retire([clients.pop(key)])
+                entry = _PooledClient(factory(), loop, now)
+                clients[key] = entry
+                logger.info(f"创建新的{'异步' if loop else ''}AI客户端连接池: {key[-2]}")
+            entry.leases += 1
+            entry.last_used = now
+
+            # 超出容量时淘汰最久未使用的客户端
+            while len(clients) > self.max_clients:
+                _, old_entry = clients.popitem(last=False)
+                to_close += self._retire([old_entry])
+        self._close_all(to_close)
+        return entry
+
+    def _release(self, entry: _PooledClient):
+        """归还借出的客户端，已移出注册表且没有其他借用时关闭"""
+        with self._lock:
+            entry.leases -= 1
+            entry.last_used = time.monotonic()
+            to_close = [entry] if entry.retired and entry.leases == 0 else []
+        self._close_all(to_close)
+
+    def _pop_idle(self, clients: OrderedDict, now: float) -> List[_PooledClient]:
+        """移出空闲超时（且未借出）或所属事件循环已关闭的客户端（调用方需持有锁）"""
+        expired = [
+            key for key, entry in clients.items()
+            if (entry.leases == 0 and now - entry.last_used > self.idle_timeout)
+            or (entry.loop is not None and entry.loop.is_closed())
+        ]
+        for key in expired:
+            logger.info(f"回收空闲AI客户端: {key[-2]}")
+        return [clients.pop(key) for key in expired]
+
+    @staticmethod
+    def _retire(entries: List[_PooledClient]) -> List[_PooledClient]:
+        """标记已移出注册表的客户端，返回可以立即关闭（未借出）的客户端（调用方需持有锁）"""
+        for entry in entries:
+            entry.retired = True
+        return [entry for entry in entries if entry.leases == 0]
+
+    def _close_all(self, entries: List[_PooledClient]):
+        """关闭客户端（在锁外调用）"""
+        for entry in entries:
+            if entry.loop is None:
+                self._close(entry.client)
+            else:
+                self._close_async(entry.client, entry.loop)
+
+    def _create_client(self, api_base_url: str, api_key: str) -> openai.OpenAI:
+        http_client = openai.DefaultHttpxClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.idle_timeout
+            )
+        )
+        return openai.OpenAI(
+            api_key=api_key,
+            base_url=api_base_url,
+            timeout=None,
+            http_client=http_client
+        )
+
+    def _create_async_client(self, api_base_url: str, api_key: str) -> openai.AsyncOpenAI:
+        http_client = openai.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.idle_timeout
+            )
+        )
+        return openai.AsyncOpenAI(
+            api_key=api_key,
+            base_url=api_base_url,
+            timeout=None,
+            http_client=http_client
+        )
+
+    @staticmethod
+    def _close(client: openai.OpenAI):
+        try:
+            client.close()
+        except Exception as e:
+            logger.warning(f"关闭AI客户端失败: {str(e)}")
+
+    @staticmethod
+    def _close_async(client: openai.AsyncOpenAI, loop: asyncio.AbstractEventLoop):
+        """在客户端所属的事件循环中关闭；事件循环已关闭时连接已随之释放，直接丢弃"""
+        if loop.is_closed():
+            return
+        try:
+            if _is_current_loop(loop):
+                loop.create_task(client.close())
+            else:
+                asyncio.run_coroutine_threadsafe(client.close(), loop)
+        except Exception as e:
+            logger.warning(f"关闭异步AI客户端失败: {str(e)}")
+
+
+def _is_current_loop(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+client_pool = OpenAIClientPool(
+    idle_timeout=getattr(settings, 'AI_CLIENT_IDLE_TIMEOUT', 600),
+    max_clients=getattr(settings, 'AI_CLIENT_POOL_SIZE', 64)
+)
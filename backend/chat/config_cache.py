@@ -0,0 +1,86 @@
+"""
+用户AI配置缓存
+
+缓存每个用户解析后的AI配置（提供商、模型、聊天参数），发送消息时无需再查询配置相关的表。
+ChatSettings、AIProvider、AIModel 变更时由信号处理器清除对应用户的缓存。
+
+共享缓存中不保存API密钥，只保存提供商ID和密钥指纹；密钥保存在进程内的映射中，
+本进程没有（或指纹不一致）时由调用方重新从数据库解析配置。
+
+注意：默认的本地内存缓存是进程级的，多进程部署时应在 CACHES 中配置共享缓存（如Redis），
+否则其他进程中的缓存最长会在 CHAT_CONFIG_CACHE_TIMEOUT 秒后才过期。
+"""
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+CACHE_KEY_TEMPLATE = 'chat:ai_config:{user_id}'
+
+# 不写入共享缓存的字段
+SECRET_FIELDS = ('api_key',)
+
+# 提供商ID -> (密钥指纹, API密钥)，仅在本进程内存中
+_provider_api_keys: Dict[int, Tuple[str, str]] = {}
+_provider_api_keys_lock = threading.Lock()
+
+
+def _cache_key(user_id: int) -> str:
+    return CACHE_KEY_TEMPLATE.format(user_id=user_id)
+
+
+def get_cached_ai_config(user_id: int) -> Optional[Dict]:
+    """获取缓存的AI配置，未命中时返回None"""
+    return cache.get(_cache_key(user_id))
+
+
+async def aget_cached_ai_config(user_id: int) -> Optional[Dict]:
+    """异步获取缓存的AI配置，未命中时返回None"""
+    return await cache.aget(_cache_key(user_id))
+
+
+def set_cached_ai_config(user_id: int, ai_config: Dict):
+    """缓存用户的AI配置（不包含API密钥）"""
+    public_config = {key: value for key, value in ai_config.items() if key not in SECRET_FIELDS}
+    cache.set(_cache_key(user_id), public_config, getattr(settings, 'CHAT_CONFIG_CACHE_TIMEOUT', 300))
+
+
+def invalidate_ai_config(user_id: Optional[int]):
+    """清除用户的AI配置缓存"""
+    if user_id:
+        cache.delete(_cache_key(user_id))
+
+
+def api_key_fingerprint(api_key: str) -> str:
+    """API密钥指纹，用于判断进程内保存的密钥是否与缓存的配置一致"""
+    return hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:16]
+
+
+def get_provider_api_key(provider_id: int, fingerprint: str) -> Optional[str]:
+    """获取本进程保存的API密钥，不存在或指纹不一致时返回None"""
+    with _provider_api_keys_lock:
+        entry = _provider_api_keys.get(provider_id)
+    if entry and entry[0] == fingerprint:
+        return entry[1]
+    return None
+
+
+def set_provider_api_key(provider_id: int, api_key: str) -> str:
+    """
+    在本进程保存提供商的API密钥
+
+    Returns:
+        密钥指纹
+    """
+    fingerprint = api_key_fingerprint(api_key)
+    with _provider_api_keys_lock:
+        _provider_api_keys[provider_id] = (fingerprint, api_key)
+    return fingerprint
+
+
+def invalidate_provider_api_key(provider_id: Optional[int]):
+    """清除本进程保存的提供商API密钥"""
+    with _provider_api_keys_lock:
+        _provider_api_keys.pop(provider_id, None)
@@ -0,0 +1,155 @@
+"""
+对话上下文构建
+
+按Token预算从最新的消息开始向前选取历史消息，保证最近的对话轮次优先进入上下文；
+超出预算的早期消息可以选择压缩为会话级缓存的滚动摘要。
+"""
+import logging
+import re
+from typing import Callable, Dict, List, Optional
+
+from .models import Conversation
+
+logger = logging.getLogger(__name__)
+
+# 中日韩字符（大多数分词器中约1个字符对应1个Token）
+_CJK_PATTERN = re.compile(r'[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]')
+
+# 每条消息的格式开销（角色标记、分隔符等）
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的Token数量
+
+    不依赖具体模型的分词器：中日韩字符按1个Token计算，其余字符按约4个字符1个Token计算。
+    """
+    if not text:
+        return 0
+    cjk_count = len(_CJK_PATTERN.findall(text))
+    other_count = len(text) - cjk_count
+    return cjk_count + (other_count + 3) // 4
+
+
+def estimate_message_tokens(message: Dict) -> int:
+    """估算单条消息的Token数量"""
+    return estimate_tokens(message.get('content', '')) + MESSAGE_OVERHEAD_TOKENS
+
+
+class ContextBuilder:
+    """基于Token预算的对话上下文构建器"""
+
+    SUMMARY_PREFIX = '以下是本次对话早期内容的摘要：\n'
+
+    def __init__(self, context_window: int, response_tokens: int,
+                 summarizer: Optional[Callable[[str, List[Dict]], str]] = None,
+                 summary_max_tokens: int = 512):
+        """
+        Args:
+            context_window: 模型上下文窗口大小（Token）
+            response_tokens: 为模型回复预留的Token数量
+            summarizer: 摘要函数，接收(已有摘要, 待压缩消息)并返回新摘要；为None时直接丢弃早期消息
+            summary_max_tokens: 滚动摘要最多占用的Token数量
+        """
+        # 回复预算最多占用一半窗口，保证历史消息始终有可用空间
+        reserved = min(response_tokens, context_window // 2)
+        self.prompt_budget = max(context_window - reserved, 0)
+        self.summarizer = summarizer
+        self.summary_max_tokens = summary_max_tokens
+
+    def build(self, conversation: Conversation, system_prompt: str) -> List[Dict]:
+        """
+        构建发送给模型的消息列表
+
+        Args:
+            conversation: 会话（最新的用户消息应已保存）
+            system_prompt: 系统提示词
+
+        Returns:
+            按时间顺序排列的消息列表，首条为系统提示词
+        """
+        system_message = {'role': 'system', 'content': system_prompt}
+        budget = self.prompt_budget - estimate_message_tokens(system_message)
+
+        summary = conversation.context_summary if self.summarizer else ''
+        if summary:
+            budget -= estimate_tokens(summary) + MESSAGE_OVERHEAD_TOKENS
+
+        kept, overflow = self._select_recent(conversation, budget)
+
+        if overflow and self.summarizer:
+            summary = self._refresh_summary(conversation, kept, overflow)
+
+        messages = [system_message]
+        if summary:
+            messages.append({'role': 'system', 'content': self.SUMMARY_PREFIX + summary})
+        messages.extend({'role': m['role'], 'content': m['content']} for m in reversed(kept))
+
+        logger.info(
+            f"上下文构建完成: 会话ID={conversation.id}, 保留消息={len(kept)}条, "
+            f"丢弃消息={len(overflow)}条, 使用摘要={'是' if summary else '否'}"
+        )
+        return messages
+
+    def _select_recent(self, conversation: Conversation, budget: int):
+        """
+        从最新消息开始向前选取，直到超出预算
+
+        Returns:
+            (保留的消息（新到旧）, 超出预算的消息（新到旧）)
+        """
+        queryset = conversation.messages.exclude(role='system')
+        if self.summarizer and conversation.summary_until_id:
+            queryset = queryset.filter(id__gt=conversation.summary_until_id)
+        queryset = queryset.order_by('-timestamp', '-id').values('id', 'role', 'content')
+
+        kept, overflow = [], []
+        used = 0
+        for message in queryset.iterator(chunk_size=50):
+            if overflow:
+                if not self.summarizer:
+                    break
+                overflow.append(message)
+                continue
+
+            tokens = estimate_message_tokens(message)
+            # 最新的一条消息（当前提问）无论长短都保留
+            if kept and used + tokens > budget:
+                overflow.append(message)
+                continue
+            kept.append(message)
+            used += tokens
+
+        return kept, overflow
+
+    def _refresh_summary(self, conversation: Conversation, kept: List[Dict], overflow: List[Dict]) -> str:
+        """
+        将超出预算的消息合并进滚动摘要
+
+        为避免每一轮都重新生成摘要，会额外压缩保留窗口中较早的一半消息，
+        使接下来的若干轮对话可以直接复用缓存的摘要。
+        """
+        to_compress = list(reversed(overflow))
+        cut = len(kept) // 2 if len(kept) > 2 else len(kept)
+        to_compress.extend(reversed(kept[cut:]))
+
+        try:
+            summary = self.summarizer(conversation.context_summary or '', to_compress)
+        except Exception as e:
+            logger.warning(f"生成对话摘要失败，沿用已有摘要: {str(e)}")
+            return conversation.context_summary or ''
+
+        del kept[cut:]
+
+        # 限制摘要长度，避免挤占历史消息的预算
+        while summary and estimate_tokens(summary) > self.summary_max_tokens:
+            summary = summary[:int(len(summary) * 0.8)]
+
+        conversation.context_summary = summary
+        conversation.summary_until_id = to_compress[-1]['id']
+        Conversation.objects.filter(pk=conversation.pk).update(
+            context_summary=conversation.context_summary,
+            summary_until_id=conversation.summary_until_id
+        )
+        return summary
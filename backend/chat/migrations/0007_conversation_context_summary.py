@@ -0,0 +1,23 @@
+# Generated manually for adding rolling context summary fields to Conversation model
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0006_alter_aiprovider_api_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='context_summary',
+            field=models.TextField(blank=True, default='', verbose_name='上下文摘要'),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='summary_until_id',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='摘要覆盖到的消息ID'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated manually for adding per-provider rate limit fields to AIProvider model
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0007_conversation_context_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aiprovider',
+            name='requests_per_minute',
+            field=models.PositiveIntegerField(default=60, verbose_name='每分钟请求上限'),
+        ),
+        migrations.AddField(
+            model_name='aiprovider',
+            name='max_concurrency',
+            field=models.PositiveIntegerField(default=4, verbose_name='最大并发请求数'),
+        ),
+    ]
@@ -12,6 +12,8 @@ class Conversation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
     is_active = models.BooleanField(default=True, verbose_name='是否活跃')
+    context_summary = models.TextField(blank=True, default='', verbose_name='上下文摘要')  # 早期对话的滚动摘要
+    summary_until_id = models.BigIntegerField(null=True, blank=True, verbose_name='摘要覆盖到的消息ID')
     
     class Meta:
         verbose_name = 'AI对话会话'
@@ -67,6 +69,8 @@ class AIProvider(models.Model):
     api_base_url = models.URLField(verbose_name='API基础地址')
     is_active = models.BooleanField(default=True, verbose_name='是否启用')
     is_default = models.BooleanField(default=False, verbose_name='是否为默认配置')
+    requests_per_minute = models.PositiveIntegerField(default=60, verbose_name='每分钟请求上限')
+    max_concurrency = models.PositiveIntegerField(default=4, verbose_name='最大并发请求数')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
     
@@ -0,0 +1,349 @@
+"""
+AI服务提供商网关
+按 (提供商, 模型) 对大模型调用进行限流和保护：
+- 令牌桶限制请求速率（requests_per_minute）
+- AIMD 自适应并发：成功时缓慢增加并发上限，遇到429或延迟过高时成倍收缩
+- 熔断器：连续失败后快速拒绝调用，恢复期后放行单个探测请求（半开状态）
+
+本模块不依赖具体的SDK和配置。ai-news-agent/provider_gateway.py 与 backend/chat/provider_gateway.py
+内容完全相同（两个服务分别构建镜像），修改时需同时更新两处；后端的 manage.py check 会检查两份是否一致。
+"""
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，调用被直接拒绝"""
+
+
+@dataclass
+class LaneConfig:
+    """单个 (提供商, 模型) 通道的限流配置"""
+    requests_per_minute: float = 60
+    max_concurrency: int = 4
+    min_concurrency: int = 1
+    latency_target: float = 30.0  # 单次调用超过该耗时（秒）视为过载信号
+    failure_threshold: int = 5  # 连续失败多少次后熔断
+    recovery_timeout: float = 30.0  # 熔断后多久放行探测请求（秒）
+    retry_delay: float = 2.0  # 重试的基础退避时间（秒）
+
+
+class TokenBucket:
+    """令牌桶（调用方需持有锁）"""
+
+    def __init__(self, requests_per_minute: float, capacity: Optional[float] = None):
+        self.rate = max(requests_per_minute, 0.001) / 60
+        self.capacity = capacity if capacity is not None else max(1.0, self.rate * 10)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def reserve(self) -> float:
+        """取走一个令牌，返回需要等待的秒数（令牌不足时预支）"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def pause(self, seconds: float):
+        """在接下来的 seconds 秒内不再发放令牌（用于响应Retry-After）"""
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class AIMDController:
+    """加性增、乘性减的并发上限控制（调用方需持有锁）"""
+
+    def __init__(self, max_limit: int, min_limit: int = 1):
+        self.max_limit = max(max_limit, 1)
+        self.min_limit = max(min(min_limit, self.max_limit), 1)
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+
+    def try_acquire(self) -> bool:
+        if self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return True
+        return False
+
+    def release(self, latency: Optional[float], throttled: bool, latency_target: float):
+        self.in_flight = max(self.in_flight - 1, 0)
+        if throttled:
+            self.limit = max(self.min_limit, self.limit / 2)
+        elif latency is not None and latency > latency_target:
+            self.limit = max(self.min_limit, self.limit * 0.9)
+        elif latency is not None:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+
+class CircuitBreaker:
+    """熔断器（调用方需持有锁）"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int, recovery_timeout: float):
+        self.failure_threshold = max(failure_threshold, 1)
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+    def rejects(self) -> bool:
+        """是否应直接拒绝（打开且未到恢复时间，或半开状态下已有探测请求）"""
+        if self.state == self.OPEN:
+            return time.monotonic() - self.opened_at < self.recovery_timeout
+        return self.state == self.HALF_OPEN and self.probe_in_flight
+
+    def allow(self) -> bool:
+        """是否放行本次调用；恢复期结束后放行一个探测请求"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.recovery_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self.probe_in_flight = False
+        if self.probe_in_flight:
+            return False
+        self.probe_in_flight = True
+        return True
+
+    def record(self, outcome: str):
+        """记录调用结果：success / failure / throttled / neutral"""
+        if outcome == 'success':
+            self.state = self.CLOSED
+            self.failures = 0
+            self.probe_in_flight = False
+        elif outcome == 'failure':
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"熔断器打开: 连续失败 {self.failures} 次")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self.probe_in_flight = False
+        else:
+            # 429或与服务健康无关的错误（如参数错误）不计入失败，但释放探测名额
+            self.probe_in_flight = False
+
+
+class _Lane:
+    def __init__(self, config: LaneConfig):
+        self.config = config
+        self.cond = threading.Condition()
+        self.bucket = TokenBucket(config.requests_per_minute)
+        self.aimd = AIMDController(config.max_concurrency, config.min_concurrency)
+        self.breaker = CircuitBreaker(config.failure_threshold, config.recovery_timeout)
+        # 等待名额的异步调用：(事件循环, 事件)，名额释放时跨线程唤醒
+        self.async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+    def wake_all(self):
+        """唤醒所有等待名额的同步和异步调用（调用方需持有 cond）"""
+        self.cond.notify_all()
+        for loop, event in self.async_waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+        self.async_waiters.clear()
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    将异常归类为 throttled（429）、failure（服务端错误、超时、连接失败）或 neutral（其他）
+    """
+    status = getattr(error, 'status_code', None)
+    if status == 429:
+        return 'throttled'
+    if isinstance(status, int):
+        return 'failure' if status >= 500 else 'neutral'
+    name = type(error).__name__
+    if isinstance(error, (TimeoutError, ConnectionError)) or 'Timeout' in name or 'Connection' in name:
+        return 'failure'
+    return 'neutral'
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """读取429响应中的Retry-After（秒）"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        value = headers.get('retry-after')
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class ProviderGateway:
+    """进程级提供商网关"""
+
+    def __init__(self, default_config: Optional[LaneConfig] = None):
+        self.default_config = default_config or LaneConfig()
+        self._lanes: Dict[Tuple[str, str], _Lane] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, provider: str, model: str, **overrides):
+        """
+        设置通道配置（通常来自AIProvider/ModelConfig）；配置未变化时保留现有状态
+
+        Args:
+            provider: 提供商标识（如API地址或提供商名称）
+            model: 模型ID
+            overrides: LaneConfig字段，值为None的字段使用默认配置
+        """
+        overrides = {key: value for key, value in overrides.items() if value is not None}
+        config = replace(self.default_config, **overrides)
+        key = (provider, model)
+        with self._lock:
+            lane = self._lanes.get(key)
+            if lane is None or lane.config != config:
+                self._lanes[key] = _Lane(config)
+
+    def _lane(self, provider: str, model: str) -> _Lane:
+        key = (provider, model)
+        with self._lock:
+            lane = self._lanes.get(key)
+            if lane is None:
+                lane = self._lanes[key] = _Lane(self.default_config)
+            return lane
+
+    def _try_acquire(self, lane: _Lane, provider: str, model: str) -> Optional[float]:
+        """
+        尝试占用并发名额（调用方需持有 lane.cond）
+
+        Returns:
+            占用成功时返回需要等待令牌的秒数，没有空闲名额时返回None
+        """
+        if lane.breaker.rejects():
+            raise CircuitOpenError(f"{provider}/{model} 已熔断，暂停调用")
+        if not lane.aimd.try_acquire():
+            return None
+        if not lane.breaker.allow():
+            lane.aimd.release(None, False, lane.config.latency_target)
+            lane.wake_all()
+            raise CircuitOpenError(f"{provider}/{model} 已熔断，暂停调用")
+        return lane.bucket.reserve()
+
+    def _release(self, lane: _Lane, latency: Optional[float], outcome: str,
+                 error: Optional[BaseException] = None) -> float:
+        """释放名额并根据结果调整限流状态，返回重试前应等待的秒数"""
+        with lane.cond:
+            lane.aimd.release(latency, outcome == 'throttled', lane.config.latency_target)
+            lane.breaker.record(outcome)
+            backoff = 0.0
+            if outcome == 'throttled':
+                backoff = _retry_after(error) or lane.config.retry_delay
+                lane.bucket.pause(backoff)
+            lane.wake_all()
+        return backoff
+
+    def call(self, provider: str, model: str, fn: Callable[[], Any], max_retries: int = 0) -> Tuple[Any, int]:
+        """
+        经网关执行同步调用
+
+        Args:
+            provider: 提供商标识
+            model: 模型ID
+            fn: 实际的调用
+            max_retries: 遇到429或服务端故障时的最大重试次数
+
+        Returns:
+            (调用结果, 重试次数)
+
+        Raises:
+            CircuitOpenError: 熔断器打开
+        """
+        lane = self._lane(provider, model)
+        for attempt in range(max_retries + 1):
+            with lane.cond:
+                wait = self._try_acquire(lane, provider, model)
+                while wait is None:
+                    lane.cond.wait(timeout=1.0)
+                    wait = self._try_acquire(lane, provider, model)
+            if wait > 0:
+                time.sleep(wait)
+
+            start = time.monotonic()
+            try:
+                result = fn()
+            except Exception as e:
+                outcome = classify_error(e)
+                backoff = self._release(lane, time.monotonic() - start, outcome, e)
+                if outcome == 'neutral' or attempt >= max_retries:
+                    raise
+                delay = backoff or lane.config.retry_delay * (2 ** attempt)
+                logger.warning(f"{provider}/{model} 调用失败({outcome})，{delay:.1f}秒后重试: {str(e)}")
+                time.sleep(delay)
+                continue
+            except BaseException:
+                self._release(lane, None, 'neutral')
+                raise
+            self._release(lane, time.monotonic() - start, 'success')
+            return result, attempt
+
+    async def acall(self, provider: str, model: str, fn: Callable[[], Awaitable[Any]],
+                    max_retries: int = 0) -> Tuple[Any, int]:
+        """经网关执行异步调用，参数和返回值同 call"""
+        lane = self._lane(provider, model)
+        for attempt in range(max_retries + 1):
+            while True:
+                with lane.cond:
+                    wait = self._try_acquire(lane, provider, model)
+                    if wait is None:
+                        waiter = (asyncio.get_running_loop(), asyncio.Event())
+                        lane.async_waiters.append(waiter)
+                if wait is not None:
+                    break
+                # 等待名额释放的通知；与同步调用一样每秒重新检查一次，避免错过并发上限的变化
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    with lane.cond:
+                        if waiter in lane.async_waiters:
+                            lane.async_waiters.remove(waiter)
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            start = time.monotonic()
+            try:
+                result = await fn()
+            except Exception as e:
+                outcome = classify_error(e)
+                backoff = self._release(lane, time.monotonic() - start, outcome, e)
+                if outcome == 'neutral' or attempt >= max_retries:
+                    raise
+                delay = backoff or lane.config.retry_delay * (2 ** attempt)
+                logger.warning(f"{provider}/{model} 调用失败({outcome})，{delay:.1f}秒后重试: {str(e)}")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # 包括任务被取消
+                self._release(lane, None, 'neutral')
+                raise
+            self._release(lane, time.monotonic() - start, 'success')
+            return result, attempt
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """各通道的当前状态"""
+        with self._lock:
+            lanes = dict(self._lanes)
+        result = {}
+        for (provider, model), lane in lanes.items():
+            with lane.cond:
+                result[f'{provider}/{model}'] = {
+                    'state': lane.breaker.state,
+                    'concurrency_limit': round(lane.aimd.limit, 2),
+                    'in_flight': lane.aimd.in_flight,
+                    'consecutive_failures': lane.breaker.failures,
+                }
+        return result
@@ -55,7 +55,8 @@ class AIProviderSerializer(serializers.ModelSerializer):
     class Meta:
         model = AIProvider
         fields = ['id', 'name', 'provider_type', 'api_key', 'api_base_url', 
-                 'is_active', 'is_default', 'models_count', 'created_at', 'updated_at']
+                 'is_active', 'is_default', 'requests_per_minute', 'max_concurrency',
+                 'models_count', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
         extra_kwargs = {
             'api_key': {'write_only': True}  # API密钥只能写入，不返回给前端
@@ -76,7 +77,8 @@ class AIProviderListSerializer(serializers.ModelSerializer):
     class Meta:
         model = AIProvider
         fields = ['id', 'name', 'provider_type', 'api_base_url', 
-                 'is_active', 'is_default', 'models_count', 'created_at', 'updated_at']
+                 'is_active', 'is_default', 'requests_per_minute', 'max_concurrency',
+                 'models_count', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
     
     def get_models_count(self, obj):
@@ -1,14 +1,126 @@
 import openai
 import json
 import logging
-from typing import Dict, List, Optional, Tuple
+import random
+import re
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from .client_pool import client_pool
+from .config_cache import (
+    get_cached_ai_config, aget_cached_ai_config, set_cached_ai_config, invalidate_ai_config,
+    get_provider_api_key, set_provider_api_key
+)
+from .context import ContextBuilder, estimate_message_tokens, estimate_tokens
+from .provider_gateway import CircuitOpenError, LaneConfig, ProviderGateway
 from .models import Conversation, Message, ChatSettings, AIProvider, AIModel
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+# 进程级提供商网关：按 (API地址+密钥, 模型) 限流、自适应并发和熔断
+provider_gateway = ProviderGateway(LaneConfig(
+    latency_target=getattr(settings, 'AI_GATEWAY_LATENCY_TARGET', 60.0),
+    failure_threshold=getattr(settings, 'AI_GATEWAY_FAILURE_THRESHOLD', 5),
+    recovery_timeout=getattr(settings, 'AI_GATEWAY_RECOVERY_TIMEOUT', 30.0),
+    retry_delay=getattr(settings, 'AI_GATEWAY_RETRY_DELAY', 2.0)
+))
+
+# 拒绝 stream_options 参数的提供商通道（进程内记录），之后的流式请求不再携带该参数
+_stream_usage_unsupported = set()
+
+
+def _gateway_provider(api_base_url: str, api_key: str) -> str:
+    """网关通道的提供商标识：配额按API密钥计算，因此同一地址的不同密钥使用不同通道"""
+    base_url, key_hash = client_pool.make_key(api_base_url, api_key)
+    return f"{base_url}#{key_hash[:8]}"
+
+
+class ThinkingStreamParser:
+    """
+    增量拆分流式输出中的<thinking>思考过程与正式回答
+    
+    标签可能被拆分在多个增量片段中，因此末尾可能构成标签前缀的文本会暂存到下一个片段。
+    """
+    
+    OPEN_TAG = '<thinking>'
+    CLOSE_TAG = '</thinking>'
+    
+    def __init__(self):
+        self.buffer = ''
+        self.in_thinking = False
+        self.thinking_parts: List[str] = []
+        self.content_parts: List[str] = []
+    
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        """
+        输入一段增量文本
+        
+        Returns:
+            [(事件类型, 文本)]，事件类型为 'thinking' 或 'content'
+        """
+        self.buffer += text
+        events = []
+        
+        while self.buffer:
+            tag = self.CLOSE_TAG if self.in_thinking else self.OPEN_TAG
+            index = self.buffer.find(tag)
+            if index >= 0:
+                self._emit(self.buffer[:index], events)
+                self.buffer = self.buffer[index + len(tag):]
+                self.in_thinking = not self.in_thinking
+                continue
+            
+            # 保留可能是标签开头的尾部文本
+            keep = self._partial_tag_length(tag)
+            self._emit(self.buffer[:len(self.buffer) - keep], events)
+            self.buffer = self.buffer[len(self.buffer) - keep:]
+            break
+        
+        return events
+    
+    def flush(self) -> List[Tuple[str, str]]:
+        """输出缓冲区中剩余的文本"""
+        events = []
+        self._emit(self.buffer, events)
+        self.buffer = ''
+        return events
+    
+    def has_output(self) -> bool:
+        """是否已经产生过任何输出"""
+        return bool(self.thinking_parts or self.content_parts or self.buffer)
+    
+    def result(self) -> Tuple[str, str]:
+        """
+        获取完整结果
+        
+        Returns:
+            (思考内容, 清理后的回答内容)
+        """
+        thinking_content = ''.join(self.thinking_parts).strip()
+        content = ''.join(self.content_parts)
+        # 清理多余的空行
+        content = re.sub(r'\n\s*\n\s*\n', '\n\n', content)
+        return thinking_content, content.strip()
+    
+    def _emit(self, text: str, events: List[Tuple[str, str]]):
+        if not text:
+            return
+        if self.in_thinking:
+            self.thinking_parts.append(text)
+            events.append(('thinking', text))
+        else:
+            self.content_parts.append(text)
+            events.append(('content', text))
+    
+    def _partial_tag_length(self, tag: str) -> int:
+        for length in range(min(len(tag) - 1, len(self.buffer)), 0, -1):
+            if self.buffer.endswith(tag[:length]):
+                return length
+        return 0
+
 
 class ChatService:
     """AI聊天服务"""
@@ -68,11 +180,12 @@ class ChatService:
                     max_tokens=4096
                 )
                 
-                # 更新聊天设置
+                # 更新聊天设置（update不会触发信号，需手动清除配置缓存）
                 ChatSettings.objects.filter(user=user).update(
                     default_provider=default_provider,
                     default_model=default_model
                 )
+                invalidate_ai_config(user.id)
                 
                 logger.info(f"为用户 {user.username} 创建了默认AI配置")
                 
@@ -99,16 +212,65 @@ class ChatService:
         return conversation
     
     def get_conversation_messages(self, conversation: Conversation, limit: int = 50) -> List[Dict]:
-        """获取会话消息历史"""
-        messages = conversation.messages.order_by('timestamp')[:limit]
+        """获取会话最近的消息历史（按时间顺序）"""
+        messages = conversation.messages.order_by('-timestamp', '-id').values('role', 'content')[:limit]
         return [
             {
-                'role': msg.role,
-                'content': msg.content
+                'role': msg['role'],
+                'content': msg['content']
             }
-            for msg in messages
+            for msg in reversed(list(messages))
         ]
     
+    def build_context_messages(self, conversation: Conversation, system_prompt: str, ai_config: Dict) -> List[Dict]:
+        """
+        按模型上下文窗口构建消息历史
+        
+        保留能放入（上下文窗口 - 回复预算）的最近消息；开启摘要时，更早的消息会被压缩为滚动摘要。
+        """
+        summarizer = None
+        if getattr(settings, 'CHAT_CONTEXT_SUMMARY_ENABLED', False):
+            summarizer = lambda previous, messages: self._summarize_messages(ai_config, previous, messages)
+        
+        builder = ContextBuilder(
+            context_window=ai_config['context_window'],
+            response_tokens=ai_config['max_tokens'],
+            summarizer=summarizer,
+            summary_max_tokens=getattr(settings, 'CHAT_CONTEXT_SUMMARY_MAX_TOKENS', 512)
+        )
+        return builder.build(conversation, system_prompt)
+    
+    def _summarize_messages(self, ai_config: Dict, previous_summary: str, messages: List[Dict]) -> str:
+        """将早期对话压缩为摘要（失败时抛出异常，由调用方保留原有摘要）"""
+        role_names = {'user': '用户', 'assistant': 'AI'}
+        transcript = '\n'.join(
+            f"{role_names.get(msg['role'], msg['role'])}: {msg['content']}" for msg in messages
+        )
+        prompt = f"""请将以下对话内容压缩为简洁的中文摘要，保留用户的目标、关键事实、已得出的结论和未解决的问题。
+
+已有摘要：
+{previous_summary or '无'}
+
+新增对话：
+{transcript}
+
+请直接输出更新后的完整摘要。"""
+        
+        with client_pool.lease(ai_config['api_base_url'], ai_config['api_key']) as client:
+            response, _ = provider_gateway.call(
+                _gateway_provider(ai_config['api_base_url'], ai_config['api_key']), ai_config['model'],
+                lambda: client.chat.completions.create(
+                    model=ai_config['model'],
+                    messages=[{'role': 'user', 'content': prompt}],
+                    max_tokens=getattr(settings, 'CHAT_CONTEXT_SUMMARY_MAX_TOKENS', 512),
+                    temperature=0.3,
+                    stream=False
+                )
+            )
+        if not response.choices or not response.choices[0].message.content:
+            raise ValueError("摘要生成返回了空响应")
+        return response.choices[0].message.content.strip()
+    
     def send_message(self, user: User, message_content: str, conversation_id: int = None) -> Tuple[Conversation, Message]:
         """发送消息并获取AI回复"""
         try:
@@ -188,6 +350,34 @@ class ChatService:
             logger.error(f"发送消息失败: {str(e)}")
             raise
     
+    def get_resolved_ai_config(self, user: User) -> Dict:
+        """
+        获取用户解析后的AI配置（带缓存）
+        
+        缓存命中时不产生任何数据库查询；配置变更由信号处理器清除缓存。
+        缓存中不含API密钥，本进程没有对应提供商的密钥时重新从数据库解析。
+        """
+        ai_config = self._with_api_key(get_cached_ai_config(user.id))
+        if ai_config is not None:
+            return ai_config
+        
+        chat_settings = self.get_or_create_chat_settings(user)
+        ai_config = self._get_ai_config(chat_settings)
+        ai_config['system_prompt'] = chat_settings.system_prompt
+        
+        set_cached_ai_config(user.id, ai_config)
+        return ai_config
+    
+    @staticmethod
+    def _with_api_key(ai_config: Optional[Dict]) -> Optional[Dict]:
+        """为缓存的AI配置补上本进程保存的API密钥，无法补全时返回None"""
+        if ai_config is None or 'provider_id' not in ai_config:
+            return None
+        api_key = get_provider_api_key(ai_config['provider_id'], ai_config.get('api_key_fingerprint'))
+        if api_key is None:
+            return None
+        return {**ai_config, 'api_key': api_key}
+    
     def _get_ai_config(self, user_or_settings) -> Dict:
         """获取AI配置"""
         # 兼容两种调用方式：传入User对象或ChatSettings对象
@@ -234,14 +424,21 @@ class ChatService:
         if not is_local_service and (not provider.api_key or not provider.api_key.strip()):
             raise ValueError("AI服务提供商的API密钥未配置或为空")
         
+        api_key = provider.api_key if not is_local_service else 'dummy-key-for-local-service'
+        
         return {
+            'provider_id': provider.id,
             'api_base_url': provider.api_base_url,
-            'api_key': provider.api_key if not is_local_service else 'dummy-key-for-local-service',
+            'api_key': api_key,
+            'api_key_fingerprint': set_provider_api_key(provider.id, api_key),
             'model': model.model_id,
             'max_tokens': min(chat_settings.max_tokens, model.max_tokens),
+            'context_window': model.max_tokens,
             'temperature': chat_settings.temperature,
             'provider_name': provider.name,
-            'model_name': model.model_name
+            'model_name': model.model_name,
+            'requests_per_minute': provider.requests_per_minute,
+            'max_concurrency': provider.max_concurrency
         }
     
     def _get_fallback_response(self, error_msg: str) -> str:
@@ -290,20 +487,20 @@ AI服务暂时无法连接，可能原因:
     def _call_ai_api(self, api_base_url: str, api_key: str, model_id: str, messages: List[Dict], max_tokens: int, temperature: float) -> Dict:
         """调用AI API"""
         try:
-            # 使用用户配置的AI提供商，无超时限制
-            client = openai.OpenAI(
-                api_key=api_key,
-                base_url=api_base_url
-            )
-            
-            # 调用API
-            response = client.chat.completions.create(
-                model=model_id,
-                messages=messages,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                stream=False
-            )
+            # 使用用户配置的AI提供商，复用共享连接池，无超时限制
+            with client_pool.lease(api_base_url, api_key) as client:
+                # 调用API
+                response, _ = provider_gateway.call(
+                    _gateway_provider(api_base_url, api_key), model_id,
+                    lambda: client.chat.completions.create(
+                        model=model_id,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        stream=False
+                    ),
+                    max_retries=getattr(settings, 'AI_GATEWAY_MAX_RETRIES', 2)
+                )
             
             # 检查响应是否有效
             if not response.choices or not response.choices[0].message:
@@ -333,6 +530,9 @@ AI服务暂时无法连接，可能原因:
         except openai.RateLimitError as e:
             logger.error(f"AI API请求频率限制: {str(e)}")
             raise Exception("请求过于频繁，请稍后重试")
+        except CircuitOpenError as e:
+            logger.warning(f"AI服务已熔断: {str(e)}")
+            raise Exception("AI服务暂时不可用（连续请求失败），请稍后重试")
         except Exception as e:
             logger.error(f"AI API调用失败: {str(e)}")
             # 提供一个友好的回退响应
@@ -343,37 +543,9 @@ AI服务暂时无法连接，可能原因:
 
 
     
-    def send_message_simple(self, user, message_content: str, conversation_id: int = None):
-        """非流式发送消息"""
-        try:
-            # 获取或创建会话
-            if conversation_id:
-                try:
-                    conversation = Conversation.objects.get(id=conversation_id, user=user)
-                except Conversation.DoesNotExist:
-                    raise ValueError("会话不存在或无权限访问")
-            else:
-                # 创建新会话
-                title = message_content[:20] + "..." if len(message_content) > 20 else message_content
-                conversation = self.create_conversation(user, title)
-            
-            # 保存用户消息
-            user_message = Message.objects.create(
-                conversation=conversation,
-                role='user',
-                content=message_content
-            )
-            
-            # 获取用户聊天设置
-            chat_settings = self.get_or_create_chat_settings(user)
-            
-            # 准备消息历史
-            message_history = self.get_conversation_messages(conversation)
-            
-            # 添加系统提示词（每次都添加，确保AI始终显示思考过程）
-            if True:
-                # 增强系统提示词，支持思考过程
-                enhanced_system_prompt = f"""{chat_settings.system_prompt}
+    def _build_system_prompt(self, system_prompt: str) -> str:
+        """增强系统提示词，要求AI展示思考过程"""
+        return f"""{system_prompt}
 
 重要：在回答问题时，请使用以下格式来展示你的思考过程：
 
@@ -386,31 +558,86 @@ AI服务暂时无法连接，可能原因:
 </thinking>
 
 然后再提供你的最终回答。思考过程会帮助用户更好地理解你的推理过程。"""
-                
-                message_history.insert(0, {
-                    'role': 'system',
-                    'content': enhanced_system_prompt
-                })
-            
-            # 获取AI配置
-            ai_config = self._get_ai_config(chat_settings)
-            
-            # 记录详细的请求信息
-            logger.info(f"=== AI API 请求开始 ===")
-            logger.info(f"用户: {user.username}")
-            logger.info(f"会话ID: {conversation.id}")
-            logger.info(f"模型提供商: {ai_config['provider_name']}")
-            logger.info(f"使用模型: {ai_config['model_name']} ({ai_config['model']})")
-            logger.info(f"API地址: {ai_config['api_base_url']}")
-            logger.info(f"请求参数: max_tokens={ai_config['max_tokens']}, temperature={ai_config['temperature']}")
-            logger.info(f"消息历史 ({len(message_history)} 条):")
-            for i, msg in enumerate(message_history):
-                role_display = {"system": "系统", "user": "用户", "assistant": "AI"}.get(msg['role'], msg['role'])
-                content_preview = msg['content'][:100] + "..." if len(msg['content']) > 100 else msg['content']
-                logger.info(f"  [{i+1}] {role_display}: {content_preview}")
+    
+    async def aget_resolved_ai_config(self, user: User) -> Dict:
+        """异步获取用户解析后的AI配置（带缓存）"""
+        ai_config = self._with_api_key(await aget_cached_ai_config(user.id))
+        if ai_config is not None:
+            return ai_config
+        return await sync_to_async(self.get_resolved_ai_config)(user)
+    
+    def _configure_gateway(self, ai_config: Dict):
+        """按提供商配置设置网关通道（配置未变化时保留通道的限流状态）"""
+        provider_gateway.configure(
+            _gateway_provider(ai_config['api_base_url'], ai_config['api_key']),
+            ai_config['model'],
+            requests_per_minute=ai_config.get('requests_per_minute'),
+            max_concurrency=ai_config.get('max_concurrency')
+        )
+    
+    async def _aprepare_chat_turn(self, user, message_content: str, conversation_id: int = None) -> Tuple[Conversation, List[Dict], Dict]:
+        """
+        准备一轮对话：获取或创建会话、保存用户消息、构建消息历史并解析AI配置
+        
+        Returns:
+            (会话, 消息历史, AI配置)
+        """
+        # 获取或创建会话
+        if conversation_id:
+            try:
+                conversation = await Conversation.objects.aget(id=conversation_id, user=user)
+            except Conversation.DoesNotExist:
+                raise ValueError("会话不存在或无权限访问")
+        else:
+            # 创建新会话
+            title = message_content[:20] + "..." if len(message_content) > 20 else message_content
+            conversation = await Conversation.objects.acreate(user=user, title=title)
+        
+        # 保存用户消息
+        await Message.objects.acreate(
+            conversation=conversation,
+            role='user',
+            content=message_content
+        )
+        
+        # 获取用户AI配置（优先使用缓存）
+        ai_config = await self.aget_resolved_ai_config(user)
+        self._configure_gateway(ai_config)
+        
+        # 添加系统提示词（每次都添加，确保AI始终显示思考过程）
+        enhanced_system_prompt = self._build_system_prompt(ai_config['system_prompt'])
+        
+        # 按上下文窗口准备消息历史
+        message_history = await sync_to_async(self.build_context_messages)(
+            conversation, enhanced_system_prompt, ai_config
+        )
+        
+        return conversation, message_history, ai_config
+    
+    def _serialize_ai_message(self, ai_message: Message) -> Dict:
+        """将AI消息转换为接口返回格式"""
+        return {
+            'id': ai_message.id,
+            'role': ai_message.role,
+            'content': ai_message.content,
+            'thinking': ai_message.thinking,
+            'model_name': ai_message.model_name,
+            'model_provider': ai_message.model_provider,
+            'timestamp': ai_message.timestamp.isoformat(),
+            'token_count': ai_message.token_count
+        }
+    
+    async def asend_message_simple(self, user, message_content: str, conversation_id: int = None):
+        """非流式发送消息（异步）"""
+        try:
+            conversation, message_history, ai_config = await self._aprepare_chat_turn(
+                user, message_content, conversation_id
+            )
+            
+            start = time.perf_counter()
             
             # 直接调用AI API获取完整回复
-            ai_response = self._call_ai_api(
+            ai_response = await self._acall_ai_api(
                 api_base_url=ai_config['api_base_url'],
                 api_key=ai_config['api_key'],
                 model_id=ai_config['model'],
@@ -419,28 +646,20 @@ AI服务暂时无法连接，可能原因:
                 temperature=ai_config['temperature']
             )
             
-            # 记录AI响应信息
-            logger.info(f"=== AI API 响应 ===")
-            logger.info(f"原始回复长度: {len(ai_response['content'])} 字符")
-            logger.info(f"Token消耗: {ai_response['token_count']}")
-            logger.info(f"原始回复内容:")
-            logger.info(f"  {ai_response['content']}")
+            self._log_ai_call(
+                user, conversation, ai_config, message_history,
+                latency_ms=(time.perf_counter() - start) * 1000,
+                token_count=ai_response['token_count'],
+                reply=ai_response['content']
+            )
             
             # 提取思考内容和实际回答
             full_content = ai_response['content']
             thinking_content = self._extract_thinking_content(full_content)
             clean_content = self._clean_content_from_thinking(full_content)
             
-            # 记录内容处理结果
-            logger.info(f"=== 内容处理结果 ===")
-            if thinking_content:
-                logger.info(f"思考内容 ({len(thinking_content)} 字符): {thinking_content[:200]}...")
-            else:
-                logger.info(f"无思考内容")
-            logger.info(f"最终回复 ({len(clean_content)} 字符): {clean_content[:200]}...")
-            
             # 保存AI回复
-            ai_message = Message.objects.create(
+            ai_message = await Message.objects.acreate(
                 conversation=conversation,
                 role='assistant',
                 content=clean_content,
@@ -450,33 +669,276 @@ AI服务暂时无法连接，可能原因:
                 token_count=ai_response['token_count']
             )
             
-            logger.info(f"=== 消息保存完成 ===")
-            logger.info(f"消息ID: {ai_message.id}")
-            logger.info(f"===================")
-            
             # 更新会话时间
-            conversation.save()
+            await conversation.asave()
             
             return {
                 'conversation_id': conversation.id,
-                'message': {
-                    'id': ai_message.id,
-                    'role': ai_message.role,
-                    'content': ai_message.content,
-                    'thinking': ai_message.thinking,
-                    'model_name': ai_message.model_name,
-                    'model_provider': ai_message.model_provider,
-                    'timestamp': ai_message.timestamp.isoformat(),
-                    'token_count': ai_message.token_count
-                }
+                'message': self._serialize_ai_message(ai_message)
             }
             
         except Exception as e:
             logger.error(f"发送消息失败: {str(e)}")
             raise
     
-
+    def _log_ai_call(self, user, conversation: Conversation, ai_config: Dict, messages: List[Dict],
+                     latency_ms: float, token_count: int, reply: str, stream: bool = False):
+        """
+        记录一次AI调用的结构化日志
+        
+        默认只记录模型、耗时、Token等紧凑字段；完整的消息历史和回复仅在DEBUG级别
+        或按 CHAT_LOG_SAMPLE_RATE 采样时记录，避免每次请求都输出大段对话内容。
+        """
+        record = {
+            'user': user.username,
+            'conversation_id': conversation.id,
+            'provider': ai_config['provider_name'],
+            'model': ai_config['model'],
+            'stream': stream,
+            'messages': len(messages),
+            'latency_ms': round(latency_ms, 1),
+            'token_count': token_count,
+            'reply_chars': len(reply or ''),
+        }
+        logger.info(f"AI调用: {json.dumps(record, ensure_ascii=False)}")
+        
+        sample_rate = getattr(settings, 'CHAT_LOG_SAMPLE_RATE', 0.0)
+        if logger.isEnabledFor(logging.DEBUG) or (sample_rate > 0 and random.random() < sample_rate):
+            payload = {'conversation_id': conversation.id, 'messages': messages, 'reply': reply}
+            logger.info(f"AI调用内容: {json.dumps(payload, ensure_ascii=False)}")
     
+    async def astart_stream_message(self, user, message_content: str, conversation_id: int = None) -> Tuple[Conversation, AsyncIterator[Dict]]:
+        """
+        流式发送消息（异步）
+        
+        会话校验和配置解析在调用时立即完成（出错时直接抛出异常），
+        模型输出通过返回的异步事件生成器逐步产出。
+        
+        Returns:
+            (会话, 事件生成器)
+        """
+        conversation, message_history, ai_config = await self._aprepare_chat_turn(
+            user, message_content, conversation_id
+        )
+        
+        return conversation, self._astream_reply_events(user, conversation, message_history, ai_config)
+    
+    async def _astream_reply_events(self, user, conversation: Conversation, message_history: List[Dict], ai_config: Dict) -> AsyncIterator[Dict]:
+        """
+        转发模型增量输出并在结束后保存AI消息
+        
+        事件类型：
+            start    - 开始生成
+            thinking - 思考过程增量
+            content  - 回答内容增量
+            complete - 生成完成，包含已保存的消息
+            error    - 生成失败
+        """
+        parser = ThinkingStreamParser()
+        token_count = 0
+        saved = False
+        start = time.perf_counter()
+        
+        async def save_message() -> Message:
+            nonlocal token_count
+            thinking_content, clean_content = parser.result()
+            if not token_count:
+                # 服务端未返回usage时按输入和输出估算
+                token_count = sum(estimate_message_tokens(message) for message in message_history) + \
+                    estimate_tokens(thinking_content) + estimate_tokens(clean_content)
+            ai_message = await Message.objects.acreate(
+                conversation=conversation,
+                role='assistant',
+                content=clean_content,
+                thinking=thinking_content if thinking_content else None,
+                model_name=ai_config['model_name'],
+                model_provider=ai_config['provider_name'],
+                token_count=token_count
+            )
+            # 更新会话时间
+            await conversation.asave()
+            return ai_message
+        
+        yield {
+            'type': 'start',
+            'conversation_id': conversation.id,
+            'model_name': ai_config['model_name'],
+            'model_provider': ai_config['provider_name']
+        }
+        
+        try:
+            async for delta, usage_tokens in self._acall_ai_api_stream(
+                api_base_url=ai_config['api_base_url'],
+                api_key=ai_config['api_key'],
+                model_id=ai_config['model'],
+                messages=message_history,
+                max_tokens=ai_config['max_tokens'],
+                temperature=ai_config['temperature']
+            ):
+                if usage_tokens:
+                    token_count = usage_tokens
+                for event_type, text in parser.feed(delta):
+                    yield {'type': event_type, 'content': text}
+            
+            for event_type, text in parser.flush():
+                yield {'type': event_type, 'content': text}
+            
+            ai_message = await save_message()
+            saved = True
+            _, clean_content = parser.result()
+            self._log_ai_call(
+                user, conversation, ai_config, message_history,
+                latency_ms=(time.perf_counter() - start) * 1000,
+                token_count=token_count,
+                reply=clean_content,
+                stream=True
+            )
+            
+            yield {
+                'type': 'complete',
+                'conversation_id': conversation.id,
+                'message': self._serialize_ai_message(ai_message)
+            }
+            
+        except Exception as e:
+            logger.error(f"流式回复失败: {str(e)}")
+            yield {'type': 'error', 'message': str(e)}
+            
+        finally:
+            # 客户端中途断开或出错时，保留已生成的部分内容
+            if not saved and parser.has_output():
+                try:
+                    parser.flush()
+                    await save_message()
+                    logger.info(f"流式回复中断，已保存部分内容: 会话ID={conversation.id}")
+                except Exception as e:
+                    logger.error(f"保存部分回复失败: {str(e)}")
+    
+    async def _acall_ai_api(self, api_base_url: str, api_key: str, model_id: str, messages: List[Dict], max_tokens: int, temperature: float) -> Dict:
+        """异步调用AI API"""
+        try:
+            async with client_pool.alease(api_base_url, api_key, timeout=getattr(settings, 'CHAT_AI_TIMEOUT', None)) as client:
+                response, _ = await provider_gateway.acall(
+                    _gateway_provider(api_base_url, api_key), model_id,
+                    lambda: client.chat.completions.create(
+                        model=model_id,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        stream=False
+                    ),
+                    max_retries=getattr(settings, 'AI_GATEWAY_MAX_RETRIES', 2)
+                )
+            
+            # 检查响应是否有效
+            if not response.choices or not response.choices[0].message:
+                raise Exception("AI API返回了空响应")
+            
+            # 提取回复内容
+            ai_content = response.choices[0].message.content
+            if not ai_content:
+                ai_content = "抱歉，我无法生成有效的回复，请重试。"
+            
+            token_count = response.usage.total_tokens if response.usage else 0
+            
+            return {
+                'content': ai_content,
+                'token_count': token_count
+            }
+            
+        except openai.APIConnectionError as e:
+            logger.error(f"AI API连接失败: {str(e)}")
+            raise Exception("无法连接到AI服务，请检查网络连接或稍后重试")
+        except openai.APITimeoutError as e:
+            logger.error(f"AI API请求超时: {str(e)}")
+            raise Exception("AI服务响应时间过长，可能网络不稳定")
+        except openai.AuthenticationError as e:
+            logger.error(f"AI API认证失败: {str(e)}")
+            raise Exception("AI服务认证失败，请检查API密钥配置")
+        except openai.RateLimitError as e:
+            logger.error(f"AI API请求频率限制: {str(e)}")
+            raise Exception("请求过于频繁，请稍后重试")
+        except CircuitOpenError as e:
+            logger.warning(f"AI服务已熔断: {str(e)}")
+            raise Exception("AI服务暂时不可用（连续请求失败），请稍后重试")
+        except Exception as e:
+            logger.error(f"AI API调用失败: {str(e)}")
+            # 提供一个友好的回退响应
+            return {
+                'content': f"抱歉，AI服务暂时不可用。您的问题是：{messages[-1].get('content', '')}。请稍后重试或联系管理员。",
+                'token_count': 0
+            }
+    
+    async def _acall_ai_api_stream(self, api_base_url: str, api_key: str, model_id: str, messages: List[Dict], max_tokens: int, temperature: float) -> AsyncIterator[Tuple[str, int]]:
+        """
+        异步流式调用AI API
+        
+        请求服务端在最后一个片段返回usage（stream_options.include_usage），不支持该参数的提供商自动回退。
+        
+        Yields:
+            (增量文本, token总数)，token总数仅在服务端返回usage时非零
+        """
+        try:
+            # 借用覆盖整个流式输出过程，期间客户端不会被关闭
+            async with client_pool.alease(api_base_url, api_key, timeout=getattr(settings, 'CHAT_AI_TIMEOUT', None)) as client:
+                gateway_provider = _gateway_provider(api_base_url, api_key)
+                include_usage = getattr(settings, 'CHAT_STREAM_INCLUDE_USAGE', True) and \
+                    gateway_provider not in _stream_usage_unsupported
+                
+                def create_stream(with_usage: bool):
+                    options = {'stream_options': {'include_usage': True}} if with_usage else {}
+                    return client.chat.completions.create(
+                        model=model_id,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        stream=True,
+                        **options
+                    )
+                
+                # 网关只覆盖建立流的请求（429和连接错误在此阶段返回），不占用整个流式输出过程
+                try:
+                    stream, _ = await provider_gateway.acall(
+                        gateway_provider, model_id, lambda: create_stream(include_usage),
+                        max_retries=getattr(settings, 'AI_GATEWAY_MAX_RETRIES', 2)
+                    )
+                except openai.BadRequestError as e:
+                    if not include_usage:
+                        raise
+                    # 部分兼容OpenAI接口的服务不支持 stream_options，去掉后重试，Token数由调用方估算
+                    logger.warning(f"AI服务不支持stream_options，改为不请求usage: {str(e)}")
+                    _stream_usage_unsupported.add(gateway_provider)
+                    stream, _ = await provider_gateway.acall(
+                        gateway_provider, model_id, lambda: create_stream(False),
+                        max_retries=getattr(settings, 'AI_GATEWAY_MAX_RETRIES', 2)
+                    )
+                
+                async for chunk in stream:
+                    usage = getattr(chunk, 'usage', None)
+                    token_count = usage.total_tokens if usage else 0
+                    delta = ''
+                    if chunk.choices and chunk.choices[0].delta:
+                        delta = chunk.choices[0].delta.content or ''
+                    if delta or token_count:
+                        yield delta, token_count
+            
+        except openai.APIConnectionError as e:
+            logger.error(f"AI API连接失败: {str(e)}")
+            raise Exception("无法连接到AI服务，请检查网络连接或稍后重试")
+        except openai.APITimeoutError as e:
+            logger.error(f"AI API请求超时: {str(e)}")
+            raise Exception("AI服务响应时间过长，可能网络不稳定")
+        except openai.AuthenticationError as e:
+            logger.error(f"AI API认证失败: {str(e)}")
+            raise Exception("AI服务认证失败，请检查API密钥配置")
+        except openai.RateLimitError as e:
+            logger.error(f"AI API请求频率限制: {str(e)}")
+            raise Exception("请求过于频繁，请稍后重试")
+        except CircuitOpenError as e:
+            logger.warning(f"AI服务已熔断: {str(e)}")
+            raise Exception("AI服务暂时不可用（连续请求失败），请稍后重试")
+    
+
     def delete_conversation(self, user: User, conversation_id: int) -> bool:
         """删除会话"""
         try:
@@ -0,0 +1,45 @@
+"""
+聊天应用信号处理器
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .client_pool import client_pool
+from .config_cache import invalidate_ai_config, invalidate_provider_api_key
+from .models import AIModel, AIProvider, ChatSettings
+
+
+@receiver(pre_save, sender=AIProvider)
+def invalidate_client_on_provider_update(sender, instance, **kwargs):
+    """AI服务提供商更新时，使旧地址和密钥对应的客户端失效"""
+    if not instance.pk:
+        return
+    previous = AIProvider.objects.filter(pk=instance.pk).values('api_base_url', 'api_key').first()
+    if previous:
+        client_pool.invalidate(previous['api_base_url'], previous['api_key'])
+
+
+@receiver(post_delete, sender=AIProvider)
+def invalidate_client_on_provider_delete(sender, instance, **kwargs):
+    """AI服务提供商删除时，使对应的客户端失效"""
+    client_pool.invalidate(instance.api_base_url, instance.api_key)
+
+
+@receiver([post_save, post_delete], sender=ChatSettings)
+def invalidate_config_on_settings_change(sender, instance, **kwargs):
+    """聊天设置变更时清除用户的AI配置缓存"""
+    invalidate_ai_config(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=AIProvider)
+def invalidate_config_on_provider_change(sender, instance, **kwargs):
+    """AI服务提供商变更时清除用户的AI配置缓存和本进程保存的API密钥"""
+    invalidate_ai_config(instance.user_id)
+    invalidate_provider_api_key(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=AIModel)
+def invalidate_config_on_model_change(sender, instance, **kwargs):
+    """AI模型变更时清除所属用户的AI配置缓存"""
+    user_id = AIProvider.objects.filter(pk=instance.provider_id).values_list('user_id', flat=True).first()
+    invalidate_ai_config(user_id)
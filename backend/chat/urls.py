@@ -16,6 +16,7 @@ urlpatterns = [
     # 消息相关
     path('send-message/', views.send_message, name='send-message'),
     path('send-message-simple/', views.send_message_simple, name='send-message-simple'),
+    path('send-message-stream/', views.send_message_stream, name='send-message-stream'),
     
     # 设置相关
     path('settings/', views.ChatSettingsView.as_view(), name='chat-settings'),
@@ -6,8 +6,15 @@ from rest_framework.pagination import PageNumberPagination
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
-from django.http import StreamingHttpResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import CsrfViewMiddleware
 from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
 import json
 import time
 
@@ -19,6 +26,7 @@ from .serializers import (
     TestAPIConnectionSerializer, ModelDetectionSerializer
 )
 from .services import ChatService
+from .client_pool import client_pool
 
 
 class ConversationPagination(PageNumberPagination):
@@ -381,21 +389,16 @@ def test_api_connection(request):
                 }, status=status.HTTP_400_BAD_REQUEST)
             effective_api_key = api_key
         
-        # 创建临时客户端测试连接，设置超时时间
-        client = openai.OpenAI(
-            api_key=effective_api_key,
-            base_url=api_base_url,
-            timeout=30.0  # 30秒超时
-        )
-        
         # 发送测试请求
         try:
-            response = client.chat.completions.create(
-                model=test_model,
-                messages=[{'role': 'user', 'content': 'Hello'}],
-                max_tokens=10,
-                temperature=0.1
-            )
+            # 从共享连接池借用客户端测试连接，设置超时时间
+            with client_pool.lease(api_base_url, effective_api_key, timeout=30.0) as client:  # 30秒超时
+                response = client.chat.completions.create(
+                    model=test_model,
+                    messages=[{'role': 'user', 'content': 'Hello'}],
+                    max_tokens=10,
+                    temperature=0.1
+                )
             
             service_type = "本地服务" if is_local_service else "远程API服务"
             
@@ -495,13 +498,6 @@ def detect_models(request):
         
         import openai
         
-        # 创建客户端，设置较短的超时时间
-        client = openai.OpenAI(
-            api_key=effective_api_key,
-            base_url=provider.api_base_url,
-            timeout=30.0  # 30秒超时
-        )
-        
         # 获取模型列表
         try:
             import logging
@@ -509,7 +505,9 @@ def detect_models(request):
             
             logger.info(f"开始检测模型 - 提供商: {provider.name}, API地址: {provider.api_base_url}")
             
-            models_response = client.models.list()
+            # 从共享连接池借用客户端，设置较短的超时时间
+            with client_pool.lease(provider.api_base_url, effective_api_key, timeout=30.0) as client:  # 30秒超时
+                models_response = client.models.list()
             detected_models = []
             
             for model in models_response.data:
@@ -610,35 +608,83 @@ def test_stream(request):
     return response
 
 
-@api_view(['POST'])
-@permission_classes([IsAuthenticated])
-def send_message_simple(request):
-    """发送消息（非流式）"""
+async def _aauthenticate(request):
+    """
+    异步视图的用户认证
+    
+    与DRF默认配置保持一致：优先使用JWT认证，其次使用Session认证（需通过CSRF校验）。
+    
+    Returns:
+        (用户, 错误响应)，认证成功时错误响应为None
+    """
+    try:
+        result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except (InvalidToken, AuthenticationFailed):
+        return None, JsonResponse({'detail': '身份认证信息无效或已过期'}, status=status.HTTP_401_UNAUTHORIZED)
+    
+    if result:
+        return result[0], None
+    
+    user = await request.auser()
+    if user.is_authenticated:
+        csrf_check = CsrfViewMiddleware(lambda r: None)
+        csrf_check.process_request(request)
+        if csrf_check.process_view(request, None, (), {}) is not None:
+            return None, JsonResponse({'detail': 'CSRF校验失败'}, status=status.HTTP_403_FORBIDDEN)
+        return user, None
+    
+    return None, JsonResponse({'detail': '身份认证信息未提供。'}, status=status.HTTP_401_UNAUTHORIZED)
+
+
+def _parse_send_message_request(request):
+    """
+    解析并校验发送消息请求
+    
+    Returns:
+        (校验后的数据, 错误响应)
+    """
+    try:
+        data = json.loads(request.body or b'{}')
+    except (ValueError, UnicodeDecodeError):
+        return None, JsonResponse({'error': '请求体不是有效的JSON'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer = SendMessageSerializer(data=data)
+    if not serializer.is_valid():
+        return None, JsonResponse(
+            {'error': '数据验证失败', 'details': serializer.errors}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return serializer.validated_data, None
+
+
+@csrf_exempt
+@require_POST
+async def send_message_simple(request):
+    """
+    发送消息（非流式）
+    
+    异步视图：在ASGI下等待AI回复期间不占用工作线程。
+    """
+    user, error_response = await _aauthenticate(request)
+    if error_response:
+        return error_response
+    
+    validated_data, error_response = _parse_send_message_request(request)
+    if error_response:
+        return error_response
+    
     try:
-        # 验证数据
-        serializer = SendMessageSerializer(data=request.data)
-        if not serializer.is_valid():
-            return Response(
-                {'error': '数据验证失败', 'details': serializer.errors}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # 处理消息
         chat_service = ChatService()
-        message_content = serializer.validated_data['message']
-        conversation_id = serializer.validated_data.get('conversation_id')
-        
-        # 调用非流式发送消息方法
-        result = chat_service.send_message_simple(
-            user=request.user,
-            message_content=message_content,
-            conversation_id=conversation_id
+        result = await chat_service.asend_message_simple(
+            user=user,
+            message_content=validated_data['message'],
+            conversation_id=validated_data.get('conversation_id')
         )
         
-        return Response(result, status=status.HTTP_200_OK)
+        return JsonResponse(result, status=status.HTTP_200_OK)
         
     except ValueError as e:
-        return Response(
+        return JsonResponse(
             {'error': str(e)}, 
             status=status.HTTP_400_BAD_REQUEST
         )
@@ -646,7 +692,51 @@ def send_message_simple(request):
         import logging
         logger = logging.getLogger(__name__)
         logger.error(f"发送消息失败: {str(e)}")
-        return Response(
+        return JsonResponse(
             {'error': '服务器内部错误'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+@csrf_exempt
+@require_POST
+async def send_message_stream(request):
+    """
+    发送消息（流式）
+    
+    以Server-Sent Events形式实时返回思考过程和回答内容。
+    """
+    user, error_response = await _aauthenticate(request)
+    if error_response:
+        return error_response
+    
+    validated_data, error_response = _parse_send_message_request(request)
+    if error_response:
+        return error_response
+    
+    try:
+        chat_service = ChatService()
+        conversation, events = await chat_service.astart_stream_message(
+            user=user,
+            message_content=validated_data['message'],
+            conversation_id=validated_data.get('conversation_id')
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(f"流式发送消息失败: {str(e)}")
+        return JsonResponse(
+            {'error': '服务器内部错误'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    
+    async def event_stream():
+        async for event in events:
+            yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+    
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
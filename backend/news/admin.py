@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import NewsItem, FetchHistory, SystemConfig
+from .models import NewsItem, FetchHistory, SystemConfig, FeedSource
 
 
 @admin.register(NewsItem)
@@ -38,4 +38,40 @@ class FetchHistoryAdmin(admin.ModelAdmin):
 class SystemConfigAdmin(admin.ModelAdmin):
     list_display = ['key', 'value', 'description', 'updated_at']
     search_fields = ['key', 'description']
-    readonly_fields = ['created_at', 'updated_at']
\ No newline at end of file
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(FeedSource)
+class FeedSourceAdmin(admin.ModelAdmin):
+    list_display = ['name', 'enabled', 'status', 'avg_latency_ms', 'total_fetches', 'total_errors',
+                    'last_item_count', 'last_success_at', 'quarantined_until']
+    list_filter = ['enabled', 'status']
+    search_fields = ['name', 'url', 'description']
+    readonly_fields = ['total_fetches', 'total_errors', 'consecutive_failures', 'avg_latency_ms',
+                       'last_latency_ms', 'total_bytes', 'total_items', 'last_item_count', 'last_success_at',
+                       'last_error', 'last_error_at', 'quarantine_count', 'quarantine_reason',
+                       'created_at', 'updated_at']
+    actions = ['release_quarantine']
+    
+    fieldsets = (
+        ('基本信息', {
+            'fields': ('name', 'url', 'description', 'enabled')
+        }),
+        ('隔离状态', {
+            'fields': ('status', 'quarantined_until', 'quarantine_count', 'quarantine_reason')
+        }),
+        ('健康指标', {
+            'fields': ('total_fetches', 'total_errors', 'consecutive_failures', 'avg_latency_ms',
+                       'last_latency_ms', 'total_bytes', 'total_items', 'last_item_count',
+                       'last_success_at', 'last_error', 'last_error_at')
+        }),
+        ('时间', {
+            'fields': ('created_at', 'updated_at')
+        }),
+    )
+    
+    @admin.action(description='解除隔离')
+    def release_quarantine(self, request, queryset):
+        for feed in queryset:
+            feed.release()
+            feed.save()
@@ -0,0 +1,101 @@
+import json
+import logging
+import platform
+import random
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from news.models import NewsItem
+from news.services import NewsService
+
+
+class _Rollback(Exception):
+    """用于在基准测试结束后回滚事务"""
+
+
+def build_agent_items(count: int, seed: int = 0):
+    """生成与AI代理 /api/news/structured 返回格式一致的合成新闻条目"""
+    rng = random.Random(seed)
+    categories = [choice for choice, _ in NewsItem.CATEGORY_CHOICES]
+    importance = ['high', 'medium', 'low']
+    items = []
+    for i in range(count):
+        link = f'https://bench.invalid/articles/{seed}/{i}'
+        items.append({
+            'title': f'基准测试新闻 {i}: 大模型推理成本持续下降',
+            'source': f'Bench Feed {i % 50}',
+            'content': '合成的新闻正文内容，用于衡量入库性能。' * rng.randint(5, 30),
+            'summary': '合成的新闻摘要，长度与真实摘要相近。' * 4,
+            'original_link': link,
+            'url': link,
+            'category': rng.choice(categories),
+            'importance': rng.choice(importance),
+            'key_points': [f'要点{k}' for k in range(rng.randint(3, 5))],
+            'timestamp': f'2025-09-01T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00+08:00',
+            'source_description': '合成基准测试源',
+            'tags': ['人工智能']
+        })
+    return items
+
+
+class Command(BaseCommand):
+    help = '离线测量 NewsService.save_news_from_agent_data 的入库性能（在事务中运行并回滚）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=str, default='100,1000,10000',
+                            help='逗号分隔的条目数量，支持100到100000')
+        parser.add_argument('--seed', type=int, default=42, help='随机种子')
+        parser.add_argument('--output', type=str, help='结果JSON文件路径，默认输出到标准输出')
+
+    def handle(self, *args, **options):
+        # 只测量入库本身，关闭逐条新闻的INFO日志
+        logging.getLogger('news').setLevel(logging.WARNING)
+
+        sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        results = {
+            'benchmark': 'ingest',
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'database': connection.vendor,
+            'config': {'seed': options['seed']},
+            'runs': [],
+        }
+
+        for size in sizes:
+            self.stderr.write(f'运行入库基准测试: {size} 条...')
+            results['runs'].append(self._run_once(size, options['seed']))
+
+        output = json.dumps(results, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output)
+            self.stderr.write(self.style.SUCCESS(f"结果已保存到: {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def _run_once(self, size: int, seed: int):
+        """在事务中依次测量首次入库（全部新增）和重复入库（全部无变化），结束后回滚"""
+        agent_data = {'news_items': build_agent_items(size, seed)}
+        service = NewsService()
+        run = {'items': size}
+
+        try:
+            with transaction.atomic():
+                for phase in ('insert', 'reingest'):
+                    start = time.perf_counter()
+                    saved = service.save_news_from_agent_data(agent_data)
+                    elapsed = time.perf_counter() - start
+                    run[phase] = {
+                        'saved': saved,
+                        'seconds': round(elapsed, 3),
+                        'items_per_second': round(size / elapsed, 2) if elapsed else 0.0,
+                    }
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        return run
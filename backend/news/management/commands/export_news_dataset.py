@@ -0,0 +1,36 @@
+import json
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news.models import NewsItem
+
+
+class Command(BaseCommand):
+    help = '将NewsItem导出为JSONL，作为AI代理本地相关性过滤和分类模型的训练数据'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', type=str, required=True, help='输出的JSONL文件路径')
+        parser.add_argument('--since', type=str, help='只导出该日期（YYYY-MM-DD）之后的新闻')
+        parser.add_argument('--limit', type=int, help='最多导出的条数（按时间倒序）')
+
+    def handle(self, *args, **options):
+        queryset = NewsItem.objects.order_by('-timestamp')
+        if options['since']:
+            try:
+                since = datetime.strptime(options['since'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('日期格式错误，应为 YYYY-MM-DD')
+            queryset = queryset.filter(timestamp__date__gte=since)
+        if options['limit']:
+            queryset = queryset[:options['limit']]
+
+        fields = ['title', 'source', 'summary', 'content', 'category', 'importance', 'key_points', 'timestamp']
+        count = 0
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            for item in queryset.values(*fields).iterator(chunk_size=1000):
+                item['timestamp'] = item['timestamp'].isoformat()
+                f.write(json.dumps(item, ensure_ascii=False) + '\n')
+                count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'已导出 {count} 条新闻到 {options["output"]}'))
@@ -0,0 +1,62 @@
+# Generated manually for adding the FeedSource registry and seeding the default RSS sources
+
+from django.db import migrations, models
+
+
+DEFAULT_FEEDS = [
+    ('Hugging Face博客', 'https://huggingface.co/blog/feed.xml', 'Hugging Face官方博客，包含最新的AI模型和技术发布'),
+    ('Reddit机器学习', 'https://www.reddit.com/r/MachineLearning/.rss', 'Reddit机器学习社区热门讨论'),
+    ('MIT Tech Review', 'https://www.technologyreview.com/feed/', 'MIT科技评论科技新闻'),
+    ('OpenAI博客', 'https://openai.com/blog/rss.xml', 'OpenAI官方博客'),
+    ('DeepMind博客', 'https://deepmind.com/blog/feed/basic/', 'DeepMind官方博客'),
+]
+
+
+def seed_default_feeds(apps, schema_editor):
+    FeedSource = apps.get_model('news', 'FeedSource')
+    for name, url, description in DEFAULT_FEEDS:
+        FeedSource.objects.get_or_create(name=name, defaults={'url': url, 'description': description})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0002_remove_unique_fetch_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedSource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True, verbose_name='名称')),
+                ('url', models.URLField(max_length=1000, unique=True, verbose_name='RSS地址')),
+                ('description', models.CharField(blank=True, max_length=500, verbose_name='描述')),
+                ('enabled', models.BooleanField(default=True, verbose_name='是否启用')),
+                ('status', models.CharField(choices=[('active', '正常'), ('quarantined', '已隔离')], default='active', max_length=20, verbose_name='状态')),
+                ('total_fetches', models.PositiveIntegerField(default=0, verbose_name='抓取次数')),
+                ('total_errors', models.PositiveIntegerField(default=0, verbose_name='失败次数')),
+                ('consecutive_failures', models.PositiveIntegerField(default=0, verbose_name='连续失败次数')),
+                ('avg_latency_ms', models.FloatField(blank=True, null=True, verbose_name='平均耗时（毫秒）')),
+                ('last_latency_ms', models.FloatField(blank=True, null=True, verbose_name='最近耗时（毫秒）')),
+                ('total_bytes', models.BigIntegerField(default=0, verbose_name='累计下载字节')),
+                ('total_items', models.PositiveIntegerField(default=0, verbose_name='累计文章数')),
+                ('last_item_count', models.PositiveIntegerField(default=0, verbose_name='最近文章数')),
+                ('last_success_at', models.DateTimeField(blank=True, null=True, verbose_name='最近成功时间')),
+                ('last_error', models.TextField(blank=True, verbose_name='最近错误')),
+                ('last_error_at', models.DateTimeField(blank=True, null=True, verbose_name='最近失败时间')),
+                ('quarantine_count', models.PositiveIntegerField(default=0, verbose_name='连续隔离次数')),
+                ('quarantined_until', models.DateTimeField(blank=True, null=True, verbose_name='隔离截止时间')),
+                ('quarantine_reason', models.CharField(blank=True, max_length=200, verbose_name='隔离原因')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': 'RSS源',
+                'verbose_name_plural': 'RSS源',
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['enabled', 'status'], name='news_feedso_enabled_62a702_idx')],
+            },
+        ),
+        migrations.RunPython(seed_default_feeds, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,6 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
@@ -101,4 +104,141 @@ class SystemConfig(models.Model):
         ordering = ['key']
     
     def __str__(self):
-        return f"{self.key}: {self.value[:50]}"
\ No newline at end of file
+        return f"{self.key}: {self.value[:50]}"
+
+
+class FeedSource(models.Model):
+    """RSS源注册表（含抓取健康指标和自动隔离状态）"""
+    
+    STATUS_CHOICES = [
+        ('active', '正常'),
+        ('quarantined', '已隔离'),
+    ]
+    
+    # 平均耗时的指数滑动平均系数
+    LATENCY_SMOOTHING = 0.3
+    
+    name = models.CharField(max_length=200, unique=True, verbose_name='名称')
+    url = models.URLField(max_length=1000, unique=True, verbose_name='RSS地址')
+    description = models.CharField(max_length=500, blank=True, verbose_name='描述')
+    enabled = models.BooleanField(default=True, verbose_name='是否启用')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active', verbose_name='状态')
+    
+    total_fetches = models.PositiveIntegerField(default=0, verbose_name='抓取次数')
+    total_errors = models.PositiveIntegerField(default=0, verbose_name='失败次数')
+    consecutive_failures = models.PositiveIntegerField(default=0, verbose_name='连续失败次数')
+    avg_latency_ms = models.FloatField(null=True, blank=True, verbose_name='平均耗时（毫秒）')
+    last_latency_ms = models.FloatField(null=True, blank=True, verbose_name='最近耗时（毫秒）')
+    total_bytes = models.BigIntegerField(default=0, verbose_name='累计下载字节')
+    total_items = models.PositiveIntegerField(default=0, verbose_name='累计文章数')
+    last_item_count = models.PositiveIntegerField(default=0, verbose_name='最近文章数')
+    last_success_at = models.DateTimeField(null=True, blank=True, verbose_name='最近成功时间')
+    last_error = models.TextField(blank=True, verbose_name='最近错误')
+    last_error_at = models.DateTimeField(null=True, blank=True, verbose_name='最近失败时间')
+    quarantine_count = models.PositiveIntegerField(default=0, verbose_name='连续隔离次数')
+    quarantined_until = models.DateTimeField(null=True, blank=True, verbose_name='隔离截止时间')
+    quarantine_reason = models.CharField(max_length=200, blank=True, verbose_name='隔离原因')
+    
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+    
+    class Meta:
+        verbose_name = 'RSS源'
+        verbose_name_plural = 'RSS源'
+        ordering = ['name']
+        indexes = [
+            models.Index(fields=['enabled', 'status']),
+        ]
+    
+    def __str__(self):
+        return self.name
+    
+    @property
+    def error_rate(self) -> float:
+        return self.total_errors / self.total_fetches if self.total_fetches else 0.0
+    
+    @property
+    def avg_items(self) -> float:
+        successes = self.total_fetches - self.total_errors
+        return self.total_items / successes if successes else 0.0
+    
+    @property
+    def is_probe_due(self) -> bool:
+        """隔离期已过，可以重新探测"""
+        return self.status == 'quarantined' and (
+            self.quarantined_until is None or self.quarantined_until <= timezone.now()
+        )
+    
+    def record_fetch(self, success: bool, latency_ms: float = 0.0, bytes_count: int = 0,
+                     item_count: int = 0, error: str = ''):
+        """
+        记录一次抓取结果，并根据连续失败次数和平均耗时决定是否隔离
+        
+        Args:
+            success: 是否抓取成功
+            latency_ms: 抓取耗时（毫秒）
+            bytes_count: 下载字节数
+            item_count: 得到的文章数
+            error: 失败原因
+        """
+        now = timezone.now()
+        self.total_fetches += 1
+        self.last_latency_ms = latency_ms
+        if success and self.status == 'quarantined':
+            # 探测成功时以本次耗时重新开始滑动平均，避免隔离前的高平均耗时使快速的探测再次被隔离
+            self.avg_latency_ms = latency_ms
+        else:
+            self.avg_latency_ms = latency_ms if self.avg_latency_ms is None else (
+                self.LATENCY_SMOOTHING * latency_ms + (1 - self.LATENCY_SMOOTHING) * self.avg_latency_ms
+            )
+        
+        if success:
+            self.consecutive_failures = 0
+            self.total_bytes += bytes_count
+            self.total_items += item_count
+            self.last_item_count = item_count
+            self.last_success_at = now
+        else:
+            self.total_errors += 1
+            self.consecutive_failures += 1
+            self.last_error = error[:2000]
+            self.last_error_at = now
+        
+        reason = ''
+        if self.consecutive_failures >= getattr(settings, 'FEED_QUARANTINE_FAILURES', 3):
+            reason = f'连续失败{self.consecutive_failures}次'
+        elif (self.total_fetches >= getattr(settings, 'FEED_SLOW_MIN_FETCHES', 5)
+              and self.avg_latency_ms > getattr(settings, 'FEED_SLOW_LATENCY_MS', 20000)):
+            reason = f'平均耗时{self.avg_latency_ms:.0f}毫秒'
+        
+        if reason:
+            self.quarantine(reason)
+        elif self.status == 'quarantined':
+            # 探测成功，恢复正常
+            self.status = 'active'
+            self.quarantine_count = 0
+            self.quarantined_until = None
+            self.quarantine_reason = ''
+    
+    def claim_probe(self, now=None):
+        """领取一次探测：在探测窗口内隔离期视为未过，其他抓取任务不会重复探测"""
+        minutes = getattr(settings, 'FEED_PROBE_WINDOW_MINUTES', 15)
+        self.quarantined_until = (now or timezone.now()) + timedelta(minutes=minutes)
+    
+    def quarantine(self, reason: str):
+        """隔离该源，隔离时长随连续隔离次数指数增长"""
+        base = getattr(settings, 'FEED_QUARANTINE_BASE_MINUTES', 30)
+        limit = getattr(settings, 'FEED_QUARANTINE_MAX_MINUTES', 10080)
+        minutes = min(base * 2 ** self.quarantine_count, limit)
+        self.status = 'quarantined'
+        self.quarantine_count += 1
+        self.quarantined_until = timezone.now() + timedelta(minutes=minutes)
+        self.quarantine_reason = reason
+    
+    def release(self):
+        """手动解除隔离并清零连续失败次数"""
+        self.status = 'active'
+        self.consecutive_failures = 0
+        self.quarantine_count = 0
+        self.quarantined_until = None
+        self.quarantine_reason = ''
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import NewsItem, FetchHistory, SystemConfig
+from .models import NewsItem, FetchHistory, SystemConfig, FeedSource
 
 
 class NewsItemSerializer(serializers.ModelSerializer):
@@ -76,4 +76,49 @@ class FetchStatusSerializer(serializers.Serializer):
     progress = serializers.IntegerField(min_value=0, max_value=100)
     message = serializers.CharField()
     start_time = serializers.DateTimeField(allow_null=True)
-    estimated_completion = serializers.DateTimeField(allow_null=True)
\ No newline at end of file
+    estimated_completion = serializers.DateTimeField(allow_null=True)
+
+
+class FeedSourceSerializer(serializers.ModelSerializer):
+    """RSS源序列化器（健康指标只读）"""
+    
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    error_rate = serializers.FloatField(read_only=True)
+    avg_items = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = FeedSource
+        fields = [
+            'id', 'name', 'url', 'description', 'enabled', 'status', 'status_display',
+            'total_fetches', 'total_errors', 'error_rate', 'consecutive_failures',
+            'avg_latency_ms', 'last_latency_ms', 'total_bytes', 'total_items', 'avg_items',
+            'last_item_count', 'last_success_at', 'last_error', 'last_error_at',
+            'quarantine_count', 'quarantined_until', 'quarantine_reason',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'id', 'status', 'total_fetches', 'total_errors', 'consecutive_failures',
+            'avg_latency_ms', 'last_latency_ms', 'total_bytes', 'total_items', 'last_item_count',
+            'last_success_at', 'last_error', 'last_error_at', 'quarantine_count',
+            'quarantined_until', 'quarantine_reason', 'created_at', 'updated_at'
+        ]
+
+
+class FeedSourceImportSerializer(serializers.Serializer):
+    """批量导入的单个RSS源"""
+    
+    name = serializers.CharField(max_length=200)
+    url = serializers.URLField(max_length=1000)
+    description = serializers.CharField(max_length=500, required=False, allow_blank=True, default='')
+    enabled = serializers.BooleanField(required=False, default=True)
+
+
+class FeedHealthReportSerializer(serializers.Serializer):
+    """AI新闻代理上报的单个RSS源抓取结果"""
+    
+    name = serializers.CharField(max_length=200)
+    success = serializers.BooleanField()
+    latency_ms = serializers.FloatField(min_value=0, required=False, default=0.0)
+    bytes = serializers.IntegerField(min_value=0, required=False, default=0)
+    items = serializers.IntegerField(min_value=0, required=False, default=0)
+    error = serializers.CharField(required=False, allow_blank=True, default='')
@@ -1,19 +1,23 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from django.db import transaction
 from django.db.models import Q, Count
 from django.utils import timezone
 from datetime import timedelta
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 
-from .models import NewsItem, FetchHistory, SystemConfig
+from .models import NewsItem, FetchHistory, SystemConfig, FeedSource
 from .serializers import (
     NewsItemSerializer, 
     FetchHistorySerializer, 
     SystemConfigSerializer,
-    NewsStatsSerializer
+    NewsStatsSerializer,
+    FeedSourceSerializer,
+    FeedSourceImportSerializer,
+    FeedHealthReportSerializer
 )
 from .services import NewsService
 from .pagination import DynamicPageNumberPagination
@@ -262,6 +266,140 @@ class SystemConfigViewSet(viewsets.ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
+class FeedSourceViewSet(viewsets.ModelViewSet):
+    """RSS源注册表视图集：增删改和批量导入需要管理员权限，AI新闻代理通过active获取待抓取的源、通过report上报健康指标"""
+    
+    queryset = FeedSource.objects.all()
+    serializer_class = FeedSourceSerializer
+    pagination_class = DynamicPageNumberPagination
+    
+    def get_permissions(self):
+        if self.action in ('list', 'retrieve', 'active', 'report'):
+            return [IsAuthenticated()]
+        return [IsAuthenticated(), IsAdminUser()]
+    
+    def get_queryset(self):
+        queryset = FeedSource.objects.all()
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        enabled = self.request.query_params.get('enabled')
+        if enabled is not None:
+            queryset = queryset.filter(enabled=enabled.lower() == 'true')
+        return queryset
+    
+    @extend_schema(
+        summary="获取RSS源列表",
+        tags=["RSS源管理"],
+        parameters=[
+            OpenApiParameter(name='status', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                             description='状态（active/quarantined）'),
+            OpenApiParameter(name='enabled', type=OpenApiTypes.BOOL, location=OpenApiParameter.QUERY,
+                             description='是否启用'),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+    
+    @extend_schema(
+        summary="获取待抓取的RSS源",
+        description="返回已启用且未隔离的源，以及隔离期已过、需要重新探测的源（每个探测窗口内只返回给一个调用方）",
+        tags=["RSS源管理"]
+    )
+    @action(detail=False, methods=['get'])
+    def active(self, request):
+        now = timezone.now()
+        with transaction.atomic():
+            # 领取隔离期已过的源：锁定后把隔离截止时间推迟一个探测窗口，并发请求不会拿到同一个探测
+            probes = list(
+                FeedSource.objects.select_for_update().filter(enabled=True, status='quarantined').filter(
+                    Q(quarantined_until__isnull=True) | Q(quarantined_until__lte=now)
+                )
+            )
+            for feed in probes:
+                feed.claim_probe(now)
+                feed.save(update_fields=['quarantined_until', 'updated_at'])
+        
+        feeds = list(FeedSource.objects.filter(enabled=True, status='active')) + probes
+        feeds.sort(key=lambda feed: feed.name)
+        return Response([
+            {
+                'name': feed.name,
+                'url': feed.url,
+                'description': feed.description,
+                'probe': feed.status == 'quarantined',
+            }
+            for feed in feeds
+        ])
+    
+    @extend_schema(
+        summary="上报RSS源抓取结果",
+        tags=["RSS源管理"],
+        request=FeedHealthReportSerializer(many=True)
+    )
+    @action(detail=False, methods=['post'])
+    def report(self, request):
+        serializer = FeedHealthReportSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        
+        results = {item['name']: item for item in serializer.validated_data}
+        quarantined = []
+        with transaction.atomic():
+            feeds = FeedSource.objects.select_for_update().filter(name__in=results.keys())
+            for feed in feeds:
+                item = results[feed.name]
+                was_quarantined = feed.status == 'quarantined'
+                feed.record_fetch(
+                    item['success'], item['latency_ms'], item['bytes'], item['items'], item['error']
+                )
+                feed.save()
+                if feed.status == 'quarantined' and not was_quarantined:
+                    quarantined.append(feed.name)
+        
+        return Response({
+            'updated': len(feeds),
+            'unknown': sorted(set(results) - {feed.name for feed in feeds}),
+            'quarantined': quarantined,
+        })
+    
+    @extend_schema(
+        summary="批量导入RSS源",
+        description="按名称新增或更新RSS源，已有源的健康指标保持不变",
+        tags=["RSS源管理"],
+        request=FeedSourceImportSerializer(many=True)
+    )
+    @action(detail=False, methods=['post'], url_path='bulk-import')
+    def bulk_import(self, request):
+        serializer = FeedSourceImportSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        
+        created = updated = 0
+        with transaction.atomic():
+            for item in serializer.validated_data:
+                _, is_created = FeedSource.objects.update_or_create(
+                    name=item['name'],
+                    defaults={'url': item['url'], 'description': item['description'], 'enabled': item['enabled']}
+                )
+                if is_created:
+                    created += 1
+                else:
+                    updated += 1
+        
+        return Response({'created': created, 'updated': updated}, status=status.HTTP_201_CREATED)
+    
+    @extend_schema(
+        summary="解除RSS源隔离",
+        tags=["RSS源管理"],
+        request=None
+    )
+    @action(detail=True, methods=['post'])
+    def release(self, request, pk=None):
+        feed = self.get_object()
+        feed.release()
+        feed.save()
+        return Response(self.get_serializer(feed).data)
+
+
 class NewsServiceViewSet(viewsets.ViewSet):
     """新闻服务视图集"""
     